@@ -3,14 +3,15 @@ Agent Logic - The brain of the Fan Engagement System.
 This agent uses OpenRouter API to decide which tool to use based on user input.
 """
 
-import requests
 import json
 import re
-from typing import Dict, List, Optional, Tuple
-from app.memory.database import Database
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.llm.client import LLMClient
+from app.memory.async_database import AsyncDatabase
 from app.tools.quiz_generator import QuizGeneratorTool
 from app.tools.prediction_engine import PredictionEngineTool
 from app.tools.reward_tracker import FanRewardTrackerTool
+from app.tools.quiz_cache import QuizCache
 
 class ActionType:
     """Types of actions the agent can take"""
@@ -19,17 +20,28 @@ class ActionType:
     PREDICTION = "prediction"
     STATS = "stats"
 
+# Phrases specific enough to route without asking the LLM
+OBVIOUS_QUIZ_WORDS = ["quiz", "trivia"]
+OBVIOUS_STATS_WORDS = ["my stats", "leaderboard", "my points", "my badges", "my rank"]
+
 class Agent:
-    def __init__(self, api_key: str, db: Database):
-        """Initialize the agent with API key and database"""
+    def __init__(self, api_key: str, db: AsyncDatabase, llm: Optional[LLMClient] = None,
+                 fused_turn: bool = True):
+        """
+        Initialize the agent with API key, async database and shared LLM client.
+        With fused_turn, intent classification and the chat reply come back from a
+        single LLM call instead of decide_action followed by _handle_chat.
+        """
         self.api_key = api_key
         self.db = db
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.llm = llm or LLMClient(api_key)
+        self.fused_turn = fused_turn
         
-        # Initialize tools
-        self.quiz_tool = QuizGeneratorTool(api_key)
-        self.prediction_tool = PredictionEngineTool(api_key)
-        self.reward_tool = FanRewardTrackerTool(db)
+        # Initialize tools (all share one pooled LLM client)
+        self.quiz_cache = QuizCache(db)
+        self.quiz_tool = QuizGeneratorTool(api_key, self.llm, self.quiz_cache)
+        self.prediction_tool = PredictionEngineTool(api_key, self.llm)
+        self.reward_tool = FanRewardTrackerTool(db.database)
         
         # System prompt that defines agent behavior
         self.system_prompt = """You are an AI Sports Fan Engagement Agent. Your role is to help sports fans by:
@@ -55,7 +67,7 @@ Guidelines:
 
 Keep responses friendly, concise, and focused on the user's needs."""
 
-    def decide_action(self, user_id: str, message: str) -> Tuple[str, str]:
+    async def decide_action(self, user_id: str, message: str) -> Tuple[str, str]:
         """
         Decide which action to take based on user message.
         Uses OpenRouter to understand intent.
@@ -65,11 +77,11 @@ Keep responses friendly, concise, and focused on the user's needs."""
         """
         
         # Get user context
-        user = self.db.get_user(user_id)
+        user = await self.db.get_user(user_id)
         user_context = f"User: {user['username']}, Team: {user['favorite_team']}" if user else "New user"
         
         # Recent chat history for context
-        chat_history = self.db.get_user_chat_history(user_id, limit=3)
+        chat_history = await self.db.get_user_chat_history(user_id, limit=3)
         
         intent_prompt = f"""Given this user message, decide what action to take.
 
@@ -95,28 +107,14 @@ For other actions, extracted_params can be empty.
 """
 
         try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "openrouter/auto",
-                    "messages": [{"role": "user", "content": intent_prompt}],
-                    "temperature": 0.3  # Lower temp for more consistent decision-making
-                }
-            )
+            # Lower temp for more consistent decision-making
+            content = await self.llm.complete(intent_prompt, temperature=0.3, timeout=15)
+            decision = json.loads(content)
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                decision = json.loads(content)
-                
-                action = decision.get("action", "chat")
-                params = decision.get("extracted_params", {})
-                
-                return action, json.dumps(params)
+            action = decision.get("action", "chat")
+            params = decision.get("extracted_params", {})
+            
+            return action, json.dumps(params)
         
         except Exception as e:
             print(f"Error in decide_action: {e}")
@@ -137,7 +135,171 @@ For other actions, extracted_params can be empty.
         else:
             return ActionType.CHAT, "{}"
 
-    def process_message(self, user_id: str, message: str) -> Dict:
+    def _preclassify(self, message: str) -> Optional[Tuple[str, Dict]]:
+        """
+        Cheap local routing for obvious quiz or stats requests.
+        Builds on _fallback_action_decision but only trusts its quiz and stats
+        answers when the message contains an unambiguous phrase.
+        
+        Returns:
+            Tuple of (action_type, params), or None if the LLM should decide
+        """
+        action, _ = self._fallback_action_decision(message)
+        message_lower = message.lower()
+        
+        if action == ActionType.QUIZ and any(word in message_lower for word in OBVIOUS_QUIZ_WORDS):
+            params = {}
+            teams = self._extract_teams_from_message(message)
+            if teams:
+                params["team"] = teams[0]
+            return ActionType.QUIZ, params
+        if action == ActionType.STATS and any(word in message_lower for word in OBVIOUS_STATS_WORDS):
+            return ActionType.STATS, {}
+        return None
+
+    @staticmethod
+    def _coerce_decision(decision: Dict) -> Tuple[str, Dict]:
+        """Action and params of a decision, ignoring values the model gave the wrong JSON type"""
+        action = decision.get("action", ActionType.CHAT)
+        params = decision.get("extracted_params") or {}
+        if not isinstance(action, str):
+            action = ActionType.CHAT
+        if not isinstance(params, dict):
+            params = {}
+        return action, params
+
+    async def decide_and_reply(self, message: str, user: Dict) -> Tuple[str, Dict, Optional[str]]:
+        """
+        Classify intent, extract parameters and draft the chat reply in one LLM call.
+        
+        Returns:
+            Tuple of (action_type, params, reply); reply may be None for tool actions
+        """
+        prompt = f"""{self.system_prompt}
+
+User Profile: User {user['username']} is a fan of the {user['favorite_team']}.
+User Message: "{message}"
+
+Decide what action to take and answer in the same response.
+
+Available actions:
+1. "chat" - For general sports questions and conversation
+2. "quiz" - For quiz generation requests (extract team and difficulty if mentioned)
+3. "prediction" - For game outcome predictions (extract team names if mentioned)
+4. "stats" - For requests about user stats, leaderboard, achievements
+
+Respond in JSON format ONLY (no markdown):
+{{
+    "action": "chat|quiz|prediction|stats",
+    "extracted_params": {{"key": "value"}},
+    "reply": "your helpful, engaging, concise response if action is chat, otherwise empty"
+}}
+
+For quiz action, extract: team, difficulty (easy/medium/hard)
+For prediction action, extract: team1, team2
+For other actions, extracted_params can be empty.
+"""
+
+        try:
+            content = await self.llm.complete(prompt, temperature=0.5, timeout=30)
+            decision = json.loads(content)
+            
+            # The model may answer with the wrong JSON types; don't let them reach the handlers
+            action, params = self._coerce_decision(decision)
+            reply = decision.get("reply") or None
+            if not isinstance(reply, str):
+                reply = None
+            return action, params, reply
+        
+        except Exception as e:
+            print(f"Error in decide_and_reply: {e}")
+        
+        # Fallback: use keyword matching, no drafted reply
+        action, params_str = self._fallback_action_decision(message)
+        return action, json.loads(params_str), None
+
+    async def stream_decide_and_reply(self, message: str, user: Dict) -> Tuple[str, Dict, Optional[AsyncIterator[str]]]:
+        """
+        Streaming form of decide_and_reply: the model writes its decision as one
+        JSON line and then the chat reply, so a chat answer streams from the same call.
+        
+        Returns:
+            Tuple of (action_type, params, reply deltas); the deltas are None for tool actions
+        """
+        prompt = f"""{self.system_prompt}
+
+User Profile: User {user['username']} is a fan of the {user['favorite_team']}.
+User Message: "{message}"
+
+Decide what action to take and answer in the same response.
+
+Available actions:
+1. "chat" - For general sports questions and conversation
+2. "quiz" - For quiz generation requests (extract team and difficulty if mentioned)
+3. "prediction" - For game outcome predictions (extract team names if mentioned)
+4. "stats" - For requests about user stats, leaderboard, achievements
+
+Respond with a single line of JSON (no markdown), then a newline:
+{{"action": "chat|quiz|prediction|stats", "extracted_params": {{"key": "value"}}}}
+If the action is chat, follow it with your helpful, engaging, concise response as plain text.
+Otherwise write nothing after the JSON line.
+
+For quiz action, extract: team, difficulty (easy/medium/hard)
+For prediction action, extract: team1, team2
+For other actions, extracted_params can be empty.
+"""
+
+        stream = self.llm.stream(prompt, temperature=0.5, timeout=30)
+        buffer = ""
+        try:
+            # Read just far enough to see the decision line
+            async for delta in stream:
+                buffer += delta
+                if "\n" in buffer.lstrip():
+                    break
+        except Exception as e:
+            print(f"Error in stream_decide_and_reply: {e}")
+            await stream.aclose()
+            action, params_str = self._fallback_action_decision(message)
+            if action == ActionType.CHAT:
+                return action, {}, self._stream_chat(message, user)
+            return action, json.loads(params_str), None
+        
+        header, _, rest = buffer.lstrip().partition("\n")
+        try:
+            decision = json.loads(header)
+            if not isinstance(decision, dict):
+                raise ValueError("decision is not an object")
+            action, params = self._coerce_decision(decision)
+        except ValueError:
+            # The model skipped the decision line; if it is chatting, the text is the reply
+            action, params_str = self._fallback_action_decision(message)
+            params = json.loads(params_str)
+            rest = buffer
+        
+        if action in (ActionType.QUIZ, ActionType.PREDICTION, ActionType.STATS):
+            await stream.aclose()
+            return action, params, None
+        return ActionType.CHAT, params, self._stream_reply(rest.lstrip("\n"), stream, user)
+
+    async def _stream_reply(self, first: str, stream: AsyncIterator[str], user: Dict) -> AsyncIterator[str]:
+        """Continue a fused stream past its decision line, falling back to the canned reply if nothing arrives"""
+        sent_any = bool(first)
+        if first:
+            yield first
+        try:
+            async for delta in stream:
+                sent_any = True
+                yield delta
+        except Exception as e:
+            print(f"Error in streaming chat: {e}")
+        finally:
+            await stream.aclose()
+        
+        if not sent_any:
+            yield self._chat_fallback(user)
+
+    async def process_message(self, user_id: str, message: str) -> Dict:
         """
         Main method to process user message and generate response.
         
@@ -146,31 +308,96 @@ For other actions, extracted_params can be empty.
         """
         
         # Ensure user exists
-        user = self.db.get_user(user_id)
-        if not user:
-            self.db.create_user(user_id, f"User_{user_id[:8]}")
-            user = self.db.get_user(user_id)
-        
-        # Decide which action to take
-        action, params_str = self.decide_action(user_id, message)
-        params = json.loads(params_str)
+        user = await self._ensure_user(user_id)
+        
+        # Decide which action to take: obvious intents skip the LLM entirely,
+        # otherwise one fused call (or the classic two-step flow) decides
+        reply = None
+        preclassified = self._preclassify(message)
+        if preclassified:
+            action, params = preclassified
+        elif self.fused_turn:
+            action, params, reply = await self.decide_and_reply(message, user)
+        else:
+            action, params_str = await self.decide_action(user_id, message)
+            params = json.loads(params_str)
         
         # Execute appropriate action
+        if action == ActionType.CHAT and reply:  # already answered by the fused call
+            response_text, tool_name, quiz_data = reply, "chat", None
+        else:
+            response_text, tool_name, quiz_data = await self._run_action(action, params, message, user)
+        
+        # Store in database
+        await self.db.add_chat_message(user_id, message, response_text, tool_name)
+        
+        return self._build_result(user_id, message, response_text, tool_name, action, quiz_data)
+
+    async def stream_message(self, user_id: str, message: str) -> AsyncIterator[Dict]:
+        """
+        Process a user message, streaming chat replies token by token.
+        Yields {"event": "token", "delta": ...} for each chunk of a chat reply, then a
+        final {"event": "done", ...} carrying the same fields as process_message.
+        Tool actions produce only the final event. The reply is saved when the stream ends.
+        """
+        user = await self._ensure_user(user_id)
+        
+        # Obvious intents skip the LLM; otherwise one streamed call classifies and,
+        # for chat, carries on with the reply (or the classic two-step flow)
+        deltas = None
+        preclassified = self._preclassify(message)
+        if preclassified:
+            action, params = preclassified
+        elif self.fused_turn:
+            action, params, deltas = await self.stream_decide_and_reply(message, user)
+        else:
+            action, params_str = await self.decide_action(user_id, message)
+            params = json.loads(params_str)
+        
+        if action not in (ActionType.QUIZ, ActionType.PREDICTION, ActionType.STATS):
+            action = ActionType.CHAT
+            parts = []
+            try:
+                async for delta in deltas or self._stream_chat(message, user):
+                    parts.append(delta)
+                    yield {"event": "token", "delta": delta}
+            finally:
+                # Persist whatever was generated, even if the client went away mid-stream
+                response_text = "".join(parts)
+                await self.db.add_chat_message(user_id, message, response_text, "chat")
+            yield {"event": "done", **self._build_result(user_id, message, response_text, "chat", action, None)}
+            return
+        
+        response_text, tool_name, quiz_data = await self._run_action(action, params, message, user)
+        await self.db.add_chat_message(user_id, message, response_text, tool_name)
+        yield {"event": "done", **self._build_result(user_id, message, response_text, tool_name, action, quiz_data)}
+
+    async def _ensure_user(self, user_id: str) -> Dict:
+        """Get the user profile, creating a default one on first contact"""
+        user = await self.db.get_user(user_id)
+        if not user:
+            created = await self.db.create_user(user_id, f"User_{user_id[:8]}")
+            if created.get("success"):
+                await self.db.run(self.reward_tool.award_badges, user_id, created["counters"])
+            user = await self.db.get_user(user_id)
+        return user
+
+    async def _run_action(self, action: str, params: Dict, message: str,
+                          user: Dict) -> Tuple[str, str, Optional[Dict]]:
+        """Execute the chosen action; returns (response_text, tool_name, quiz_data)"""
         if action == ActionType.QUIZ:
-            response_text, tool_name, quiz_data = self._handle_quiz(message, user, params)
+            return await self._handle_quiz(message, user, params)
         elif action == ActionType.PREDICTION:
-            response_text, tool_name = self._handle_prediction(message, user, params)
-            quiz_data = None
+            response_text, tool_name = await self._handle_prediction(message, user, params)
         elif action == ActionType.STATS:
-            response_text, tool_name = self._handle_stats(user_id, user)
-            quiz_data = None
+            response_text, tool_name = await self._handle_stats(self._get_user_id_from_user_dict(user), user)
         else:  # CHAT
-            response_text, tool_name = self._handle_chat(message, user)
-            quiz_data = None
-        
-        # Store in database
-        self.db.add_chat_message(user_id, message, response_text, tool_name)
-        
+            response_text, tool_name = await self._handle_chat(message, user)
+        return response_text, tool_name, None
+
+    def _build_result(self, user_id: str, message: str, response_text: str,
+                      tool_name: str, action: str, quiz_data: Optional[Dict]) -> Dict:
+        """Build the response payload returned to the API layer"""
         return {
             "user_id": user_id,
             "message": message,
@@ -180,41 +407,50 @@ For other actions, extracted_params can be empty.
             "quiz_data": quiz_data
         }
 
-    def _handle_chat(self, message: str, user: Dict) -> Tuple[str, str]:
-        """Handle general chat requests"""
+    def _chat_prompt(self, message: str, user: Dict) -> str:
+        """Build the prompt for a general chat reply"""
         user_context = f"User is a fan of the {user['favorite_team']}."
         
-        prompt = f"""{self.system_prompt}
+        return f"""{self.system_prompt}
 
 User Profile: {user_context}
 User Message: {message}
 
 Provide a helpful, engaging response about sports. Keep it concise and friendly."""
 
+    def _chat_fallback(self, user: Dict) -> str:
+        """Canned reply used when the LLM is unavailable"""
+        return f"I appreciate your question about sports! I'd be happy to discuss more about {user['favorite_team']} or any sports topic. What would you like to know?"
+
+    async def _handle_chat(self, message: str, user: Dict) -> Tuple[str, str]:
+        """Handle general chat requests"""
+        prompt = self._chat_prompt(message, user)
+
         try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "openrouter/auto",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7
-                }
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"], "chat"
+            content = await self.llm.complete(prompt, temperature=0.7, timeout=30)
+            return content, "chat"
         
         except Exception as e:
             print(f"Error in chat: {e}")
         
-        return f"I appreciate your question about sports! I'd be happy to discuss more about {user['favorite_team']} or any sports topic. What would you like to know?", "chat"
+        return self._chat_fallback(user), "chat"
 
-    def _handle_quiz(self, message: str, user: Dict, params: Dict) -> Tuple[str, str, Optional[Dict]]:
+    async def _stream_chat(self, message: str, user: Dict) -> AsyncIterator[str]:
+        """Stream a general chat reply, falling back to the canned reply if nothing arrives"""
+        prompt = self._chat_prompt(message, user)
+        sent_any = False
+        
+        try:
+            async for delta in self.llm.stream(prompt, temperature=0.7, timeout=30):
+                sent_any = True
+                yield delta
+        except Exception as e:
+            print(f"Error in streaming chat: {e}")
+        
+        if not sent_any:
+            yield self._chat_fallback(user)
+
+    async def _handle_quiz(self, message: str, user: Dict, params: Dict) -> Tuple[str, str, Optional[Dict]]:
         """Handle quiz generation with levels 1-10"""
         team = params.get("team", user["favorite_team"])
         level = params.get("level", 1)
@@ -228,7 +464,7 @@ Provide a helpful, engaging response about sports. Keep it concise and friendly.
         level = max(1, min(10, level))  # Clamp between 1-10
         
         # Generate quiz
-        quiz = self.quiz_tool.generate_quiz(team, level)
+        quiz = await self.quiz_tool.generate_quiz(team, level)
         
         # Format quiz response
         response = f"🎯 **Sports Trivia Quiz: {team}**\n"
@@ -255,7 +491,7 @@ Provide a helpful, engaging response about sports. Keep it concise and friendly.
         
         return response, "quiz", quiz_data
 
-    def _handle_prediction(self, message: str, user: Dict, params: Dict) -> Tuple[str, str]:
+    async def _handle_prediction(self, message: str, user: Dict, params: Dict) -> Tuple[str, str]:
         """Handle game outcome prediction"""
         
         # Extract team names from message or params
@@ -271,7 +507,7 @@ Provide a helpful, engaging response about sports. Keep it concise and friendly.
                 return "Please specify two teams for prediction (e.g., 'Lakers vs Celtics')", "prediction"
         
         # Make prediction
-        pred = self.prediction_tool.predict_outcome(team1, team2)
+        pred = await self.prediction_tool.predict_outcome(team1, team2)
         
         response = f"🔮 **Game Prediction: {pred.team1} vs {pred.team2}**\n\n"
         response += f"🏆 Predicted Winner: {pred.predicted_winner}\n"
@@ -281,7 +517,7 @@ Provide a helpful, engaging response about sports. Keep it concise and friendly.
         response += "Make this prediction official? You'll earn points when the game result is known!"
         
         # Store prediction
-        self.db.add_prediction(
+        await self.db.add_prediction(
             user_id=self._get_user_id_from_user_dict(user),
             team1=pred.team1,
             team2=pred.team2,
@@ -292,10 +528,10 @@ Provide a helpful, engaging response about sports. Keep it concise and friendly.
         
         return response, "prediction"
 
-    def _handle_stats(self, user_id: str, user: Dict) -> Tuple[str, str]:
+    async def _handle_stats(self, user_id: str, user: Dict) -> Tuple[str, str]:
         """Handle user statistics and leaderboard requests"""
-        stats = self.reward_tool.get_user_stats(user_id)
-        leaderboard = self.reward_tool.get_leaderboard(5)
+        stats = await self.db.run(self.reward_tool.get_user_stats, user_id)
+        leaderboard = await self.db.run(self.reward_tool.get_leaderboard, 5)
         
         response = f"📊 **Your Stats**\n\n"
         response += f"Username: {stats['username']}\n"
@@ -345,3 +581,7 @@ Provide a helpful, engaging response about sports. Keep it concise and friendly.
     def _get_user_id_from_user_dict(self, user: Dict) -> str:
         """Extract user_id from user dict"""
         return user.get("user_id") or user.get("id") or ""
+
+    async def aclose(self):
+        """Stop background work started by the tools"""
+        await self.quiz_cache.aclose()
@@ -0,0 +1,6 @@
+"""
+__init__.py for llm module
+"""
+from .client import LLMClient, LLMError
+
+__all__ = ["LLMClient", "LLMError"]
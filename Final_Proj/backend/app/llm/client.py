@@ -0,0 +1,213 @@
+"""
+Shared async client for OpenRouter chat completions.
+One pooled keep-alive connection set (HTTP/2 when the h2 package is installed)
+is reused by the agent and every tool, with per-call timeouts, a concurrency
+limit and retries with jittered exponential backoff.
+"""
+
+import asyncio
+import json
+import os
+import random
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_MODEL = "openrouter/auto"
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class LLMError(Exception):
+    """Raised when a completion cannot be obtained after all retries"""
+
+class LLMClient:
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 model: str = DEFAULT_MODEL, timeout: float = 30.0,
+                 max_concurrency: int = 16, max_connections: int = 20,
+                 max_retries: int = 2, backoff_base: float = 0.5,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            api_key: OpenRouter API key
+            base_url: Completions endpoint; defaults to OPENROUTER_BASE_URL or OpenRouter
+                      (point it at a local stub server for testing)
+            model: Model name sent with each request
+            timeout: Default per-call timeout in seconds
+            max_concurrency: Maximum in-flight requests across the process
+            max_connections: Size of the keep-alive connection pool
+            max_retries: Retries after the first attempt on transient failures
+            backoff_base: Base delay in seconds for exponential backoff
+            transport: Optional httpx transport replacing the network (e.g. httpx.MockTransport in tests)
+        """
+        self.api_key = api_key
+        self.base_url = base_url or os.getenv("OPENROUTER_BASE_URL", DEFAULT_BASE_URL)
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.transport = transport
+
+        # Created lazily so they bind to the event loop that first uses them
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0
+                ),
+                transport=self.transport,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    async def complete(self, prompt: str, temperature: float = 0.7,
+                       max_tokens: Optional[int] = None,
+                       timeout: Optional[float] = None) -> str:
+        """
+        Send a single-message chat completion and return the reply text.
+
+        Args:
+            prompt: User message content
+            temperature: Sampling temperature
+            max_tokens: Optional completion token limit
+            timeout: Per-call timeout in seconds (defaults to the client timeout)
+
+        Returns:
+            The assistant message content
+
+        Raises:
+            LLMError: If every attempt fails
+        """
+        return await self.chat([{"role": "user", "content": prompt}],
+                               temperature=temperature, max_tokens=max_tokens, timeout=timeout)
+
+    async def chat(self, messages: List[Dict], temperature: float = 0.7,
+                   max_tokens: Optional[int] = None,
+                   timeout: Optional[float] = None) -> str:
+        """Send a chat completion for a full message list and return the reply text"""
+        client = self._get_client()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff_delay(attempt - 1))
+            try:
+                async with self._semaphore:
+                    response = await client.post(self.base_url, json=payload,
+                                                 timeout=timeout or self.timeout)
+            except httpx.TransportError as e:
+                # Connection errors and timeouts are retried
+                last_error = e
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = LLMError(f"OpenRouter returned {response.status_code}")
+                continue
+            if response.status_code != 200:
+                raise LLMError(f"OpenRouter returned {response.status_code}: {response.text[:200]}")
+
+            try:
+                return response.json()["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                raise LLMError(f"Malformed completion response: {e}")
+
+        raise LLMError(f"Completion failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def stream(self, prompt: str, temperature: float = 0.7,
+                     max_tokens: Optional[int] = None,
+                     timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream a single-message chat completion, yielding content deltas as they arrive.
+        Retries only happen before the first delta has been yielded.
+
+        Raises:
+            LLMError: If the stream cannot be started after all retries
+        """
+        client = self._get_client()
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "stream": True
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        last_error = None
+        started = False
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff_delay(attempt - 1))
+            try:
+                async with self._semaphore:
+                    async with client.stream("POST", self.base_url, json=payload,
+                                             timeout=timeout or self.timeout) as response:
+                        if response.status_code in RETRY_STATUSES:
+                            last_error = LLMError(f"OpenRouter returned {response.status_code}")
+                            continue
+                        if response.status_code != 200:
+                            await response.aread()
+                            raise LLMError(f"OpenRouter returned {response.status_code}: {response.text[:200]}")
+
+                        # Server-sent events: "data: {json}" lines, ": comments", "data: [DONE]"
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            try:
+                                delta = json.loads(data)["choices"][0]["delta"].get("content")
+                            except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                                continue
+                            if delta:
+                                started = True
+                                yield delta
+                        return
+            except httpx.TransportError as e:
+                if started:
+                    # Replaying would duplicate text the caller already received
+                    raise LLMError(f"Stream interrupted: {e}")
+                last_error = e
+                continue
+
+        raise LLMError(f"Streaming completion failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
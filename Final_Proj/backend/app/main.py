@@ -3,12 +3,15 @@ FastAPI main application - Entry point for the AI Fan Engagement Agent
 """
 
 import os
-from fastapi import FastAPI, HTTPException
+import json
+import asyncio
+import secrets
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 import sys
@@ -18,8 +21,17 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.agent.agent import Agent
+from app.llm.client import LLMClient
 from app.memory.database import Database
+from app.memory.async_database import AsyncDatabase
+from app.memory.question_bank import QuestionBank
+from app.memory.question_sampler import QuestionSampler
 from app.predictions.engine import PredictionEngine
+from app.predictions.batch import predict_batch
+from app.predictions.ratings import get_ratings_store
+from app.predictions.elo import ResultsIngestor, normalize_result, parse_results
+from app.predictions.simulation import simulate, shutdown_pool
+from app.tools.reward_tracker import FanRewardTrackerTool
 
 # Load environment variables
 load_dotenv()
@@ -45,13 +57,53 @@ app.add_middleware(
 
 # Initialize database and agent
 DATABASE_PATH = os.getenv("DATABASE_PATH", "./data/fan_engagement.db")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "8"))
+AGENT_FUSED_TURN = os.getenv("AGENT_FUSED_TURN", "true").lower() in ("1", "true", "yes")
+QUESTIONS_PATH = os.getenv("QUESTIONS_PATH", "./backend/data/questions.json")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# Secret for the endpoints that change global state (results ingest, reloads); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 if not OPENROUTER_API_KEY:
     raise ValueError("OPENROUTER_API_KEY not found in environment variables")
 
-db = Database(DATABASE_PATH)
-agent = Agent(OPENROUTER_API_KEY, db)
+db = Database(DATABASE_PATH, pool_size=DATABASE_POOL_SIZE)
+
+# Route handlers await the database through a dedicated executor so SQLite never blocks the event loop
+adb = AsyncDatabase(db)
+# Badge rules evaluated against the counters each write returns
+rewards = FanRewardTrackerTool(db)
+
+# One pooled async OpenRouter client shared by the agent and all of its tools
+llm = LLMClient(OPENROUTER_API_KEY)
+agent = Agent(OPENROUTER_API_KEY, adb, llm, fused_turn=AGENT_FUSED_TURN)
+
+# Question bank is parsed once here and shared by the quiz, submit and teams endpoints
+question_bank = QuestionBank(QUESTIONS_PATH)
+# Draws questions each user has not seen yet for a team and level
+question_sampler = QuestionSampler(question_bank, db)
+
+# Team ratings from RATINGS_PATH (default backend/data/runtime/team_ratings.json, seeded from
+# backend/data/team_ratings.json), swapped in whole on reload
+ratings_store = get_ratings_store()
+# Applies real match results to the ratings and settles pending predictions
+results_ingestor = ResultsIngestor(db, ratings_store)
+# The database holds the latest ratings; catch the file up if a write was lost
+results_ingestor.restore()
+
+@app.on_event("startup")
+async def startup():
+    """Reload team ratings whenever the ratings file changes"""
+    ratings_store.start_watching()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background quiz refills, close pooled LLM and database connections, then stop simulation workers"""
+    ratings_store.stop_watching()
+    await agent.aclose()
+    await llm.aclose()
+    adb.close()
+    shutdown_pool()
 
 # Pydantic models for request/response
 class ChatRequest(BaseModel):
@@ -79,12 +131,22 @@ class PredictionGenerateRequest(BaseModel):
     team2: str
     sport: str  # soccer, nba, nfl
 
+class Matchup(BaseModel):
+    team1: str
+    team2: str
+
+class BatchPredictionRequest(BaseModel):
+    matchups: List[Matchup] = []
+    sport: Optional[str] = None  # soccer, nba, nfl - required for include_matrix
+    include_matrix: bool = False
+
 class PredictionSubmitRequest(BaseModel):
     user_id: str
     team1: str
     team2: str
     sport: str
     user_prediction: str  # Team name or "Draw"
+    ratings_version: Optional[str] = None  # From /api/predictions/generate, to grade against the prediction shown
     
 class UserCreateRequest(BaseModel):
     user_id: str
@@ -130,7 +192,7 @@ async def chat(request: ChatRequest):
         ChatResponse with AI response and metadata
     """
     try:
-        result = agent.process_message(request.user_id, request.message)
+        result = await agent.process_message(request.user_id, request.message)
         
         # Add quiz_data if action is quiz
         quiz_data = result.get("quiz_data")
@@ -146,6 +208,34 @@ async def chat(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Process a chat message and stream the reply as Server-Sent Events.
+    Emits "token" events with {"delta": text} while a chat reply is generated,
+    then one "done" event with the same fields as /api/chat.
+    
+    Args:
+        user_id: Unique user identifier
+        message: User's message
+    
+    Returns:
+        text/event-stream response
+    """
+    async def event_stream():
+        try:
+            async for event in agent.stream_message(request.user_id, request.message):
+                name = event.pop("event")
+                yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/user/create", response_model=dict)
 async def create_user(request: UserCreateRequest):
     """
@@ -157,41 +247,43 @@ async def create_user(request: UserCreateRequest):
         favorite_team: User's favorite sports team
     
     Returns:
-        Success message
+        Success message and any badges earned at signup
     """
     try:
-        result = db.create_user(request.user_id, request.username, request.favorite_team)
+        result = await adb.create_user(request.user_id, request.username, request.favorite_team)
+        if result.get("success"):
+            result["badges_earned"] = await adb.run(rewards.award_badges, request.user_id, result.pop("counters"))
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/user/{user_id}", response_model=dict)
-async def get_user(user_id: str):
+async def get_user(user_id: str, history_limit: int = 20,
+                   quiz_cursor: Optional[str] = None,
+                   prediction_cursor: Optional[str] = None):
     """
     Get user profile and statistics.
     
     Args:
         user_id: User identifier
+        history_limit: Number of quiz and prediction history entries to include
+        quiz_cursor: next_quiz_cursor from a previous response, to page older quizzes
+        prediction_cursor: next_prediction_cursor from a previous response
     
     Returns:
-        User profile with stats
+        User profile with summary stats, rank and a page of recent history
     """
     try:
-        user = db.get_user(user_id)
-        if not user:
+        history_limit = max(1, min(history_limit, 100))
+        try:
+            profile = await adb.get_user_profile(user_id, history_limit,
+                                                 quiz_cursor, prediction_cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not profile:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Fetch additional stats
-        quiz_history = db.get_user_quiz_history(user_id)
-        predictions = db.get_user_predictions(user_id)
-        
-        return {
-            **user,
-            "quiz_history": quiz_history,
-            "prediction_history": predictions,
-            "quiz_count": len(quiz_history),
-            "prediction_count": len(predictions)
-        }
+        return profile
     except HTTPException:
         raise
     except Exception as e:
@@ -209,71 +301,170 @@ async def get_leaderboard(limit: int = 10):
         List of top users with their points and ranks
     """
     try:
-        leaderboard = db.get_leaderboard(limit)
+        # Served from the in-memory ranking, so no database round trip is needed
         return {
-            "leaderboard": leaderboard,
-            "total_users": len(db.get_leaderboard(1000))
+            "leaderboard": db.get_leaderboard(limit),
+            "total_users": db.get_user_count()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/leaderboard/{user_id}")
+async def get_leaderboard_position(user_id: str, radius: int = 2):
+    """
+    Get a user's exact leaderboard rank and the users ranked around them.
+    
+    Args:
+        user_id: User identifier
+        radius: Number of neighbors to include above and below the user
+    
+    Returns:
+        Rank, total users and neighboring leaderboard entries
+    """
+    try:
+        position = db.get_user_rank(user_id, max(0, min(radius, 25)))
+        if not position:
+            raise HTTPException(status_code=404, detail="User not found")
+        return position
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/badges")
+async def get_badge_counts():
+    """
+    Get how many users hold each badge.
+    
+    Returns:
+        Mapping of badge name to number of holders
+    """
+    try:
+        return {"badges": await adb.get_badge_counts()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/badges/{badge}/holders")
+async def get_badge_holders(badge: str, limit: int = 100):
+    """
+    Get the users holding a badge.
+    
+    Args:
+        badge: Badge name
+        limit: Maximum number of holders to return
+    
+    Returns:
+        Holders in the order they earned the badge
+    """
+    try:
+        holders = await adb.get_badge_holders(badge, max(1, min(limit, 1000)))
+        return {"badge": badge, "holders": holders}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _history_page(user_id: str, kind: str, limit: int, cursor: Optional[str]):
+    """Fetch one bounded keyset page of a user's history"""
+    limit = max(1, min(limit, 200))
+    try:
+        return await adb.get_history_page(user_id, kind, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/user/{user_id}/history/chat")
-async def get_chat_history(user_id: str, limit: int = 20):
+async def get_chat_history(user_id: str, limit: int = 20, cursor: Optional[str] = None):
     """
-    Get user's chat history.
+    Get user's chat history, newest first.
     
     Args:
         user_id: User identifier
-        limit: Number of recent messages to return
+        limit: Number of messages per page
+        cursor: next_cursor from the previous page
     
     Returns:
-        List of chat messages
+        List of chat messages and the cursor for the next page
     """
     try:
-        history = db.get_user_chat_history(user_id, limit)
-        return {"chat_history": history}
+        history, next_cursor = await _history_page(user_id, "chat", limit, cursor)
+        return {"chat_history": history, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/user/{user_id}/history/quizzes")
-async def get_quiz_history(user_id: str):
+async def get_quiz_history(user_id: str, limit: int = 50, cursor: Optional[str] = None):
     """
-    Get user's quiz history.
+    Get user's quiz history, newest first.
     
     Args:
         user_id: User identifier
+        limit: Number of quiz attempts per page
+        cursor: next_cursor from the previous page
     
     Returns:
-        List of quiz attempts with scores
+        List of quiz attempts with scores and the cursor for the next page
     """
     try:
-        history = db.get_user_quiz_history(user_id)
-        return {"quiz_history": history}
+        history, next_cursor = await _history_page(user_id, "quizzes", limit, cursor)
+        return {"quiz_history": history, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/user/{user_id}/history/predictions")
-async def get_prediction_history(user_id: str):
+async def get_prediction_history(user_id: str, limit: int = 50, cursor: Optional[str] = None):
     """
-    Get user's prediction history.
+    Get user's prediction history, newest first.
     
     Args:
         user_id: User identifier
+        limit: Number of predictions per page
+        cursor: next_cursor from the previous page
     
     Returns:
-        List of predictions with outcomes
+        List of predictions with outcomes and the cursor for the next page
     """
     try:
-        predictions = db.get_user_predictions(user_id)
-        return {"prediction_history": predictions}
+        predictions, next_cursor = await _history_page(user_id, "predictions", limit, cursor)
+        return {"prediction_history": predictions, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/user/{user_id}/export/{kind}")
+async def export_history(user_id: str, kind: str):
+    """
+    Export a user's full history as newline-delimited JSON.
+    Rows are streamed page by page, so the full history is never held in memory.
+    
+    Args:
+        user_id: User identifier
+        kind: "quizzes", "predictions" or "chat"
+    
+    Returns:
+        application/x-ndjson stream, one entry per line, newest first
+    """
+    if kind not in ("quizzes", "predictions", "chat"):
+        raise HTTPException(status_code=404, detail=f"Unknown history kind: {kind}")
+    
+    def ndjson():
+        # Plain generator: Starlette iterates it on a worker thread
+        for entry in db.iter_history(user_id, kind):
+            yield json.dumps(entry) + "\n"
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{user_id}-{kind}.ndjson"'}
+    )
+
 @app.post("/api/quiz/submit")
 async def submit_quiz(request: QuizSubmissionRequest):
     """
     Submit quiz answers and get score.
-    Loads correct answers from questions.json using question ID.
+    Looks up correct answers in the question bank's answer key using question ID.
     
     Args:
         user_id: User identifier
@@ -286,67 +477,12 @@ async def submit_quiz(request: QuizSubmissionRequest):
         Score, correct answers, and points earned
     """
     try:
-        import json
-        
-        # Initialize quiz progress if needed
-        progress = db.get_quiz_progress(request.user_id, request.team)
-        if not progress:
-            db.create_quiz_progress(request.user_id, request.team)
-        
-        # Load questions from questions.json (flat list) to get correct answers
-        questions_path = "./backend/data/questions.json"
-        try:
-            with open(questions_path, 'r') as f:
-                all_questions_list = json.load(f)
-        except FileNotFoundError:
+        if not question_bank.loaded:
             raise HTTPException(status_code=404, detail="Questions database not found")
         
-        # Create a lookup map by question ID for fast access
-        question_lookup = {q["id"]: q for q in all_questions_list}
-        
-        # Calculate score
-        correct_count = 0
+        # Calculate score against the precomputed answer key
         total_count = len(request.questions)
-        results = []
-        
-        for idx, question in enumerate(request.questions):
-            # Handle both dict and object formats
-            if isinstance(question, dict):
-                question_text = question.get("question", "")
-                options = question.get("options", [])
-                question_id = question.get("id", "")
-                explanation = question.get("explanation", "")
-            else:
-                question_text = getattr(question, "question", "")
-                options = getattr(question, "options", [])
-                question_id = getattr(question, "id", "")
-                explanation = getattr(question, "explanation", "")
-            
-            # Find the correct answer from questions.json by ID (flat list)
-            correct_answer = ""
-            correct_answer_idx = None
-            
-            if question_id in question_lookup:
-                q_data = question_lookup[question_id]
-                correct_answer_idx = q_data.get("correctAnswerIndex")
-                if correct_answer_idx is not None and correct_answer_idx < len(options):
-                    correct_answer = options[correct_answer_idx]
-            
-            # User answer is the text they selected
-            user_answer = request.answers.get(str(idx), "")
-            
-            # Case-insensitive, trim whitespace comparison
-            is_correct = user_answer.strip().lower() == correct_answer.strip().lower()
-            if is_correct:
-                correct_count += 1
-            
-            results.append({
-                "question": question_text,
-                "user_answer": user_answer,
-                "correct_answer": correct_answer,
-                "is_correct": is_correct,
-                "explanation": explanation
-            })
+        correct_count, results = question_bank.grade(request.questions, request.answers)
         
         # Calculate percentage score (for display only, not for reward logic)
         score_percentage = (correct_count / total_count * 100) if total_count > 0 else 0
@@ -355,29 +491,23 @@ async def submit_quiz(request: QuizSubmissionRequest):
         points_per_question = 10
         points_earned = correct_count * points_per_question
         
-        # Award points immediately
-        db.add_quiz_points(request.user_id, points_earned)
-        
-        # Mark level as completed
-        db.complete_level(request.user_id, request.team, request.level, score_percentage)
-        
-        # Update progress - advance to next level if exists (level is now string: Easy, Medium, Hard)
-        # Map levels to progression
+        # Map levels to progression (level is a string: Easy, Medium, Hard)
         level_progression = {"Easy": "Medium", "Medium": "Hard", "Hard": "Hard"}
         next_level = level_progression.get(request.level, request.level)
-        db.update_quiz_progress(request.user_id, request.team, next_level, 0, 0, 0)
         
-        # Store quiz in history
-        db.add_quiz_attempt(
+        # Progress, completed level, history, counters and points are written in one transaction
+        submission = await adb.record_quiz_submission(
             request.user_id,
             request.team,
-            f"level_{request.level}",
-            score_percentage
+            request.level,
+            score_percentage,
+            points_earned,
+            next_level
         )
-        
-        # Get updated user info for total points
-        user = db.get_user(request.user_id)
-        total_points = user["total_points"] if user else 0
+        total_points = submission["total_points"] if submission else 0
+        badges_earned = []
+        if submission:
+            badges_earned = await adb.run(rewards.award_badges, request.user_id, submission["counters"])
         
         return {
             "status": "success",
@@ -388,9 +518,12 @@ async def submit_quiz(request: QuizSubmissionRequest):
             "points_per_question": points_per_question,
             "level": request.level,
             "total_points": total_points,
+            "badges_earned": badges_earned,
             "results": results,
             "message": f"Great job! You earned {points_earned} points!"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -415,7 +548,7 @@ async def handle_level_progression_choice(user_id: str, team: str, level: str, c
         if continue_to_next and level in level_progression and level_progression[level]:
             # Advance to next level
             next_level = level_progression[level]
-            db.update_quiz_progress(user_id, team, next_level, 0, 0, 0)
+            await adb.update_quiz_progress(user_id, team, next_level, 0, 0, 0)
             return {
                 "success": True,
                 "action": "continue",
@@ -440,7 +573,7 @@ async def get_team_total_points(user_id: str, team: str):
     This is different from level score - it's the cumulative points.
     """
     try:
-        user = db.get_user(user_id)
+        user = await adb.get_user(user_id)
         # For now, return the user's total points
         # In the future, could track points per team
         return {
@@ -459,7 +592,7 @@ async def init_quiz_progress(user_id: str, team: str):
     Called when starting a new quiz.
     """
     try:
-        result = db.create_quiz_progress(user_id, team)
+        result = await adb.create_quiz_progress(user_id, team)
         return {"success": True, "message": "Quiz progress initialized"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -471,7 +604,7 @@ async def get_progress(user_id: str, team: str):
     Used to resume quiz from where user left off.
     """
     try:
-        progress = db.get_quiz_progress(user_id, team)
+        progress = await adb.get_quiz_progress(user_id, team)
         if progress:
             return {
                 "user_id": user_id,
@@ -500,7 +633,7 @@ async def update_progress(user_id: str, team: str,
     Update quiz progress after answering a question.
     """
     try:
-        db.update_quiz_progress(user_id, team, 
+        await adb.update_quiz_progress(user_id, team, 
                                current_level, current_question_index,
                                level_score, total_correct)
         return {"success": True, "message": "Progress updated"}
@@ -514,12 +647,12 @@ async def mark_level_complete(user_id: str, team: str,
     Mark a level as completed and move to next level.
     """
     try:
-        db.complete_level(user_id, team, level, score)
+        await adb.complete_level(user_id, team, level, score)
         
         # Move to next level (Easy -> Medium -> Hard)
         level_progression = {"Easy": "Medium", "Medium": "Hard", "Hard": "Hard"}
         next_level = level_progression.get(level, level)
-        db.update_quiz_progress(user_id, team, next_level, 0, 0, 0)
+        await adb.update_quiz_progress(user_id, team, next_level, 0, 0, 0)
         
         return {
             "success": True,
@@ -537,9 +670,9 @@ async def get_resume_state(user_id: str, team: str):
     Returns everything needed to show user their quiz progress.
     """
     try:
-        progress = db.get_quiz_progress(user_id, team)
-        completed = db.get_completed_levels(user_id, team)
-        stats = db.get_team_stats(user_id, team)
+        progress = await adb.get_quiz_progress(user_id, team)
+        completed = await adb.get_completed_levels(user_id, team)
+        stats = await adb.get_team_stats(user_id, team)
         
         return {
             "user_id": user_id,
@@ -563,43 +696,34 @@ async def generate_quiz(user_id: str, team: str, level: str):
         level: Difficulty level - "Easy", "Medium", or "Hard"
     
     Returns:
-        List of 10 random questions for the level
+        List of 10 random questions for the level, preferring ones the user has not seen
     """
     try:
-        import json
-        import random
-        
         # Normalize level input
         level = level.capitalize()
         if level not in ["Easy", "Medium", "Hard"]:
             raise HTTPException(status_code=400, detail="Level must be Easy, Medium, or Hard")
         
         # Initialize quiz progress if needed
-        progress = db.get_quiz_progress(user_id, team)
+        progress = await adb.get_quiz_progress(user_id, team)
         if not progress:
-            db.create_quiz_progress(user_id, team)
+            await adb.create_quiz_progress(user_id, team)
         
-        # Load questions from questions.json (flat list structure)
-        questions_path = "./backend/data/questions.json"
-        try:
-            with open(questions_path, 'r') as f:
-                all_questions_list = json.load(f)
-        except FileNotFoundError:
+        if not question_bank.loaded:
             raise HTTPException(status_code=404, detail="Questions database not found. Run: python backend/data/generate_questions_v2.py")
         
-        # Filter questions for this team and difficulty level
-        team_level_questions = [
-            q for q in all_questions_list 
-            if q.get("team") == team and q.get("level") == level
-        ]
+        # Questions for this team and difficulty level come straight from the index
+        team_level_questions = question_bank.get_questions(team, level)
         
         if not team_level_questions:
             raise HTTPException(status_code=404, detail=f"No {level} questions found for {team}")
         
-        # Randomly select 10 questions (with replacement if fewer than 10 available)
-        # Users can retry unlimited times with random selection
-        num_questions = min(10, len(team_level_questions))
-        selected_questions = random.sample(team_level_questions, num_questions)
+        # Draw 10 questions the user has not been asked yet; the level's pool
+        # starts over once every question in it has been seen (with today's
+        # 10-question pools, on every quiz after the first)
+        selected_questions, pool_reset = await adb.run(
+            question_sampler.sample, user_id, team, level, 10
+        )
         
         # Prepare response - do NOT include correctAnswerIndex for frontend
         quiz_display = []
@@ -620,7 +744,8 @@ async def generate_quiz(user_id: str, team: str, level: str):
             "team": team,
             "questions": quiz_display,
             "total_questions": len(quiz_display),
-            "total_available": len(team_level_questions)
+            "total_available": len(team_level_questions),
+            "pool_reset": pool_reset
         }
     except HTTPException:
         raise
@@ -641,7 +766,9 @@ async def reset_question_pool(user_id: str, team: str):
         Confirmation of pool reset
     """
     try:
-        db.reset_asked_questions(user_id, team)
+        await adb.reset_asked_questions(user_id, team)
+        # Waits for the user's in-flight draws, so it runs off the event loop
+        await adb.run(question_sampler.invalidate, user_id, team)
         
         return {
             "status": "success",
@@ -652,65 +779,167 @@ async def reset_question_pool(user_id: str, team: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Let a request through only with the configured admin token in X-Admin-Token"""
+    if not ADMIN_TOKEN:
+        # Admin endpoints are not served unless a token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "database": "connected"}
 
-@app.get("/api/teams/available")
-async def get_available_teams():
+@app.post("/api/questions/reload", dependencies=[Depends(require_admin)])
+async def reload_questions():
     """
-    Get list of all teams that have questions in the database.
+    Reload the question bank after questions.json has changed.
     
     Returns:
-        List of teams with their available difficulty levels
+        Whether the file was reloaded (an unreadable file keeps the current
+        bank) and the number of questions now loaded
     """
     try:
-        import json
-        import os
-        
-        # Use correct path relative to where the app runs from (Final_Proj directory)
-        questions_path = "./backend/data/questions.json"
-        try:
-            with open(questions_path, 'r') as f:
-                all_questions = json.load(f)
-        except FileNotFoundError:
+        # Reading and parsing the file would stall every other request on the event loop
+        loop = asyncio.get_running_loop()
+        reloaded = await loop.run_in_executor(None, question_bank.reload)
+        if not question_bank.loaded:
             raise HTTPException(status_code=404, detail="Questions database not found")
+        return {"status": "success", "reloaded": reloaded, "total_questions": len(question_bank)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/ratings/reload", dependencies=[Depends(require_admin)])
+async def reload_ratings():
+    """
+    Reload team ratings now instead of waiting for the file watcher.
+    
+    Returns:
+        Ratings version and number of teams now loaded
+    """
+    try:
+        changed = ratings_store.reload()
+        snapshot = ratings_store.snapshot
+        if not snapshot.teams:
+            raise HTTPException(status_code=404, detail="Team ratings not found")
+        return {
+            "status": "success",
+            "changed": changed,
+            "version": snapshot.version,
+            "total_teams": len(snapshot.teams)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_INGEST_RESULTS = 50000
+
+@app.post("/api/results/ingest", dependencies=[Depends(require_admin)])
+async def ingest_results(request: Request):
+    """
+    Ingest real match results: update team ratings and settle pending predictions.
+    Accepts a CSV feed (Content-Type: text/csv, with a header row), NDJSON
+    (application/x-ndjson) or JSON {"results": [...]}. Each result has home, away,
+    home_score, away_score and optionally sport and played_at (or date).
+    Already-ingested games are skipped, so a feed can be re-sent.
+    
+    Returns:
+        Applied/duplicate counts, the new ratings version, resolved predictions and badges earned
+    """
+    try:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        body = await request.body()
+        try:
+            if content_type == "text/csv":
+                results = parse_results(body.decode("utf-8-sig"), "csv")
+            elif content_type in ("application/x-ndjson", "application/jsonl"):
+                results = parse_results(body.decode("utf-8"), "ndjson")
+            else:
+                records = json.loads(body or b"{}").get("results", [])
+                results = [normalize_result(record, line) for line, record in enumerate(records, start=1)]
+        except (ValueError, AttributeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid results: {e}")
+        
+        if len(results) > MAX_INGEST_RESULTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_INGEST_RESULTS} results per request")
+        
+        summary = await adb.run(results_ingestor.ingest, results)
         
-        # Build team availability map
-        teams_map = {}
-        for q in all_questions:
-            team = q.get("team", "Unknown")
-            level = q.get("level", "Unknown")
-            
-            if team not in teams_map:
-                teams_map[team] = {
-                    "name": team,
-                    "levels": [],
-                    "has_easy": False,
-                    "has_medium": False,
-                    "has_hard": False
-                }
-            
-            if level == "Easy" and not teams_map[team]["has_easy"]:
-                teams_map[team]["has_easy"] = True
-                teams_map[team]["levels"].append("Easy")
-            elif level == "Medium" and not teams_map[team]["has_medium"]:
-                teams_map[team]["has_medium"] = True
-                teams_map[team]["levels"].append("Medium")
-            elif level == "Hard" and not teams_map[team]["has_hard"]:
-                teams_map[team]["has_hard"] = True
-                teams_map[team]["levels"].append("Hard")
-        
-        # Convert to list and sort
-        teams_list = sorted(list(teams_map.values()), key=lambda x: x["name"])
+        badges_earned = {}
+        for user_id, counters in summary.pop("counters").items():
+            badges = await adb.run(rewards.award_badges, user_id, counters)
+            if badges:
+                badges_earned[user_id] = badges
         
+        return {"status": "success", **summary, "badges_earned": badges_earned}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/ratings/{team}/history")
+async def get_team_rating_history(team: str, limit: int = 100):
+    """
+    Get a team's rating after each ingested result
+    
+    Args:
+        team: Team name
+        limit: Most recent games to return (1 to 1000)
+    
+    Returns:
+        Current rating and the per-game history, oldest first
+    """
+    try:
+        limit = max(1, min(limit, 1000))
+        current = ratings_store.snapshot.teams.get(team)
+        if current is None:
+            raise HTTPException(status_code=404, detail=f"Unknown team '{team}'")
+        
+        history = await adb.get_rating_history(team, limit)
         return {
             "status": "success",
-            "teams": teams_list,
-            "total_teams": len(teams_list)
+            "team": team,
+            "current": {k: current[k] for k in ("sport", "ranking", "strength", "recent_form") if k in current},
+            "history": history
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/teams/available")
+async def get_available_teams(request: Request):
+    """
+    Get list of all teams that have questions in the database.
+    The catalog is serialized once per questions.json version and served with
+    an ETag, so clients revalidating with If-None-Match get a 304.
+    
+    Returns:
+        List of teams with their available difficulty levels
+    """
+    try:
+        # Only a due check goes to a thread; it may hash and parse a changed file
+        if question_bank.check_due():
+            await asyncio.get_running_loop().run_in_executor(None, question_bank.reload_if_changed)
+        if not question_bank.loaded:
+            raise HTTPException(status_code=404, detail="Questions database not found")
+        
+        etag = question_bank.teams_etag
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+        
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        
+        return Response(content=question_bank.teams_json, media_type="application/json", headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -731,7 +960,7 @@ async def generate_prediction(request: PredictionGenerateRequest):
         System prediction with explanation
     """
     try:
-        prediction = PredictionEngine.generate_prediction(request.team1, request.team2, request.sport)
+        prediction = PredictionEngine.get_prediction(request.team1, request.team2, request.sport)
         
         return {
             "status": "success",
@@ -741,16 +970,93 @@ async def generate_prediction(request: PredictionGenerateRequest):
                 "predicted_winner": prediction['predicted_winner'],
                 "predicted_loser": prediction['predicted_loser'],
                 "confidence": prediction['confidence'],
-                "explanation": prediction['explanation']
+                "explanation": prediction['explanation'],
+                "model_version": prediction['model_version'],
+                "ratings_version": prediction['ratings_version']
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+MAX_BATCH_MATCHUPS = 10000
+
+@app.post("/api/predictions/batch")
+async def batch_predictions(request: BatchPredictionRequest):
+    """
+    Win probabilities for many matchups at once, e.g. a whole matchday
+    
+    Args:
+        matchups: List of {team1, team2} pairs
+        sport: Sport whose N x N probability matrix to include
+        include_matrix: Also return P(row team beats column team) for every pairing in the sport
+    
+    Returns:
+        Per-matchup probabilities and, optionally, the probability matrix
+    """
+    try:
+        if len(request.matchups) > MAX_BATCH_MATCHUPS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_MATCHUPS} matchups per request")
+        
+        ratings = ratings_store.snapshot
+        table = ratings.table
+        response = {
+            "status": "success",
+            "ratings_version": table.version,
+            "predictions": predict_batch([(m.team1, m.team2) for m in request.matchups],
+                                         request.sport, ratings)
+        }
+        
+        if request.include_matrix:
+            if request.sport not in ("soccer", "nba", "nfl"):
+                raise HTTPException(status_code=400, detail="include_matrix requires sport: soccer, nba or nfl")
+            teams, matrix = table.probability_matrix(request.sport)
+            response["matrix"] = {
+                "sport": request.sport,
+                "teams": teams,
+                "probabilities": matrix.round(4).tolist()
+            }
+        
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+MAX_SIMULATIONS = 1000000
+
+@app.get("/api/predictions/simulate/{sport}")
+async def simulate_sport(sport: str, kind: str = "season", simulations: int = 100000, seed: int = 0):
+    """
+    Monte Carlo odds for a sport from the prediction model
+    
+    Args:
+        sport: Sport type (soccer, nba, nfl)
+        kind: "season" (double round-robin league) or "knockout" (seeded bracket)
+        simulations: Number of simulated seasons or tournaments (1 to 1,000,000)
+        seed: Random seed; the same seed returns the same odds until ratings change
+    
+    Returns:
+        Per-team title, playoff and relegation odds (season) or title, final and semifinal odds (knockout)
+    """
+    try:
+        if not 1 <= simulations <= MAX_SIMULATIONS:
+            raise HTTPException(status_code=400, detail=f"simulations must be between 1 and {MAX_SIMULATIONS}")
+        
+        # Shards run in the simulation process pool; wait for them off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, simulate, sport, kind, simulations, seed)
+        return {"status": "success", **result}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/predictions/submit")
 async def submit_prediction(request: PredictionSubmitRequest):
     """
-    Submit a user prediction and evaluate it against system outcome
+    Submit a user prediction; it is settled against the real result once that is ingested
     
     Args:
         user_id: Unique user identifier
@@ -758,47 +1064,53 @@ async def submit_prediction(request: PredictionSubmitRequest):
         team2: Second team name
         sport: Sport type (soccer, nba, nfl)
         user_prediction: User's predicted winner (team name or "Draw")
+        ratings_version: Ratings version returned by /api/predictions/generate, to
+            echo the model pick the user was shown; without it the current ratings are used
     
     Returns:
-        Prediction result with points earned
+        The pending prediction alongside the model's pick for the matchup
     """
     try:
-        # Generate system prediction
-        system_prediction = PredictionEngine.generate_prediction(request.team1, request.team2, request.sport)
-        system_outcome = system_prediction['predicted_winner']
-        
-        # Evaluate user prediction
-        is_correct, points = PredictionEngine.evaluate_prediction(request.user_prediction, system_outcome, request.sport)
+        if request.ratings_version is not None:
+            # Exactly the prediction the user was shown, even if ratings changed since
+            system_prediction = PredictionEngine.lookup_prediction(
+                request.team1, request.team2, request.sport, request.ratings_version)
+            if system_prediction is None:
+                raise HTTPException(status_code=409,
+                                    detail="Prediction has expired; generate it again before submitting")
+        else:
+            system_prediction = PredictionEngine.get_prediction(request.team1, request.team2, request.sport)
         
-        # Save prediction to database
-        result = db.save_prediction(
+        # Stored as pending; points are awarded when a real result settles it
+        result = await adb.save_prediction(
             request.user_id,
             request.team1,
             request.team2,
             request.user_prediction,
-            system_outcome,
-            points,
             system_prediction['explanation'],
             request.sport
         )
-        
-        # Get updated user info for total points
-        user = db.get_user(request.user_id)
-        total_points = user["total_points"] if user else 0
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=result.get("error", "Could not save prediction"))
         
         return {
             "status": "success",
             "result": {
+                "prediction_id": result["prediction_id"],
                 "user_prediction": request.user_prediction,
-                "system_outcome": system_outcome,
-                "is_correct": is_correct,
-                "points_earned": points,
+                "system_prediction": system_prediction['predicted_winner'],
+                "status": "pending",
+                "is_correct": None,
+                "points_earned": 0,
                 "explanation": system_prediction['explanation'],
                 "confidence": system_prediction['confidence']
             },
-            "total_points": total_points,
-            "points_earned": points
+            "total_points": result["total_points"],
+            "points_earned": 0,
+            "badges_earned": []
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -816,7 +1128,7 @@ async def get_prediction_stats(user_id: str):
         Prediction statistics (accuracy, total points, etc.)
     """
     try:
-        stats = db.get_prediction_stats(user_id)
+        stats = await adb.get_prediction_stats(user_id)
         
         return {
             "status": "success",
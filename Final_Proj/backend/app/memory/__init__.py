@@ -2,5 +2,7 @@
 __init__.py for memory module
 """
 from .database import Database
+from .question_bank import QuestionBank
+from .question_sampler import QuestionSampler
 
-__all__ = ["Database"]
+__all__ = ["Database", "QuestionBank", "QuestionSampler"]
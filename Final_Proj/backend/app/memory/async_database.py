@@ -0,0 +1,42 @@
+"""
+Async access layer for the Database class.
+Runs the synchronous SQLite methods on a dedicated executor so FastAPI handlers
+can await them without blocking the event loop.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from .database import Database
+
+class AsyncDatabase:
+    def __init__(self, db: Database, max_workers: Optional[int] = None):
+        """Wrap a Database; defaults to one worker per pooled connection"""
+        self.database = db
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or db.pool.size,
+            thread_name_prefix="db"
+        )
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run any blocking database work on the DB executor and await the result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name):
+        """Expose every Database method as an awaitable with the same signature"""
+        attr = getattr(self.database, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def close(self):
+        """Wait for queued work, then close the underlying database"""
+        self._executor.shutdown(wait=True)
+        self.database.close()
@@ -0,0 +1,151 @@
+"""
+Write-behind buffer for chat_history inserts.
+Chat turns are queued and a background thread writes them in batches, one
+executemany transaction every `max_batch` messages or `flush_interval` seconds,
+instead of one commit per turn.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+class _FlushMarker:
+    """In-band request to write everything queued before it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+_STOP = object()
+
+class ChatWriteBuffer:
+    def __init__(self, write_batch: Callable[[List[Tuple]], None], max_batch: int = 64,
+                 flush_interval: float = 0.05, max_queue: int = 1000,
+                 put_timeout: float = 2.0):
+        """
+        Args:
+            write_batch: Writes a list of row tuples in one transaction
+            max_batch: Write as soon as this many messages are waiting
+            flush_interval: Longest time in seconds a message waits before being written
+            max_queue: Queue bound; producers block when it is full (backpressure)
+            put_timeout: How long a producer blocks before writing its row itself
+        """
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending: Dict[str, int] = {}  # user_id -> rows queued but not yet written
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, user_id: str, row: Tuple):
+        """Queue one chat_history row for user_id, blocking while the queue is full"""
+        if self._closed:
+            self._write([(user_id, row)])
+            return
+
+        with self._pending_lock:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        try:
+            self._queue.put((user_id, row), timeout=self.put_timeout)
+        except queue.Full:
+            # The writer is not keeping up; persist this row on the caller's thread
+            self._write([(user_id, row)])
+
+    def has_pending(self, user_id: str) -> bool:
+        """Whether any of the user's messages are still waiting to be written"""
+        return self._pending.get(user_id, 0) > 0
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write everything queued so far; returns False if it did not finish in time"""
+        if self._closed or not self._thread.is_alive():
+            return True
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting buffered writes and write out everything still queued"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+        # Rows queued by producers that raced with shutdown
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushMarker):
+                item.done.set()
+            elif item is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            self._write(leftovers)
+
+    def _write(self, items: List[Tuple[str, Tuple]]):
+        """Write a batch and clear its pending counts"""
+        try:
+            self.write_batch([row for _, row in items])
+        except Exception as e:
+            print(f"Error writing chat history batch of {len(items)}: {e}")
+        finally:
+            with self._pending_lock:
+                for user_id, _ in items:
+                    count = self._pending.get(user_id, 0) - 1
+                    if count > 0:
+                        self._pending[user_id] = count
+                    else:
+                        self._pending.pop(user_id, None)
+
+    def _run(self):
+        """Writer loop: collect a batch until it is full or its deadline passes"""
+        while True:
+            item = self._queue.get()
+            batch, markers, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+
+                # Flush requests and shutdown write immediately
+                if stop or markers or len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if stop:
+                # Drain anything that raced in behind the stop signal
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, _FlushMarker):
+                        markers.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                return
@@ -6,21 +6,85 @@ Uses SQLite for persistent storage of user data, quiz history, and predictions.
 import sqlite3
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, Iterator, List, Tuple
+from .connection_pool import ConnectionPool, PooledConnection
+from .migrations import apply_migrations, find_query_plan_regressions
+from .leaderboard import Leaderboard
+from .pagination import encode_cursor, decode_cursor
+from .chat_buffer import ChatWriteBuffer
 
 class Database:
-    def __init__(self, db_path: str = "./backend/data/fan_engagement.db"):
+    def __init__(self, db_path: str = "./backend/data/fan_engagement.db", pool_size: int = 8):
         self.db_path = db_path
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Persistent WAL-mode connections shared by every method below
+        self.pool = ConnectionPool(db_path, size=pool_size)
+        # Ranked view of users.total_points, updated on every points write
+        self.leaderboard = Leaderboard()
+        # Serializes point writes so the leaderboard sees totals in commit order
+        self._points_lock = threading.Lock()
         self.init_db()
+        self.load_leaderboard()
+        # Chat turns are persisted in batches by a background writer
+        self.chat_buffer = ChatWriteBuffer(self._write_chat_batch)
 
-    def get_connection(self) -> sqlite3.Connection:
-        """Get a database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def get_connection(self) -> PooledConnection:
+        """Get a pooled database connection; close() hands it back to the pool"""
+        return self.pool.connection()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a unit of work in one write transaction on one pooled connection.
+        Commits when the block exits normally and rolls back if it raises.
+        """
+        conn = self.get_connection()
+        try:
+            # IMMEDIATE takes the write lock up front instead of failing mid-transaction
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def points_transaction(self):
+        """
+        Write transaction that changes users.total_points. Like every points
+        writer it checks out its connection before taking the points lock, and
+        holds the lock until the new totals reach the leaderboard after commit.
+        
+        Yields:
+            (conn, totals); set totals[user_id] to each user's new total_points
+        """
+        conn = self.get_connection()
+        try:
+            with self._points_lock:
+                totals: Dict[str, int] = {}
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                    yield conn, totals
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                # Committed; publish the new totals in commit order
+                for user_id, total in totals.items():
+                    self.leaderboard.set_points(user_id, total)
+        finally:
+            conn.close()
+
+    def close(self):
+        """Write out buffered chat messages, then close all pooled connections"""
+        self.chat_buffer.close()
+        self.pool.close()
 
     def init_db(self):
         """Initialize database schema"""
@@ -131,82 +195,335 @@ class Database:
         ''')
 
         conn.commit()
+
+        # Bring indexes and later schema changes up to date
+        apply_migrations(conn)
+        for query, detail in find_query_plan_regressions(conn):
+            print(f"Warning: hot query not using an index ({detail}): {query}")
+        conn.close()
+
+    def load_leaderboard(self):
+        """Rebuild the in-memory leaderboard from the users table"""
+        conn = self.get_connection()
+        rows = conn.execute(
+            'SELECT user_id, username, favorite_team, total_points FROM users'
+        ).fetchall()
         conn.close()
+        self.leaderboard.load(tuple(row) for row in rows)
 
     # User Management
     def create_user(self, user_id: str, username: str, favorite_team: str = "General") -> Dict:
-        """Create a new user profile"""
+        """
+        Create a new user profile and number it in signup order.
+
+        Returns:
+            {"success", "user_id", "counters"} where counters holds the new
+            signup_number and total_points for badge rules
+        """
+        try:
+            with self.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO users (user_id, username, favorite_team)
+                    VALUES (?, ?, ?)
+                ''', (user_id, username, favorite_team))
+                # The write lock serializes signups, so the count is this user's number
+                row = conn.execute('''
+                    INSERT INTO user_counters (user_id, counter, value)
+                    SELECT ?, 'signup_number', COUNT(*) FROM users
+                    RETURNING value
+                ''', (user_id,)).fetchone()
+        except sqlite3.IntegrityError:
+            return {"success": False, "message": "User already exists"}
+
+        self.leaderboard.add_user(user_id, username, favorite_team)
+        # The user had no counters before, so every rule on them is checked once
+        counters = {"signup_number": (None, row[0]), "total_points": (None, 0)}
+        return {"success": True, "user_id": user_id, "counters": counters}
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        """Retrieve user profile"""
+        conn = self.get_connection()
+        try:
+            return self._load_user(conn, user_id)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _load_user(conn, user_id: str) -> Optional[Dict]:
+        """Read a user and their badges (in award order) with one joined query"""
+        rows = conn.execute('''
+            SELECT u.*, b.badge
+            FROM users u
+            LEFT JOIN user_badges b ON b.user_id = u.user_id
+            WHERE u.user_id = ?
+            ORDER BY b.awarded_at, b.rowid
+        ''', (user_id,)).fetchall()
+        
+        if not rows:
+            return None
+        
+        row = rows[0]
+        return {
+            "user_id": row["user_id"],
+            "username": row["username"],
+            "favorite_team": row["favorite_team"],
+            "total_points": row["total_points"],
+            "badges": [r["badge"] for r in rows if r["badge"] is not None],
+            "created_at": row["created_at"],
+            "last_interaction": row["last_interaction"]
+        }
+
+    def get_user_profile(self, user_id: str, history_limit: int = 10,
+                         quiz_cursor: Optional[str] = None,
+                         prediction_cursor: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get a user's profile, summary stats and a page of recent history.
+        Everything is read in one transaction on one connection, and the
+        summary counts and averages are computed in SQL.
+        
+        Args:
+            user_id: User identifier
+            history_limit: Page size for quiz and prediction history
+            quiz_cursor: Cursor from a previous next_quiz_cursor, or None for the newest
+            prediction_cursor: Cursor from a previous next_prediction_cursor, or None
+        
+        Returns:
+            Profile dict, or None if the user does not exist
+        
+        Raises:
+            ValueError: If a cursor is malformed
+        """
+        quiz_after = decode_cursor(quiz_cursor)
+        prediction_after = decode_cursor(prediction_cursor)
         conn = self.get_connection()
-        cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                INSERT INTO users (user_id, username, favorite_team)
-                VALUES (?, ?, ?)
-            ''', (user_id, username, favorite_team))
+            # A single read transaction gives every query below the same snapshot
+            conn.execute('BEGIN')
+            
+            user = self._load_user(conn, user_id)
+            if not user:
+                return None
+            
+            summary = self._summary_stats(conn, user_id)
+            
+            quiz_rows, next_quiz_cursor = self._fetch_history_page(
+                conn, "quiz_history", user_id, history_limit, quiz_after)
+            prediction_rows, next_prediction_cursor = self._fetch_history_page(
+                conn, "predictions", user_id, history_limit, prediction_after)
+            
             conn.commit()
-            return {"success": True, "user_id": user_id}
-        except sqlite3.IntegrityError:
-            return {"success": False, "message": "User already exists"}
         finally:
             conn.close()
+        
+        return {
+            **user,
+            "rank": self.leaderboard.rank(user_id),
+            "summary": summary,
+            "quiz_history": [self._quiz_row_to_dict(r) for r in quiz_rows],
+            "prediction_history": [self._prediction_row_to_dict(r) for r in prediction_rows],
+            "quiz_count": summary["quiz_count"],
+            "prediction_count": summary["prediction_count"],
+            "next_quiz_cursor": next_quiz_cursor,
+            "next_prediction_cursor": next_prediction_cursor
+        }
 
-    def get_user(self, user_id: str) -> Optional[Dict]:
-        """Retrieve user profile"""
+    def get_user_summary(self, user_id: str) -> Dict:
+        """Get a user's quiz and prediction counts and averages, computed in SQL"""
+        conn = self.get_connection()
+        try:
+            return self._summary_stats(conn, user_id)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _summary_stats(conn, user_id: str) -> Dict:
+        """Aggregate a user's quiz and prediction history without loading the rows"""
+        quiz_stats = conn.execute('''
+            SELECT COUNT(*) AS quiz_count, AVG(score) AS avg_score, MAX(score) AS best_score
+            FROM quiz_history
+            WHERE user_id = ?
+        ''', (user_id,)).fetchone()
+        
+        prediction_stats = conn.execute('''
+            SELECT total_predictions, correct_predictions, total_points
+            FROM prediction_stats
+            WHERE user_id = ?
+        ''', (user_id,)).fetchone()
+        
+        prediction_count = prediction_stats["total_predictions"] if prediction_stats else 0
+        correct_predictions = prediction_stats["correct_predictions"] if prediction_stats else 0
+        
+        return {
+            "quiz_count": quiz_stats["quiz_count"],
+            "avg_quiz_score": round(quiz_stats["avg_score"] or 0, 2),
+            "best_quiz_score": quiz_stats["best_score"] or 0,
+            "prediction_count": prediction_count,
+            "correct_predictions": correct_predictions,
+            "prediction_accuracy": round(correct_predictions / prediction_count * 100, 2) if prediction_count else 0,
+            "prediction_points": prediction_stats["total_points"] if prediction_stats else 0
+        }
+
+    def _history_source(self, kind: str) -> tuple:
+        """Map a history kind to its (table, row formatter)"""
+        sources = {
+            "quizzes": ("quiz_history", self._quiz_row_to_dict),
+            "predictions": ("predictions", self._prediction_row_to_dict),
+            "chat": ("chat_history", self._chat_row_to_dict)
+        }
+        if kind not in sources:
+            raise ValueError(f"Unknown history kind: {kind}")
+        return sources[kind]
+
+    def get_history_page(self, user_id: str, kind: str, limit: int = 50,
+                         cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of a user's history, newest first.
+        
+        Args:
+            user_id: User identifier
+            kind: "quizzes", "predictions" or "chat"
+            limit: Page size
+            cursor: next_cursor from the previous page, or None for the newest entries
+        
+        Returns:
+            (entries, next_cursor) - next_cursor is None on the last page
+        
+        Raises:
+            ValueError: If the kind or cursor is invalid
+        """
+        table, to_dict = self._history_source(kind)
+        after = decode_cursor(cursor)
+        if kind == "chat" and self.chat_buffer.has_pending(user_id):
+            self.chat_buffer.flush()
+        conn = self.get_connection()
+        try:
+            rows, next_cursor = self._fetch_history_page(conn, table, user_id, limit, after)
+        finally:
+            conn.close()
+        return [to_dict(row) for row in rows], next_cursor
+
+    def iter_history(self, user_id: str, kind: str, batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Yield a user's entire history, newest first, one keyset page at a time.
+        Each page checks a connection out only while it is read, so a slow
+        consumer never pins a pooled connection or holds a read snapshot open.
+        """
+        cursor = None
+        while True:
+            entries, cursor = self.get_history_page(user_id, kind, batch_size, cursor)
+            yield from entries
+            if cursor is None:
+                return
+
+    @staticmethod
+    def _fetch_history_page(conn, table: str, user_id: str, limit: int,
+                            after: Optional[tuple]) -> tuple:
+        """
+        Fetch one page of a per-user history table, newest first, using the
+        (user_id, created_at) index. Returns (rows, next_cursor).
+        """
+        if table not in ("quiz_history", "predictions", "chat_history"):
+            raise ValueError(f"Unknown history table: {table}")
+        
+        if after:
+            rows = conn.execute(f'''
+                SELECT * FROM {table}
+                WHERE user_id = ? AND (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (user_id, after[0], after[1], limit + 1)).fetchall()
+        else:
+            rows = conn.execute(f'''
+                SELECT * FROM {table}
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (user_id, limit + 1)).fetchall()
+        
+        # One extra row tells us whether another page exists
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return rows, None
+
+    def update_user_points(self, user_id: str, points: int) -> Optional[int]:
+        """Update user's total points; returns the new total (None if no such user)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
+        with self._points_lock:
+            cursor.execute('''
+                UPDATE users 
+                SET total_points = total_points + ?, 
+                    last_interaction = CURRENT_TIMESTAMP
+                WHERE user_id = ?
+                RETURNING total_points
+            ''', (points, user_id))
+            row = cursor.fetchone()
+            
+            conn.commit()
+            if row:
+                self.leaderboard.set_points(user_id, row[0])
         conn.close()
         
-        if row:
-            return {
-                "user_id": row["user_id"],
-                "username": row["username"],
-                "favorite_team": row["favorite_team"],
-                "total_points": row["total_points"],
-                "badges": json.loads(row["badges"]),
-                "created_at": row["created_at"],
-                "last_interaction": row["last_interaction"]
-            }
-        return None
+        return row[0] if row else None
 
-    def update_user_points(self, user_id: str, points: int):
-        """Update user's total points"""
+    def add_badge(self, user_id: str, badge: str) -> bool:
+        """Add a badge to user; returns True if it was newly awarded"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # The (user_id, badge) primary key makes concurrent awards idempotent
         cursor.execute('''
-            UPDATE users 
-            SET total_points = total_points + ?, 
-                last_interaction = CURRENT_TIMESTAMP
-            WHERE user_id = ?
-        ''', (points, user_id))
+            INSERT OR IGNORE INTO user_badges (user_id, badge)
+            SELECT user_id, ? FROM users WHERE user_id = ?
+        ''', (badge, user_id))
+        awarded = cursor.rowcount == 1
         
         conn.commit()
         conn.close()
+        
+        return awarded
 
-    def add_badge(self, user_id: str, badge: str):
-        """Add a badge to user"""
+    def get_badge_holders(self, badge: str, limit: int = 100) -> List[Dict]:
+        """Get users holding a badge, earliest awarded first"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT badges FROM users WHERE user_id = ?', (user_id,))
-        row = cursor.fetchone()
+        cursor.execute('''
+            SELECT b.user_id, u.username, b.awarded_at
+            FROM user_badges b
+            JOIN users u ON u.user_id = b.user_id
+            WHERE b.badge = ?
+            ORDER BY b.awarded_at
+            LIMIT ?
+        ''', (badge, limit))
         
-        if row:
-            badges = json.loads(row["badges"])
-            if badge not in badges:
-                badges.append(badge)
-                cursor.execute('''
-                    UPDATE users 
-                    SET badges = ?
-                    WHERE user_id = ?
-                ''', (json.dumps(badges), user_id))
-                conn.commit()
+        rows = cursor.fetchall()
+        conn.close()
         
+        return [{
+            "user_id": row["user_id"],
+            "username": row["username"],
+            "awarded_at": row["awarded_at"]
+        } for row in rows]
+
+    def get_badge_counts(self) -> Dict[str, int]:
+        """Get the number of holders of every badge"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT badge, COUNT(*) AS holders
+            FROM user_badges
+            GROUP BY badge
+        ''')
+        
+        rows = cursor.fetchall()
         conn.close()
+        
+        return {row["badge"]: row["holders"] for row in rows}
 
     def add_quiz_points(self, user_id: str, points: int):
         """Add points to user (for quiz completion bonuses)"""
@@ -334,49 +651,137 @@ class Database:
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (user_id, team, difficulty, json.dumps(questions or []), 
               json.dumps(answers or []), score))
+        counters = self._increment_counters(conn, user_id, self._quiz_counter_deltas(score))
         
         conn.commit()
         conn.close()
+        
+        return counters
 
-    def get_user_quiz_history(self, user_id: str) -> List[Dict]:
-        """Get user's quiz history"""
+    @staticmethod
+    def _quiz_counter_deltas(score: float) -> Dict[str, int]:
+        """Counter increments for one stored quiz attempt"""
+        deltas = {"quizzes_completed": 1}
+        if score >= 100:
+            deltas["perfect_quizzes"] = 1
+        return deltas
+
+    @staticmethod
+    def _increment_counters(conn, user_id: str, deltas: Dict[str, int]) -> Dict[str, Tuple[int, int]]:
+        """
+        Add to a user's counters inside the caller's transaction.
+        Returns (old, new) values per counter, so badge rules can tell when a threshold is crossed.
+        """
+        values = {}
+        for counter, delta in deltas.items():
+            row = conn.execute('''
+                INSERT INTO user_counters (user_id, counter, value)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, counter) DO UPDATE SET value = value + excluded.value
+                RETURNING value
+            ''', (user_id, counter, delta)).fetchone()
+            values[counter] = (row[0] - delta, row[0])
+        return values
+
+    def get_counters(self, user_id: str) -> Dict[str, int]:
+        """
+        Get every counter badge rules can depend on: user_counters plus the
+        materialized correct_predictions and total_points. All primary-key reads.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT * FROM quiz_history 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC
-        ''', (user_id,))
+            SELECT counter, value FROM user_counters WHERE user_id = ?
+            UNION ALL
+            SELECT 'correct_predictions', correct_predictions FROM prediction_stats WHERE user_id = ?
+            UNION ALL
+            SELECT 'total_points', total_points FROM users WHERE user_id = ?
+        ''', (user_id, user_id, user_id))
         
         rows = cursor.fetchall()
         conn.close()
         
-        result = []
-        for row in rows:
-            # Extract level from difficulty string (e.g., "level_1" -> 1 or "Easy" -> 1)
-            difficulty_str = row["difficulty"]
-            if "level_" in difficulty_str:
-                try:
-                    level = int(difficulty_str.replace("level_", ""))
-                except ValueError:
-                    level = 1
-            else:
-                # If it's "Easy", "Medium", "Hard"
+        return {row["counter"]: row["value"] for row in rows}
+
+    def record_quiz_submission(self, user_id: str, team: str, level: str, score: float,
+                               points: int, next_level: str) -> Optional[Dict]:
+        """
+        Record a graded quiz in one transaction: advance (or create) the team's
+        progress, mark the level completed, store the attempt, bump the quiz
+        counters and award points.
+        
+        Returns:
+            {"total_points", "counters"} with (old, new) values of the changed
+            counters (total_points included), or None if the user does not exist
+        """
+        with self.points_transaction() as (conn, totals):
+            conn.execute('''
+                INSERT INTO quiz_progress (user_id, team, current_level, current_question_index, level_score, total_correct)
+                VALUES (?, ?, ?, 0, 0, 0)
+                ON CONFLICT(user_id, team) DO UPDATE SET
+                    current_level = excluded.current_level,
+                    current_question_index = 0,
+                    level_score = 0,
+                    total_correct = 0,
+                    last_updated = CURRENT_TIMESTAMP
+            ''', (user_id, team, next_level))
+                
+            conn.execute('''
+                INSERT OR REPLACE INTO completed_levels (user_id, team, level, score, completed_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (user_id, team, level, score))
+                
+            conn.execute('''
+                INSERT INTO quiz_history 
+                (user_id, team, difficulty, questions, answers, score)
+                VALUES (?, ?, ?, '[]', '[]', ?)
+            ''', (user_id, team, f"level_{level}", score))
+            counters = self._increment_counters(conn, user_id, self._quiz_counter_deltas(score))
+                
+            row = conn.execute('''
+                UPDATE users 
+                SET total_points = total_points + ?, 
+                    last_interaction = CURRENT_TIMESTAMP
+                WHERE user_id = ?
+                RETURNING total_points
+            ''', (points, user_id)).fetchone()
+            if row:
+                totals[user_id] = row[0]
+        
+        if not row:
+            return None
+        counters["total_points"] = (row[0] - points, row[0])
+        return {"total_points": row[0], "counters": counters}
+
+    def get_user_quiz_history(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """Get user's most recent quiz attempts"""
+        return self.get_history_page(user_id, "quizzes", limit)[0]
+
+    @staticmethod
+    def _quiz_row_to_dict(row) -> Dict:
+        """Convert a quiz_history row to the dict returned by the API"""
+        # Extract level from difficulty string (e.g., "level_1" -> 1 or "Easy" -> 1)
+        difficulty_str = row["difficulty"]
+        if "level_" in difficulty_str:
+            try:
+                level = int(difficulty_str.replace("level_", ""))
+            except ValueError:
                 level = 1
-            
-            result.append({
-                "id": row["id"],
-                "team": row["team"],
-                "level": level,
-                "score": row["score"],
-                "accuracy": int(round(row["score"])) if row["score"] else 0,
-                "correct": int(round(row["score"] / 10)) if row["score"] else 0,
-                "total": 10,
-                "created_at": row["created_at"]
-            })
-        
-        return result
+        else:
+            # If it's "Easy", "Medium", "Hard"
+            level = 1
+        
+        return {
+            "id": row["id"],
+            "team": row["team"],
+            "level": level,
+            "score": row["score"],
+            "accuracy": int(round(row["score"])) if row["score"] else 0,
+            "correct": int(round(row["score"] / 10)) if row["score"] else 0,
+            "total": 10,
+            "created_at": row["created_at"]
+        }
 
     # Predictions
     def add_prediction(self, user_id: str, team1: str, team2: str, 
@@ -390,55 +795,57 @@ class Database:
             (user_id, team1, team2, predicted_winner, predicted_score, explanation)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (user_id, team1, team2, predicted_winner, predicted_score, explanation))
+        pred_id = cursor.lastrowid
+        
+        # Unresolved, so it counts toward the total only
+        self._record_prediction_stats(cursor, user_id, correct=False, points=0)
         
         conn.commit()
-        pred_id = cursor.lastrowid
         conn.close()
         
         return pred_id
 
-    def get_user_predictions(self, user_id: str) -> List[Dict]:
-        """Get user's predictions"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM predictions 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC
-        ''', (user_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            "id": row["id"],
-            "team1": row["team1"],
-            "team2": row["team2"],
-            "predicted_winner": row["predicted_winner"],
-            "predicted_score": row["predicted_score"],
-            "created_at": row["created_at"],
-            "actual_outcome": row["actual_outcome"],
-            "points_earned": row["points_earned"]
-        } for row in rows]
+    @staticmethod
+    def _record_prediction_stats(cursor, user_id: str, correct: bool, points: int) -> int:
+        """
+        Fold one new prediction into the user's prediction_stats row (caller commits).
+        Returns the user's new correct_predictions count.
+        """
+        row = cursor.execute('''
+            INSERT INTO prediction_stats (user_id, total_predictions, correct_predictions, total_points)
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                total_predictions = total_predictions + 1,
+                correct_predictions = correct_predictions + excluded.correct_predictions,
+                total_points = total_points + excluded.total_points
+            RETURNING correct_predictions
+        ''', (user_id, int(correct), points or 0)).fetchone()
+        return row[0]
 
     # Chat History
     def add_chat_message(self, user_id: str, message: str, response: str, tool_used: Optional[str] = None):
-        """Store chat message and response"""
+        """Queue a chat message and response; the chat buffer writes it in the next batch"""
+        # Stamp now (same format as CURRENT_TIMESTAMP) so batching does not shift ordering
+        created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        self.chat_buffer.add(user_id, (user_id, message, response, tool_used, created_at))
+
+    def _write_chat_batch(self, rows: List[Tuple]):
+        """Insert a batch of chat_history rows in one transaction"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO chat_history 
-            (user_id, message, response, tool_used)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, message, response, tool_used))
-        
-        conn.commit()
-        conn.close()
+        try:
+            conn.executemany('''
+                INSERT INTO chat_history 
+                (user_id, message, response, tool_used, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+        finally:
+            conn.close()
 
     def get_user_chat_history(self, user_id: str, limit: int = 10) -> List[Dict]:
         """Get recent chat history for a user (for context)"""
+        if self.chat_buffer.has_pending(user_id):
+            self.chat_buffer.flush()
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -456,29 +863,37 @@ class Database:
         return [{"user": row["message"], "assistant": row["response"]} 
                 for row in reversed(rows)]
 
-    # Leaderboard
+    @staticmethod
+    def _chat_row_to_dict(row) -> Dict:
+        """Convert a chat_history row to the dict returned by the API"""
+        return {
+            "id": row["id"],
+            "user": row["message"],
+            "assistant": row["response"],
+            "tool_used": row["tool_used"],
+            "created_at": row["created_at"]
+        }
+
+    # Leaderboard (served from the in-memory ranking, no table scan)
     def get_leaderboard(self, limit: int = 10) -> List[Dict]:
         """Get top users by points"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT user_id, username, total_points, favorite_team 
-            FROM users 
-            ORDER BY total_points DESC 
-            LIMIT ?
-        ''', (limit,))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            "rank": idx + 1,
-            "user_id": row["user_id"],
-            "username": row["username"],
-            "points": row["total_points"],
-            "team": row["favorite_team"]
-        } for idx, row in enumerate(rows)]
+        return self.leaderboard.top(limit)
+
+    def get_user_count(self) -> int:
+        """Get the number of ranked users"""
+        return len(self.leaderboard)
+
+    def get_user_rank(self, user_id: str, radius: int = 2) -> Optional[Dict]:
+        """Get a user's exact rank plus the neighbors just above and below them"""
+        rank = self.leaderboard.rank(user_id)
+        if rank is None:
+            return None
+        return {
+            "user_id": user_id,
+            "rank": rank,
+            "total_users": len(self.leaderboard),
+            "neighbors": self.leaderboard.around(user_id, radius)
+        }
     # Question tracking - prevent repeated questions
     def record_asked_question(self, user_id: str, team: str, question_id: str):
         """Record that a question was asked to a user for a team"""
@@ -497,6 +912,21 @@ class Database:
         finally:
             conn.close()
 
+    def record_asked_questions(self, user_id: str, team: str, question_ids: List[str]):
+        """Record a batch of questions asked to a user for a team in one transaction"""
+        if not question_ids:
+            return
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT OR IGNORE INTO asked_questions (user_id, team, question_id)
+            VALUES (?, ?, ?)
+        ''', [(user_id, team, question_id) for question_id in question_ids])
+        
+        conn.commit()
+        conn.close()
+
     def get_asked_questions(self, user_id: str, team: str) -> List[str]:
         """Get all question IDs that have been asked to a user for a team"""
         conn = self.get_connection()
@@ -512,97 +942,208 @@ class Database:
         
         return [row["question_id"] for row in rows]
 
-    def reset_asked_questions(self, user_id: str, team: str):
-        """Reset the asked questions for a user + team (with confirmation from user)"""
+    def reset_asked_questions(self, user_id: str, team: str, question_ids: Optional[List[str]] = None):
+        """
+        Reset the asked questions for a user + team (with confirmation from user).
+        Pass question_ids to reset only those questions (e.g. one level's pool).
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            DELETE FROM asked_questions
-            WHERE user_id = ? AND team = ?
-        ''', (user_id, team))
+        if question_ids is None:
+            cursor.execute('''
+                DELETE FROM asked_questions
+                WHERE user_id = ? AND team = ?
+            ''', (user_id, team))
+        else:
+            cursor.executemany('''
+                DELETE FROM asked_questions
+                WHERE user_id = ? AND team = ? AND question_id = ?
+            ''', [(user_id, team, question_id) for question_id in question_ids])
         
         conn.commit()
         conn.close()
 
     # ===== Prediction Methods =====
-    def save_prediction(self, user_id: str, team1: str, team2: str, user_prediction: str, 
-                       system_outcome: str, points: int, explanation: str, sport: str = None) -> Dict:
-        """Save a user's prediction and evaluation"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def save_prediction(self, user_id: str, team1: str, team2: str, user_prediction: str,
+                       explanation: str, sport: str = None) -> Dict:
+        """
+        Save a user's prediction as pending. It is graded, and its points
+        awarded, by resolve_predictions once a real result for the matchup is
+        ingested.
         
+        Returns:
+            {"success", "prediction_id", "total_points"} with the user's current total
+        """
         try:
-            cursor.execute('''
-                INSERT INTO predictions 
-                (user_id, team1, team2, predicted_winner, predicted_score, actual_outcome, points_earned, explanation)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, team1, team2, user_prediction, sport or '', system_outcome, points, explanation))
-            
-            # Update user points
-            cursor.execute('''
-                UPDATE users SET total_points = total_points + ?
-                WHERE user_id = ?
-            ''', (points, user_id))
-            
-            conn.commit()
+            with self.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO predictions 
+                    (user_id, team1, team2, predicted_winner, predicted_score, explanation)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (user_id, team1, team2, user_prediction, sport or '', explanation))
+                prediction_id = cursor.lastrowid
+                
+                # Unresolved, so it counts toward the total only
+                self._record_prediction_stats(cursor, user_id, correct=False, points=0)
+                
+                row = conn.execute(
+                    'SELECT total_points FROM users WHERE user_id = ?', (user_id,)
+                ).fetchone()
             return {
                 "success": True,
-                "prediction_id": cursor.lastrowid,
-                "points_earned": points
+                "prediction_id": prediction_id,
+                "total_points": row[0] if row else 0
             }
         except Exception as e:
-            conn.rollback()
             return {"success": False, "error": str(e)}
-        finally:
-            conn.close()
     
-    def get_user_predictions(self, user_id: str, limit: int = 50) -> List[Dict]:
-        """Get user's prediction history"""
+    def resolve_predictions(self, evaluate: Callable[[str, str, str], Tuple[bool, int]]) -> Dict:
+        """
+        Settle pending predictions against stored match_results in one transaction.
+        A prediction is settled by the first result for its two teams played at or
+        after it was made; its user's prediction stats and points move by the outcome.
+        Safe to re-run: settled predictions are no longer pending.
+        
+        Args:
+            evaluate: (user_prediction, winner, sport) -> (is_correct, points),
+                e.g. PredictionEngine.evaluate_prediction
+        
+        Returns:
+            {"resolved": count, "counters": {user_id: (old, new) values of changed counters}}
+        """
+        with self.points_transaction() as (conn, totals):
+            rows = conn.execute('''
+                SELECT p.id, p.user_id, p.predicted_winner, m.winner, m.sport, m.played_at
+                FROM predictions p
+                JOIN match_results m
+                  ON ((m.home = p.team1 AND m.away = p.team2) OR (m.home = p.team2 AND m.away = p.team1))
+                 AND m.played_at >= p.created_at
+                WHERE p.resolved_at IS NULL
+            ''').fetchall()
+                
+            # Earliest qualifying result per prediction
+            first = {}
+            for row in rows:
+                current = first.get(row["id"])
+                if current is None or row["played_at"] < current["played_at"]:
+                    first[row["id"]] = row
+                
+            updates = []
+            deltas: Dict[str, List[int]] = {}  # user_id -> [correct, points]
+            for prediction_id, row in first.items():
+                is_correct, points = evaluate(row["predicted_winner"], row["winner"], row["sport"])
+                updates.append((row["winner"], points, prediction_id))
+                delta = deltas.setdefault(row["user_id"], [0, 0])
+                delta[0] += int(is_correct)
+                delta[1] += points
+                
+            conn.executemany('''
+                UPDATE predictions
+                SET actual_outcome = ?, points_earned = ?, resolved_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', updates)
+                
+            counters = {}
+            for user_id, (correct, points) in deltas.items():
+                stats = conn.execute('''
+                    UPDATE prediction_stats
+                    SET correct_predictions = correct_predictions + ?,
+                        total_points = total_points + ?
+                    WHERE user_id = ?
+                    RETURNING correct_predictions
+                ''', (correct, points, user_id)).fetchone()
+                user = conn.execute('''
+                    UPDATE users SET total_points = total_points + ?
+                    WHERE user_id = ?
+                    RETURNING total_points
+                ''', (points, user_id)).fetchone()
+                counters[user_id] = {}
+                if stats:
+                    counters[user_id]["correct_predictions"] = (stats[0] - correct, stats[0])
+                if user:
+                    counters[user_id]["total_points"] = (user[0] - points, user[0])
+                    totals[user_id] = user[0]
+        
+        return {"resolved": len(updates), "counters": counters}
+
+    def get_rating_history(self, team: str, limit: int = 100) -> List[Dict]:
+        """Get a team's most recent rating changes from ingested results, oldest first"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT * FROM predictions
-            WHERE user_id = ?
-            ORDER BY created_at DESC
+            SELECT h.game_id, h.strength, h.recent_form, m.played_at, m.home, m.away, m.winner
+            FROM rating_history h
+            JOIN match_results m ON m.id = h.game_id
+            WHERE h.team = ?
+            ORDER BY h.game_id DESC
             LIMIT ?
-        ''', (user_id, limit))
+        ''', (team, limit))
         
         rows = cursor.fetchall()
         conn.close()
         
-        predictions = []
-        for row in rows:
-            predictions.append({
-                'id': row['id'],
-                'team1': row['team1'],
-                'team2': row['team2'],
-                'user_prediction': row['predicted_winner'],
-                'system_outcome': row['actual_outcome'],
-                'points_earned': row['points_earned'],
-                'explanation': row['explanation'],
-                'created_at': row['created_at'],
-                'is_correct': row['predicted_winner'] == row['actual_outcome']
-            })
-        
-        return predictions
+        return [{
+            "game_id": row["game_id"],
+            "played_at": row["played_at"],
+            "opponent": row["away"] if row["home"] == team else row["home"],
+            "winner": row["winner"],
+            "strength": row["strength"],
+            "recent_form": row["recent_form"]
+        } for row in reversed(rows)]
+
+    def get_latest_ratings(self) -> Dict[str, Dict]:
+        """Get every rated team's strength and recent_form after its most recently ingested game"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # With MAX(), SQLite takes the other columns from the row holding the maximum
+        cursor.execute('''
+            SELECT team, strength, recent_form, MAX(game_id)
+            FROM rating_history
+            GROUP BY team
+        ''')
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {row["team"]: {"strength": row["strength"], "recent_form": row["recent_form"]} for row in rows}
+
+    def get_user_predictions(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """Get user's most recent predictions"""
+        return self.get_history_page(user_id, "predictions", limit)[0]
+
+    @staticmethod
+    def _prediction_row_to_dict(row) -> Dict:
+        """Convert a predictions row to the dict returned by the API"""
+        return {
+            'id': row['id'],
+            'team1': row['team1'],
+            'team2': row['team2'],
+            'user_prediction': row['predicted_winner'],
+            'system_outcome': row['actual_outcome'],
+            'points_earned': row['points_earned'],
+            'explanation': row['explanation'],
+            'created_at': row['created_at'],
+            'is_correct': row['predicted_winner'] == row['actual_outcome']
+        }
     
     def get_prediction_stats(self, user_id: str) -> Dict:
-        """Get user's prediction statistics"""
+        """Get user's prediction statistics (a primary-key read of prediction_stats)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Get all predictions
         cursor.execute('''
-            SELECT * FROM predictions
+            SELECT total_predictions, correct_predictions, total_points
+            FROM prediction_stats
             WHERE user_id = ?
         ''', (user_id,))
         
-        rows = cursor.fetchall()
+        row = cursor.fetchone()
         conn.close()
         
-        if not rows:
+        if not row or not row['total_predictions']:
             return {
                 'total_predictions': 0,
                 'correct_predictions': 0,
@@ -611,17 +1152,14 @@ class Database:
                 'average_points_per_prediction': 0
             }
         
-        total = len(rows)
-        correct = sum(1 for row in rows if row['predicted_winner'] == row['actual_outcome'])
-        total_points = sum(row['points_earned'] for row in rows)
-        accuracy = (correct / total * 100) if total > 0 else 0
-        avg_points = total_points / total if total > 0 else 0
+        total = row['total_predictions']
+        correct = row['correct_predictions']
+        total_points = row['total_points']
         
         return {
             'total_predictions': total,
             'correct_predictions': correct,
-            'accuracy': round(accuracy, 2),
+            'accuracy': round(correct / total * 100, 2),
             'total_points': total_points,
-            'average_points_per_prediction': round(avg_points, 2)
+            'average_points_per_prediction': round(total_points / total, 2)
         }
-        conn.close()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+In-process leaderboard kept in sync with users.total_points.
+Users are held in a list sorted by (-points, user_id), so top-N is a slice and a
+user's exact rank is a binary search instead of a scan of the users table.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class Leaderboard:
+    def __init__(self):
+        self._keys: List[Tuple[int, str]] = []  # sorted (-points, user_id)
+        self._users: Dict[str, Dict] = {}        # user_id -> username, team, points
+        self._lock = threading.Lock()
+
+    def load(self, rows: Iterable):
+        """Rebuild from (user_id, username, favorite_team, total_points) rows"""
+        users = {}
+        for user_id, username, team, points in rows:
+            users[user_id] = {"username": username, "team": team, "points": points or 0}
+        keys = sorted((-info["points"], user_id) for user_id, info in users.items())
+        with self._lock:
+            self._users = users
+            self._keys = keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add_user(self, user_id: str, username: str, team: str, points: int = 0):
+        """Add a new user, or refresh an existing one's profile and points"""
+        with self._lock:
+            info = self._users.get(user_id)
+            if info is not None:
+                self._remove_key(info["points"], user_id)
+            self._users[user_id] = {"username": username, "team": team, "points": points}
+            insort(self._keys, (-points, user_id))
+
+    def set_points(self, user_id: str, points: int):
+        """Move a user to their new point total"""
+        with self._lock:
+            info = self._users.get(user_id)
+            if info is None or info["points"] == points:
+                return
+            self._remove_key(info["points"], user_id)
+            info["points"] = points
+            insort(self._keys, (-points, user_id))
+
+    def _remove_key(self, points: int, user_id: str):
+        idx = bisect_left(self._keys, (-points, user_id))
+        if idx < len(self._keys) and self._keys[idx] == (-points, user_id):
+            del self._keys[idx]
+
+    def _entry(self, idx: int) -> Dict:
+        user_id = self._keys[idx][1]
+        info = self._users[user_id]
+        return {
+            "rank": idx + 1,
+            "user_id": user_id,
+            "username": info["username"],
+            "points": info["points"],
+            "team": info["team"]
+        }
+
+    def top(self, limit: int = 10) -> List[Dict]:
+        """Get the top users by points"""
+        with self._lock:
+            return [self._entry(idx) for idx in range(min(max(limit, 0), len(self._keys)))]
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """Get a user's exact 1-based rank, or None if unknown"""
+        with self._lock:
+            info = self._users.get(user_id)
+            if info is None:
+                return None
+            return bisect_left(self._keys, (-info["points"], user_id)) + 1
+
+    def rank_at(self, user_id: str, points: int) -> Optional[int]:
+        """Get the rank a user would hold with `points`, everyone else's points unchanged"""
+        with self._lock:
+            info = self._users.get(user_id)
+            if info is None:
+                return None
+            key = (-points, user_id)
+            idx = bisect_left(self._keys, key)
+            # Don't count the user's own current entry when it sorts ahead of `key`
+            if (-info["points"], user_id) < key:
+                idx -= 1
+            return idx + 1
+
+    def around(self, user_id: str, radius: int = 2) -> List[Dict]:
+        """Get the user's entry plus up to `radius` neighbors above and below"""
+        with self._lock:
+            info = self._users.get(user_id)
+            if info is None:
+                return []
+            idx = bisect_left(self._keys, (-info["points"], user_id))
+            start = max(0, idx - radius)
+            end = min(len(self._keys), idx + radius + 1)
+            return [self._entry(i) for i in range(start, end)]
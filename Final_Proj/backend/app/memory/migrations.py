@@ -0,0 +1,214 @@
+"""
+Versioned schema migrations for the SQLite database.
+The applied version is stored in PRAGMA user_version; each migration runs once,
+in order, inside its own transaction.
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+# (version, description, statements) - append new migrations, never edit old ones
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Index per-user history lookups and the leaderboard", [
+        "CREATE INDEX IF NOT EXISTS idx_quiz_history_user_created ON quiz_history(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_predictions_user_created ON predictions(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_chat_history_user_created ON chat_history(user_id, created_at)",
+        # Covers every column the leaderboard reads, so it never touches the table
+        "CREATE INDEX IF NOT EXISTS idx_users_points ON users(total_points DESC, user_id, username, favorite_team)",
+    ]),
+    (2, "Materialize per-user prediction stats", [
+        """
+        CREATE TABLE IF NOT EXISTS prediction_stats (
+            user_id TEXT PRIMARY KEY,
+            total_predictions INTEGER NOT NULL DEFAULT 0,
+            correct_predictions INTEGER NOT NULL DEFAULT 0,
+            total_points INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        # Backfill from existing history; save_prediction keeps it current afterwards
+        """
+        INSERT OR REPLACE INTO prediction_stats (user_id, total_predictions, correct_predictions, total_points)
+        SELECT user_id, COUNT(*),
+               COALESCE(SUM(predicted_winner = actual_outcome), 0),
+               COALESCE(SUM(points_earned), 0)
+        FROM predictions
+        GROUP BY user_id
+        """,
+    ]),
+    (3, "Move badges from the users.badges JSON column into user_badges", [
+        """
+        CREATE TABLE IF NOT EXISTS user_badges (
+            user_id TEXT NOT NULL,
+            badge TEXT NOT NULL,
+            awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, badge),
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+        """,
+        # Per-user badges in award order, and holders of one badge
+        "CREATE INDEX IF NOT EXISTS idx_user_badges_user ON user_badges(user_id, awarded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_user_badges_badge ON user_badges(badge, awarded_at)",
+        # Array order is award order, which the rowid keeps; users.badges is no longer written
+        """
+        INSERT OR IGNORE INTO user_badges (user_id, badge)
+        SELECT users.user_id, badge.value
+        FROM users, json_each(users.badges) AS badge
+        WHERE json_valid(users.badges)
+        ORDER BY users.user_id, badge.key
+        """,
+    ]),
+    (4, "Per-user activity counters for badge rules", [
+        """
+        CREATE TABLE IF NOT EXISTS user_counters (
+            user_id TEXT NOT NULL,
+            counter TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, counter)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR REPLACE INTO user_counters (user_id, counter, value)
+        SELECT user_id, 'quizzes_completed', COUNT(*) FROM quiz_history GROUP BY user_id
+        """,
+        """
+        INSERT OR REPLACE INTO user_counters (user_id, counter, value)
+        SELECT user_id, 'perfect_quizzes', COUNT(*) FROM quiz_history WHERE score >= 100 GROUP BY user_id
+        """,
+    ]),
+    (5, "Cache of LLM-generated quizzes", [
+        """
+        CREATE TABLE IF NOT EXISTS generated_quizzes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            questions TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            use_count INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_generated_quizzes_key ON generated_quizzes(team, level, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_generated_quizzes_last_used ON generated_quizzes(last_used)",
+    ]),
+    (6, "Real match results, team rating history and prediction resolution", [
+        """
+        CREATE TABLE IF NOT EXISTS match_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sport TEXT NOT NULL,
+            home TEXT NOT NULL,
+            away TEXT NOT NULL,
+            home_score INTEGER,
+            away_score INTEGER,
+            winner TEXT NOT NULL,
+            played_at TEXT NOT NULL,
+            UNIQUE (home, away, played_at)
+        )
+        """,
+        # One row per team per game; keyed lookups only, so no rowid
+        """
+        CREATE TABLE IF NOT EXISTS rating_history (
+            team TEXT NOT NULL,
+            game_id INTEGER NOT NULL,
+            strength REAL NOT NULL,
+            recent_form REAL NOT NULL,
+            PRIMARY KEY (team, game_id)
+        ) WITHOUT ROWID
+        """,
+        "ALTER TABLE predictions ADD COLUMN resolved_at TIMESTAMP",
+        # Predictions graded at submit time are already settled
+        "UPDATE predictions SET resolved_at = created_at WHERE actual_outcome IS NOT NULL",
+        # Only unresolved predictions are indexed, so the index stays small
+        "CREATE INDEX IF NOT EXISTS idx_predictions_pending ON predictions(created_at) WHERE resolved_at IS NULL",
+    ]),
+    (7, "Signup order counter for the early_adopter badge", [
+        # create_user numbers new users; existing ones are numbered in signup order
+        """
+        INSERT OR IGNORE INTO user_counters (user_id, counter, value)
+        SELECT user_id, 'signup_number', ROW_NUMBER() OVER (ORDER BY created_at, rowid) FROM users
+        """,
+        # Award the badge to the first 100 users (RewardConfig.BADGES["early_adopter"])
+        """
+        INSERT OR IGNORE INTO user_badges (user_id, badge)
+        SELECT user_id, 'early_adopter' FROM user_counters
+        WHERE counter = 'signup_number' AND value <= 100
+        """,
+    ]),
+]
+
+# Queries on hot request paths that must be answered from an index
+HOT_QUERIES: List[Tuple[str, tuple]] = [
+    ("SELECT * FROM quiz_history WHERE user_id = ? ORDER BY created_at DESC", ("u",)),
+    ("SELECT * FROM predictions WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", ("u", 50)),
+    ("SELECT * FROM quiz_history WHERE user_id = ? AND (created_at, id) < (?, ?) "
+     "ORDER BY created_at DESC, id DESC LIMIT ?", ("u", "2024-01-01", 1, 10)),
+    ("SELECT * FROM predictions WHERE user_id = ? AND (created_at, id) < (?, ?) "
+     "ORDER BY created_at DESC, id DESC LIMIT ?", ("u", "2024-01-01", 1, 10)),
+    ("SELECT * FROM chat_history WHERE user_id = ? AND (created_at, id) < (?, ?) "
+     "ORDER BY created_at DESC, id DESC LIMIT ?", ("u", "2024-01-01", 1, 10)),
+    ("SELECT message, response FROM chat_history WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", ("u", 10)),
+    ("SELECT user_id, username, total_points, favorite_team FROM users ORDER BY total_points DESC LIMIT ?", (10,)),
+    ("SELECT * FROM users WHERE user_id = ?", ("u",)),
+    ("SELECT * FROM prediction_stats WHERE user_id = ?", ("u",)),
+    ("SELECT counter, value FROM user_counters WHERE user_id = ?", ("u",)),
+    ("SELECT id, questions FROM generated_quizzes WHERE team = ? AND level = ? AND created_at > ?", ("t", 1, 0.0)),
+    ("SELECT p.id, p.user_id, p.predicted_winner, m.winner, m.sport, m.played_at FROM predictions p "
+     "JOIN match_results m ON ((m.home = p.team1 AND m.away = p.team2) OR (m.home = p.team2 AND m.away = p.team1)) "
+     "AND m.played_at >= p.created_at WHERE p.resolved_at IS NULL", ()),
+    ("SELECT game_id, strength, recent_form FROM rating_history WHERE team = ? ORDER BY game_id", ("t",)),
+    ("SELECT u.*, b.badge FROM users u LEFT JOIN user_badges b ON b.user_id = u.user_id "
+     "WHERE u.user_id = ? ORDER BY b.awarded_at, b.rowid", ("u",)),
+    ("SELECT b.user_id, u.username, b.awarded_at FROM user_badges b JOIN users u ON u.user_id = b.user_id "
+     "WHERE b.badge = ? ORDER BY b.awarded_at LIMIT ?", ("quiz_master", 100)),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version recorded in PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Apply every migration newer than the database's current version.
+    Safe to run from several processes at once: each migration re-reads the
+    version under the write lock and is skipped if another process applied it.
+
+    Returns:
+        The schema version after migrating
+    """
+    version = get_schema_version(conn)
+    for target, description, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have migrated between our read and taking the lock
+            version = get_schema_version(conn)
+            if target <= version:
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied migration {target}: {description}")
+        version = target
+    return version
+
+def find_query_plan_regressions(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    """
+    Run EXPLAIN QUERY PLAN over HOT_QUERIES and report any that fall back to a
+    full table scan or a temporary sort.
+
+    Returns:
+        List of (query, plan detail) pairs; empty when every hot query uses an index
+    """
+    regressions = []
+    for query, params in HOT_QUERIES:
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall():
+            detail = row[3]
+            is_table_scan = detail.startswith("SCAN") and "INDEX" not in detail
+            if is_table_scan or "TEMP B-TREE" in detail:
+                regressions.append((query, detail))
+    return regressions
@@ -0,0 +1,32 @@
+"""
+Keyset pagination helpers for the history tables.
+History is ordered by (created_at, id) descending; a cursor encodes the last row
+a client has seen so the next page starts right after it without OFFSET scans.
+"""
+
+import base64
+from typing import Optional, Tuple
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Encode a row's (created_at, id) sort key as an opaque cursor string"""
+    raw = f"{created_at}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (created_at, id) tuple, or None when no cursor was given
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
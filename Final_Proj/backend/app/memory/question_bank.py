@@ -0,0 +1,235 @@
+"""
+In-memory question bank for the quiz endpoints.
+Parses questions.json once and keeps lookup indexes so requests never touch the file.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+LEVELS = ("Easy", "Medium", "Hard")
+
+class QuestionBank:
+    def __init__(self, questions_path: str = "./backend/data/questions.json",
+                 check_interval: float = 2.0):
+        self.questions_path = questions_path
+        # Minimum seconds between file stat checks in reload_if_changed
+        self.check_interval = check_interval
+        self._last_check = 0.0
+        self._mtime = None
+        self.content_hash = ""
+        self._lock = threading.Lock()
+        self._questions: List[Dict] = []
+        self._by_id: Dict[str, Dict] = {}
+        self._by_team_level: Dict[Tuple[str, str], List[Dict]] = {}
+        # Answer key: question id -> slot, slot -> correctAnswerIndex (-1 when missing)
+        self._answer_slots: Dict[str, int] = {}
+        self._answer_key = array('b')
+        self._teams: List[Dict] = []
+        # Team catalog, serialized once per file version for /api/teams/available
+        self.teams_json = b""
+        self.teams_etag = ""
+        self.loaded = False
+        self.load()
+
+    def load(self, raw: Optional[bytes] = None, mtime: Optional[float] = None):
+        """Parse the question file and rebuild every index"""
+        try:
+            if raw is None:
+                mtime = os.path.getmtime(self.questions_path)
+                with open(self.questions_path, 'rb') as f:
+                    raw = f.read()
+            questions = json.loads(raw)
+        except FileNotFoundError:
+            print(f"Question bank not found at {self.questions_path}")
+            questions = None
+
+        by_id = {}
+        by_team_level = {}
+        answer_slots = {}
+        answer_key = array('b')
+        for q in questions or []:
+            question_id = sys.intern(q["id"])
+            by_id[question_id] = q
+            key = (q.get("team"), q.get("level"))
+            by_team_level.setdefault(key, []).append(q)
+
+            correct_idx = q.get("correctAnswerIndex")
+            answer_slots[question_id] = len(answer_key)
+            answer_key.append(correct_idx if isinstance(correct_idx, int) and 0 <= correct_idx < 128 else -1)
+
+        content_hash = hashlib.sha1(raw).hexdigest() if questions is not None else ""
+        teams = self._build_teams(by_team_level)
+        teams_json = json.dumps({
+            "status": "success",
+            "teams": teams,
+            "total_teams": len(teams)
+        }).encode()
+
+        # Swap the indexes in together so readers never see a half-built bank
+        with self._lock:
+            self._questions = questions or []
+            self._by_id = by_id
+            self._by_team_level = by_team_level
+            self._answer_slots = answer_slots
+            self._answer_key = answer_key
+            self._teams = teams
+            self.teams_json = teams_json
+            self.teams_etag = f'"{content_hash[:20]}"'
+            self.content_hash = content_hash
+            self._mtime = mtime
+            self.loaded = questions is not None
+
+    def reload(self) -> bool:
+        """
+        Reload the bank after questions.json has been edited.
+        Reads and parses the file, so call it off the event loop.
+
+        Returns:
+            True if the bank was rebuilt; False keeps the current bank
+        """
+        try:
+            mtime = os.path.getmtime(self.questions_path)
+            with open(self.questions_path, 'rb') as f:
+                raw = f.read()
+            self.load(raw, mtime)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the previous bank if the file is missing, mid-edit or malformed
+            print(f"Error reloading question bank: {e}")
+            return False
+        return True
+
+    def check_due(self) -> bool:
+        """Whether check_interval has passed since reload_if_changed last stat'ed the file"""
+        return time.monotonic() - self._last_check >= self.check_interval
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload only if questions.json changed on disk.
+        The file is stat'ed at most once per check_interval; a newer mtime with
+        identical content just records the new mtime without rebuilding.
+        A changed file is hashed and parsed, so call it off the event loop.
+
+        Returns:
+            True if the bank was rebuilt
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        try:
+            mtime = os.path.getmtime(self.questions_path)
+            if mtime == self._mtime:
+                return False
+            with open(self.questions_path, 'rb') as f:
+                raw = f.read()
+            if hashlib.sha1(raw).hexdigest() == self.content_hash:
+                self._mtime = mtime
+                return False
+            self.load(raw, mtime)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the previous bank if the file is gone, mid-edit or malformed
+            print(f"Error reloading question bank: {e}")
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def get_question(self, question_id: str) -> Optional[Dict]:
+        """Look up a question by its ID"""
+        return self._by_id.get(question_id)
+
+    def get_correct_index(self, question_id: str) -> Optional[int]:
+        """Get the correct option index for a question, or None if unknown"""
+        slot = self._answer_slots.get(question_id)
+        if slot is None:
+            return None
+        correct_idx = self._answer_key[slot]
+        return correct_idx if correct_idx >= 0 else None
+
+    def grade(self, questions: List, answers: Dict) -> Tuple[int, List[Dict]]:
+        """
+        Grade submitted answers against the answer key.
+
+        Args:
+            questions: Quiz questions as shown to the user (dicts or objects)
+            answers: Dict mapping question index (as string) to selected answer text
+
+        Returns:
+            Tuple of (correct_count, per-question results)
+        """
+        slots = self._answer_slots
+        answer_key = self._answer_key
+        correct_count = 0
+        results = []
+
+        for idx, question in enumerate(questions):
+            # Handle both dict and object formats
+            if isinstance(question, dict):
+                get = question.get
+            else:
+                get = lambda name, default: getattr(question, name, default)
+            options = get("options", [])
+
+            # Find the correct answer text from the answer key by ID
+            correct_answer = ""
+            slot = slots.get(get("id", ""))
+            if slot is not None:
+                correct_idx = answer_key[slot]
+                if 0 <= correct_idx < len(options):
+                    correct_answer = options[correct_idx]
+
+            # User answer is the text they selected
+            user_answer = answers.get(str(idx), "")
+
+            # Case-insensitive, trim whitespace comparison
+            is_correct = user_answer.strip().lower() == correct_answer.strip().lower()
+            if is_correct:
+                correct_count += 1
+
+            results.append({
+                "question": get("question", ""),
+                "user_answer": user_answer,
+                "correct_answer": correct_answer,
+                "is_correct": is_correct,
+                "explanation": get("explanation", "")
+            })
+
+        return correct_count, results
+
+    def get_questions(self, team: str, level: str) -> List[Dict]:
+        """Get all questions for a team and difficulty level"""
+        return self._by_team_level.get((team, level), [])
+
+    def get_teams(self) -> List[Dict]:
+        """Get every team with the difficulty levels it has questions for"""
+        return self._teams
+
+    @staticmethod
+    def _build_teams(by_team_level: Dict[Tuple[str, str], List[Dict]]) -> List[Dict]:
+        """Build the sorted team availability catalog from the (team, level) index"""
+        teams_map = {}
+        for team, level in by_team_level:
+            team = team or "Unknown"
+            if team not in teams_map:
+                teams_map[team] = {
+                    "name": team,
+                    "levels": [],
+                    "has_easy": False,
+                    "has_medium": False,
+                    "has_hard": False
+                }
+            if level in LEVELS:
+                teams_map[team]["has_" + level.lower()] = True
+
+        for entry in teams_map.values():
+            entry["levels"] = [level for level in LEVELS if entry["has_" + level.lower()]]
+
+        return sorted(teams_map.values(), key=lambda x: x["name"])
@@ -0,0 +1,153 @@
+"""
+Unseen-question sampler for quiz generation.
+Each (user, team, level) keeps an integer bitmap over the positions of that
+level's pool in the question bank; set bits are questions the user has already
+been asked. Draws come from the unset bits and are recorded in asked_questions.
+
+The shipped questions.json has exactly 10 questions per team and level, the
+size of a quiz, so each quiz is the whole pool in a new order and the next
+one starts a reset. Unseen-first drawing only matters for pools larger than k.
+"""
+
+import random
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Dict, List, Tuple
+
+from .database import Database
+from .question_bank import LEVELS, QuestionBank
+
+KEY_LOCK_STRIPES = 64
+
+class QuestionSampler:
+    def __init__(self, bank: QuestionBank, db: Database, cache_size: int = 4096):
+        """
+        Args:
+            bank: Question bank the pools come from
+            db: Database holding asked_questions
+            cache_size: Number of (user, team, level) bitmaps kept in memory
+        """
+        self.bank = bank
+        self.db = db
+        self.cache_size = cache_size
+        # (user_id, team, level) -> (pool list the bits refer to, bitmap)
+        self._seen: "OrderedDict[Tuple[str, str, str], Tuple[List[Dict], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Striped locks making each key's read, draw and write-back atomic, so two
+        # concurrent requests for the same user, team and level never draw the same questions
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+
+    def sample(self, user_id: str, team: str, level: str, k: int = 10) -> Tuple[List[Dict], bool]:
+        """
+        Draw up to k questions the user has not been asked for this team and level.
+        When fewer than k unseen questions remain, all of them are used and the
+        rest are topped up from seen ones; once none remain the level's pool is
+        reset for the user.
+
+        Returns:
+            (questions, pool_was_reset)
+        """
+        pool = self.bank.get_questions(team, level)
+        n = len(pool)
+        if not n:
+            return [], False
+        k = min(k, n)
+
+        with self._key_locks[self._stripe(user_id, team, level)]:
+            return self._draw(user_id, team, level, pool, k)
+
+    @staticmethod
+    def _stripe(user_id: str, team: str, level: str) -> int:
+        return hash((user_id, team, level)) % KEY_LOCK_STRIPES
+
+    def _draw(self, user_id: str, team: str, level: str, pool: List[Dict], k: int) -> Tuple[List[Dict], bool]:
+        """Read the bitmap, draw k positions and write back; the caller holds the key's lock"""
+        n = len(pool)
+        seen = self._get_seen(user_id, team, level, pool)
+        reset = False
+        if seen.bit_count() >= n:
+            self.db.reset_asked_questions(user_id, team, [q["id"] for q in pool])
+            seen = 0
+            reset = True
+
+        unseen_count = n - seen.bit_count()
+        if unseen_count >= k:
+            positions = self._pick_unset(seen, n, k, unseen_count)
+        else:
+            positions = self._pick_unset(seen, n, unseen_count, unseen_count)
+            chosen = set(positions)
+            positions += random.sample([i for i in range(n) if i not in chosen], k - unseen_count)
+
+        for position in positions:
+            seen |= 1 << position
+        self._store(user_id, team, level, pool, seen)
+
+        questions = [pool[position] for position in positions]
+        self.db.record_asked_questions(user_id, team, [q["id"] for q in questions])
+        return questions, reset
+
+    def unseen_count(self, user_id: str, team: str, level: str) -> int:
+        """Number of questions in the level's pool the user has not been asked"""
+        pool = self.bank.get_questions(team, level)
+        return len(pool) - self._get_seen(user_id, team, level, pool).bit_count()
+
+    def invalidate(self, user_id: str, team: str):
+        """
+        Drop cached bitmaps for a user and team (e.g. after their pool is reset).
+        Waits for draws in progress for the team, so none writes back a bitmap
+        read before the reset.
+        """
+        with self._lock:
+            levels = set(LEVELS) | {key[2] for key in self._seen if key[0] == user_id and key[1] == team}
+        # Stripes are taken in index order; a draw only ever holds one
+        stripes = sorted({self._stripe(user_id, team, level) for level in levels})
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._key_locks[stripe])
+            with self._lock:
+                for key in [key for key in self._seen if key[0] == user_id and key[1] == team]:
+                    del self._seen[key]
+
+    @staticmethod
+    def _pick_unset(seen: int, n: int, k: int, unseen_count: int) -> List[int]:
+        """Pick k distinct positions below n whose bit is not set in seen"""
+        if k <= 0:
+            return []
+        if unseen_count >= 2 * k:
+            # Mostly unseen: rejection sampling needs only a few random draws
+            picked = set()
+            while len(picked) < k:
+                position = random.randrange(n)
+                if not (seen >> position) & 1:
+                    picked.add(position)
+            return list(picked)
+        # Nearly exhausted: enumerate the few free positions and sample those
+        return random.sample([i for i in range(n) if not (seen >> i) & 1], k)
+
+    def _get_seen(self, user_id: str, team: str, level: str, pool: List[Dict]) -> int:
+        """Get the cached bitmap, rebuilding it from asked_questions when missing or stale"""
+        key = (user_id, team, level)
+        with self._lock:
+            entry = self._seen.get(key)
+            # A reloaded bank builds new pool lists, which invalidates old bitmaps
+            if entry is not None and entry[0] is pool:
+                self._seen.move_to_end(key)
+                return entry[1]
+
+        positions = {q["id"]: i for i, q in enumerate(pool)}
+        seen = 0
+        for question_id in self.db.get_asked_questions(user_id, team):
+            position = positions.get(question_id)
+            if position is not None:
+                seen |= 1 << position
+        self._store(user_id, team, level, pool, seen)
+        return seen
+
+    def _store(self, user_id: str, team: str, level: str, pool: List[Dict], seen: int):
+        key = (user_id, team, level)
+        with self._lock:
+            self._seen[key] = (pool, seen)
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.cache_size:
+                self._seen.popitem(last=False)
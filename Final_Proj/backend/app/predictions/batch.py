@@ -0,0 +1,69 @@
+"""
+Vectorized batch predictions over the team ratings.
+Each ratings version is compiled into NumPy arrays indexed by team id (see
+ratings.RatingsTable), so win probabilities for thousands of matchups (or a
+whole league's N x N matrix) come from a single array expression using
+PredictionEngine's scoring model. Favorites and confidences follow
+PredictionEngine.generate_prediction: clear favorites are capped at 95% and
+close calls (40-60%) break the same seeded way as the single-match prediction.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .engine import PredictionEngine
+from .ratings import RatingsSnapshot, RatingsTable, get_ratings_store, get_ratings_table
+
+# Confidence cap and close-call band of PredictionEngine.generate_prediction
+MAX_CONFIDENCE = 95
+CLOSE_CALL_LOW = 0.4
+CLOSE_CALL_HIGH = 0.6
+
+def predict_batch(matchups: Sequence[Tuple[str, str]],
+                  sport: Optional[str] = None,
+                  ratings: Optional[RatingsSnapshot] = None) -> List[Dict]:
+    """
+    Win probabilities for many matchups in one vectorized pass.
+
+    Args:
+        matchups: (team1, team2) pairs
+        sport: Sport of the matchups (defaults to team1's sport in the ratings)
+        ratings: Ratings snapshot to use (defaults to the current one)
+
+    Returns:
+        One dict per matchup with both win probabilities, the favorite and confidence
+    """
+    if ratings is None:
+        ratings = get_ratings_store().snapshot
+    if not matchups:
+        return []
+    table = ratings.table
+    team1s = [m[0] for m in matchups]
+    team2s = [m[1] for m in matchups]
+    p1 = table.win_probabilities(team1s, team2s)
+    p1_rounded = np.round(p1, 4).tolist()
+    favorite_is_team1 = (p1 > CLOSE_CALL_HIGH).tolist()
+    confidence = np.minimum(np.maximum(p1, 1 - p1) * 100, MAX_CONFIDENCE).astype(int).tolist()
+
+    # Close calls are settled one by one with the engine's matchup-seeded draw
+    for i in np.flatnonzero((p1 >= CLOSE_CALL_LOW) & (p1 <= CLOSE_CALL_HIGH)).tolist():
+        team1, team2, prob = team1s[i], team2s[i], float(p1[i])
+        match_sport = sport if sport is not None else _team_sport(table, team1)
+        key = PredictionEngine._cache_key(team1, team2, match_sport, ratings)
+        favorite_is_team1[i] = PredictionEngine._match_rng(key).random() < prob
+        confidence[i] = int((prob if favorite_is_team1[i] else 1 - prob) * 100)
+
+    return [{
+        'team1': team1,
+        'team2': team2,
+        'team1_win_prob': prob,
+        'team2_win_prob': round(1 - prob, 4),
+        'favorite': team1 if first else team2,
+        'confidence': conf
+    } for team1, team2, prob, first, conf in zip(team1s, team2s, p1_rounded, favorite_is_team1, confidence)]
+
+def _team_sport(table: RatingsTable, team: str) -> str:
+    """Sport a team is rated under, or '' for unknown teams"""
+    i = table.index.get(team)
+    return table.sports[i] if i is not None else ''
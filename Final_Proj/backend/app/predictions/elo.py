@@ -0,0 +1,231 @@
+"""
+Elo-style rating updates from real match results.
+Results (CSV or NDJSON feeds, or API payloads) are stored once in match_results.
+Each new game moves both teams' strength by K * (actual - expected), where
+the expected score comes from PredictionEngine's own s1 / (s1 + s2) model, and
+folds the result into recent_form as an exponential moving average. The
+updates are O(1) per game and touch only the two teams that played; the
+curated rankings are left as they are. The games and each team's new rating
+(rating_history) are committed together, so SQLite is the source of truth; the
+ratings file is a derived copy, written and published after the commit and
+repaired from rating_history at startup. Pending user predictions are then
+settled against the new results.
+"""
+
+import csv
+import io
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.memory.database import Database
+from .engine import PredictionEngine
+from .ratings import RatingsStore
+
+# Strength points that change hands on a fully unexpected result
+ELO_K = 4.0
+# Weight of the latest game in recent_form (0-10 scale)
+FORM_ALPHA = 0.2
+STRENGTH_RANGE = (0.0, 100.0)
+
+class EloRatings:
+    """Working copy of the team ratings that results are applied to"""
+
+    def __init__(self, teams: Mapping[str, Dict], k: float = ELO_K, form_alpha: float = FORM_ALPHA):
+        self.teams: Dict[str, Dict] = {name: dict(data) for name, data in teams.items()}
+        self.k = k
+        self.form_alpha = form_alpha
+
+    def expected(self, team1: str, team2: str) -> float:
+        """Expected score of team1 against team2 under the prediction model"""
+        s1 = PredictionEngine.team_score(self.teams[team1])
+        s2 = PredictionEngine.team_score(self.teams[team2])
+        total = s1 + s2
+        return s1 / total if total > 0 else 0.5
+
+    def update(self, home: str, away: str, winner: str) -> Tuple[Dict, Dict]:
+        """
+        Apply one result in constant time.
+
+        Args:
+            home: Home team
+            away: Away team
+            winner: Winning team, or "Draw"
+
+        Returns:
+            (home team data, away team data) after the update
+        """
+        actual = 1.0 if winner == home else 0.0 if winner == away else 0.5
+        change = self.k * (actual - self.expected(home, away))
+        low, high = STRENGTH_RANGE
+
+        for team, delta, score in ((home, change, actual), (away, -change, 1.0 - actual)):
+            data = self.teams[team]
+            data['strength'] = round(min(high, max(low, data['strength'] + delta)), 2)
+            data['recent_form'] = round(
+                (1 - self.form_alpha) * data['recent_form'] + self.form_alpha * 10 * score, 2)
+        return self.teams[home], self.teams[away]
+
+def _parse_played_at(value: Optional[str]) -> str:
+    """Normalize a result timestamp to the database's 'YYYY-MM-DD HH:MM:SS' format"""
+    if not value:
+        return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    value = str(value).strip()
+    if len(value) == 10:
+        # Date only: the game counts as played by the end of that day
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d 23:59:59')
+    played_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if played_at.tzinfo is not None:
+        # Stored timestamps are UTC, like SQLite's CURRENT_TIMESTAMP
+        played_at = played_at.astimezone(timezone.utc)
+    return played_at.strftime('%Y-%m-%d %H:%M:%S')
+
+def normalize_result(record: Mapping, line: int = 0) -> Dict:
+    """
+    Validate one result record: home, away, home_score, away_score and
+    optionally sport and played_at (or date).
+
+    Raises:
+        ValueError: Missing teams, or scores that are not integers
+    """
+    home = (record.get('home') or '').strip()
+    away = (record.get('away') or '').strip()
+    if not home or not away or home == away:
+        raise ValueError(f"Result {line}: needs two different teams in 'home' and 'away'")
+    try:
+        home_score = int(record['home_score'])
+        away_score = int(record['away_score'])
+        played_at = _parse_played_at(record.get('played_at') or record.get('date'))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Result {line}: {e}")
+
+    winner = home if home_score > away_score else away if away_score > home_score else 'Draw'
+    return {
+        'home': home,
+        'away': away,
+        'home_score': home_score,
+        'away_score': away_score,
+        'winner': winner,
+        'sport': (record.get('sport') or '').strip(),
+        'played_at': played_at
+    }
+
+def parse_results(raw: str, fmt: str) -> List[Dict]:
+    """
+    Parse a results feed.
+
+    Args:
+        raw: Feed contents
+        fmt: "csv" (with a header row) or "ndjson" (one JSON object per line)
+
+    Returns:
+        Normalized results in feed order
+    """
+    if fmt == 'csv':
+        records: Iterable[Mapping] = csv.DictReader(io.StringIO(raw))
+    elif fmt == 'ndjson':
+        records = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    else:
+        raise ValueError(f"Unknown results format '{fmt}'; expected csv or ndjson")
+    return [normalize_result(record, line) for line, record in enumerate(records, start=1)]
+
+class ResultsIngestor:
+    def __init__(self, db: Database, store: RatingsStore):
+        """
+        Args:
+            db: Database holding match_results, rating_history and predictions
+            store: Ratings store the updated ratings are published to
+        """
+        self.db = db
+        self.store = store
+        # One ingestion at a time, so each starts from the ratings the last one wrote
+        self._lock = threading.Lock()
+
+    def restore(self) -> bool:
+        """
+        Bring the ratings up to date with rating_history, e.g. when the process
+        stopped between committing games and writing the ratings file.
+
+        Returns:
+            Whether any team's rating had to be restored
+        """
+        with self._lock:
+            snapshot = self.store.snapshot
+            teams = {name: dict(data) for name, data in snapshot.teams.items()}
+            restored = 0
+            for team, latest in self.db.get_latest_ratings().items():
+                data = teams.get(team)
+                if data is None:
+                    continue
+                if (data['strength'], data['recent_form']) != (latest['strength'], latest['recent_form']):
+                    data.update(latest)
+                    restored += 1
+            if restored:
+                print(f"Restored {restored} team ratings from rating_history")
+                self.store.publish(teams)
+            return restored > 0
+
+    def ingest(self, results: List[Dict]) -> Dict:
+        """
+        Apply real results: store new games, update ratings, record rating
+        history, publish the new ratings and settle pending predictions.
+        Games already ingested are skipped, so a feed can be replayed safely.
+
+        Args:
+            results: Normalized results (see normalize_result)
+
+        Returns:
+            Counts of applied, duplicate and unknown-team games, the new ratings
+            version, resolved predictions and each affected user's counters
+        """
+        with self._lock:
+            snapshot = self.store.snapshot
+            ratings = EloRatings(snapshot.teams)
+            applied, duplicates, unknown = 0, 0, []
+            history = []
+
+            with self.db.transaction() as conn:
+                for result in sorted(results, key=lambda r: r['played_at']):
+                    home, away = result['home'], result['away']
+                    missing = [team for team in (home, away) if team not in ratings.teams]
+                    if missing:
+                        unknown.extend(missing)
+                        continue
+
+                    sport = result['sport'] or ratings.teams[home].get('sport', '')
+                    row = conn.execute('''
+                        INSERT OR IGNORE INTO match_results
+                        (sport, home, away, home_score, away_score, winner, played_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        RETURNING id
+                    ''', (sport, home, away, result['home_score'], result['away_score'],
+                          result['winner'], result['played_at'])).fetchone()
+                    if row is None:
+                        duplicates += 1
+                        continue
+
+                    home_data, away_data = ratings.update(home, away, result['winner'])
+                    history.append((home, row[0], home_data['strength'], home_data['recent_form']))
+                    history.append((away, row[0], away_data['strength'], away_data['recent_form']))
+                    applied += 1
+
+                conn.executemany('''
+                    INSERT OR REPLACE INTO rating_history (team, game_id, strength, recent_form)
+                    VALUES (?, ?, ?, ?)
+                ''', history)
+
+            # Only after the commit, so the file never holds ratings for games that were rolled back
+            if applied:
+                self.store.publish(ratings.teams)
+
+        # Settles predictions for these games and any left over from an earlier failure
+        resolution = self.db.resolve_predictions(PredictionEngine.evaluate_prediction)
+        return {
+            "applied": applied,
+            "duplicates": duplicates,
+            "unknown_teams": sorted(set(unknown)),
+            "ratings_version": self.store.version,
+            "resolved_predictions": resolution["resolved"],
+            "counters": resolution["counters"]
+        }
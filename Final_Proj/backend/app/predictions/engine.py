@@ -1,70 +1,109 @@
 """
 Prediction engine for sports outcomes.
 Uses team ranking, recent form, history, and key players to generate predictions.
+Team data comes from the hot-reloadable ratings store (data/team_ratings.json).
 """
 
+import hashlib
 import random
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
-# Team data with rankings and key players
-TEAM_RANKINGS = {
-    # Soccer/Football Teams (Ranked by combined League & Champions League Form)
-    'Arsenal': {'ranking': 1, 'strength': 96, 'recent_form': 10, 'key_players': ['Bukayo Saka', 'Martin Ødegaard', 'Viktor Gyökeres']},
-    'Barcelona': {'ranking': 2, 'strength': 95, 'recent_form': 9, 'key_players': ['Lamine Yamal', 'Robert Lewandowski', 'Dani Olmo']},
-    'Real Madrid': {'ranking': 3, 'strength': 94, 'recent_form': 8, 'key_players': ['Kylian Mbappé', 'Vinícius Jr.', 'Jude Bellingham']},
-    'Manchester City': {'ranking': 4, 'strength': 92, 'recent_form': 6, 'key_players': ['Erling Haaland', 'Phil Foden', 'Rodri']},
-    'Liverpool': {'ranking': 5, 'strength': 91, 'recent_form': 7, 'key_players': ['Mohamed Salah', 'Virgil van Dijk', 'Luis Díaz']},
-    'Bayern Munich': {'ranking': 6, 'strength': 93, 'recent_form': 8, 'key_players': ['Harry Kane', 'Jamal Musiala', 'Joshua Kimmich']},
-    'Inter Milan': {'ranking': 7, 'strength': 90, 'recent_form': 5, 'key_players': ['Lautaro Martínez', 'Marcus Thuram', 'Nicolò Barella']},
-    'Paris Saint-Germain': {'ranking': 8, 'strength': 89, 'recent_form': 7, 'key_players': ['Ousmane Dembélé', 'Vitinha', 'Bradley Barcola']},
-    'Aston Villa': {'ranking': 9, 'strength': 88, 'recent_form': 7, 'key_players': ['Ollie Watkins', 'Morgan Rogers', 'Emiliano Martínez']},
-    'Atletico Madrid': {'ranking': 10, 'strength': 87, 'recent_form': 9, 'key_players': ['Antoine Griezmann', 'Julián Álvarez', 'Conor Gallagher']},
-    'Manchester United': {'ranking': 11, 'strength': 86, 'recent_form': 8, 'key_players': ['Bruno Fernandes', 'Alejandro Garnacho', 'Kobbie Mainoo']},
-    'Chelsea': {'ranking': 12, 'strength': 85, 'recent_form': 8, 'key_players': ['Cole Palmer', 'Nicolas Jackson', 'Moisés Caicedo']},
-    'Tottenham': {'ranking': 13, 'strength': 84, 'recent_form': 6, 'key_players': ['Heung-min Son', 'James Maddison', 'Micky van de Ven']},
-    'Juventus': {'ranking': 14, 'strength': 84, 'recent_form': 8, 'key_players': ['Kenan Yıldız', 'Dušan Vlahović', 'Teun Koopmeiners']},
-    'Borussia Dortmund': {'ranking': 15, 'strength': 83, 'recent_form': 7, 'key_players': ['Serhou Guirassy', 'Julian Brandt', 'Nico Schlotterbeck']},
-    'Sevilla': {'ranking': 16, 'strength': 78, 'recent_form': 5, 'key_players': ['Isaac Romero', 'Loïc Badé', 'Dodi Lukebakio']},
-    'Napoli': {'ranking': 17, 'strength': 82, 'recent_form': 6, 'key_players': ['Khvicha Kvaratskhelia', 'Romelu Lukaku', 'Scott McTominay']},
-    'Villarreal': {'ranking': 18, 'strength': 80, 'recent_form': 4, 'key_players': ['Ayoze Pérez', 'Álex Baena', 'Thierno Barry']},
-    'Brentford': {'ranking': 19, 'strength': 79, 'recent_form': 6, 'key_players': ['Bryan Mbeumo', 'Yoane Wissa', 'Mikkel Damsgaard']},
-    'Everton': {'ranking': 20, 'strength': 77, 'recent_form': 7, 'key_players': ['Dominic Calvert-Lewin', 'Dwight McNeil', 'Jordan Pickford']},
+# Weights of the team score: strength (0-100), recent form (0-10) and ranking (1 is best)
+STRENGTH_WEIGHT = 0.7
+FORM_WEIGHT = 8
+RANKING_BASE = 100
+RANKING_WEIGHT = 2
 
-    # NBA Teams (Ranked by 2025-26 Conference Standings)
-    'Oklahoma City Thunder': {'ranking': 1, 'strength': 96, 'recent_form': 7, 'key_players': ['Shai Gilgeous-Alexander', 'Chet Holmgren', 'Jalen Williams']},
-    'Detroit Pistons': {'ranking': 2, 'strength': 92, 'recent_form': 8, 'key_players': ['Cade Cunningham', 'Jaden Ivey', 'Tobias Harris']},
-    'San Antonio Spurs': {'ranking': 3, 'strength': 90, 'recent_form': 6, 'key_players': ['Victor Wembanyama', 'Chris Paul', 'Devin Vassell']},
-    'Denver Nuggets': {'ranking': 4, 'strength': 91, 'recent_form': 7, 'key_players': ['Nikola Jokić', 'Jamal Murray', 'Aaron Gordon']},
-    'Boston Celtics': {'ranking': 5, 'strength': 94, 'recent_form': 6, 'key_players': ['Jayson Tatum', 'Jaylen Brown', 'Derrick White']},
-    'Toronto Raptors': {'ranking': 6, 'strength': 88, 'recent_form': 6, 'key_players': ['Scottie Barnes', 'RJ Barrett', 'Immanuel Quickley']},
-    'New York Knicks': {'ranking': 7, 'strength': 89, 'recent_form': 4, 'key_players': ['Jalen Brunson', 'Karl-Anthony Towns', 'Josh Hart']},
-    'Houston Rockets': {'ranking': 8, 'strength': 87, 'recent_form': 6, 'key_players': ['Alperen Şengün', 'Jalen Green', 'Fred VanVleet']},
-    'Los Angeles Lakers': {'ranking': 9, 'strength': 86, 'recent_form': 5, 'key_players': ['Anthony Davis', 'LeBron James', 'Austin Reaves']},
-    'Cleveland Cavaliers': {'ranking': 10, 'strength': 87, 'recent_form': 7, 'key_players': ['Donovan Mitchell', 'Evan Mobley', 'Darius Garland']},
-    'Phoenix Suns': {'ranking': 11, 'strength': 88, 'recent_form': 6, 'key_players': ['Kevin Durant', 'Devin Booker', 'Bradley Beal']},
-    'Golden State Warriors': {'ranking': 12, 'strength': 85, 'recent_form': 6, 'key_players': ['Stephen Curry', 'Draymond Green', 'Buddy Hield']},
+# Bump when the prediction logic changes; cached and seeded outcomes are keyed by it
+MODEL_VERSION = "1"
 
-    # NFL Teams (Ranked by 2025-26 Regular Season / Playoff Seeding)
-    'Seattle Seahawks': {'ranking': 1, 'strength': 97, 'recent_form': 10, 'key_players': ['Sam Darnold', 'Kenneth Walker III', 'DK Metcalf']},
-    'Denver Broncos': {'ranking': 2, 'strength': 94, 'recent_form': 8, 'key_players': ['Bo Nix', 'Courtland Sutton', 'Pat Surtain II']},
-    'New England Patriots': {'ranking': 3, 'strength': 95, 'recent_form': 9, 'key_players': ['Drake Maye', 'Rhamondre Stevenson', 'Christian Gonzalez']},
-    'Jacksonville Jaguars': {'ranking': 4, 'strength': 91, 'recent_form': 8, 'key_players': ['Trevor Lawrence', 'Brian Thomas Jr.', 'Josh Hines-Allen']},
-    'Houston Texans': {'ranking': 5, 'strength': 90, 'recent_form': 9, 'key_players': ['C.J. Stroud', 'Nico Collins', 'Will Anderson Jr.']},
-    'San Francisco 49ers': {'ranking': 6, 'strength': 92, 'recent_form': 7, 'key_players': ['Brock Purdy', 'Christian McCaffrey', 'Deebo Samuel']},
-    'Buffalo Bills': {'ranking': 7, 'strength': 93, 'recent_form': 8, 'key_players': ['Josh Allen', 'James Cook', 'Khalil Shakir']},
-    'Chicago Bears': {'ranking': 8, 'strength': 88, 'recent_form': 6, 'key_players': ['Caleb Williams', 'DJ Moore', 'Rome Odunze']},
-    'Philadelphia Eagles': {'ranking': 9, 'strength': 89, 'recent_form': 7, 'key_players': ['Jalen Hurts', 'Saquon Barkley', 'A.J. Brown']},
-    'Pittsburgh Steelers': {'ranking': 10, 'strength': 86, 'recent_form': 6, 'key_players': ['Aaron Rodgers', 'George Pickens', 'T.J. Watt']},
-    'Detroit Lions': {'ranking': 11, 'strength': 87, 'recent_form': 7, 'key_players': ['Jared Goff', 'Amon-Ra St. Brown', 'Jahmyr Gibbs']},
-    'Green Bay Packers': {'ranking': 12, 'strength': 85, 'recent_form': 5, 'key_players': ['Jordan Love', 'Josh Jacobs', 'Jayden Reed']},
-}
+# Number of matchups whose predictions are kept in memory
+PREDICTION_CACHE_SIZE = 4096
+
+# Ratings used for teams missing from the ratings file
+DEFAULT_TEAM = {'ranking': 50, 'strength': 50, 'recent_form': 5, 'key_players': ['Player 1']}
 
 class PredictionEngine:
     """Generates sports match predictions based on team data"""
     
+    # (team1, team2, sport, MODEL_VERSION, ratings version) -> prediction
+    _cache: "OrderedDict[Tuple[str, str, str, str, str], Dict]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    
+    @staticmethod
+    def team_score(team_data: Dict) -> float:
+        """Score a team for the win-probability model (higher is stronger)"""
+        return (team_data['strength'] * STRENGTH_WEIGHT
+                + team_data['recent_form'] * FORM_WEIGHT
+                + (RANKING_BASE - team_data['ranking'] * RANKING_WEIGHT))
+    
+    @staticmethod
+    def current_ratings():
+        """The current RatingsSnapshot"""
+        # Imported here: the ratings module builds on this one's scoring model
+        from .ratings import get_ratings_store
+        return get_ratings_store().snapshot
+    
+    @staticmethod
+    def _cache_key(team1: str, team2: str, sport: str, ratings) -> Tuple[str, str, str, str, str]:
+        return (team1, team2, sport, MODEL_VERSION, ratings.version)
+    
+    @staticmethod
+    def _match_rng(key: Tuple[str, str, str, str, str]) -> random.Random:
+        """Random generator seeded from the matchup key, so a close call always breaks the same way"""
+        digest = hashlib.sha256("|".join(key).encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+    
+    @staticmethod
+    def get_prediction(team1: str, team2: str, sport: str) -> Dict:
+        """
+        Get the prediction for a matchup, generating it on first request.
+        The same teams, sport, model version and ratings always give the same prediction.
+        
+        Returns:
+            A copy of the cached prediction dictionary
+        """
+        # One snapshot for the key and the prediction, even if a reload lands meanwhile
+        ratings = PredictionEngine.current_ratings()
+        key = PredictionEngine._cache_key(team1, team2, sport, ratings)
+        cache = PredictionEngine._cache
+        with PredictionEngine._cache_lock:
+            prediction = cache.get(key)
+            if prediction is not None:
+                cache.move_to_end(key)
+                return dict(prediction)
+        
+        prediction = PredictionEngine.generate_prediction(team1, team2, sport, ratings)
+        with PredictionEngine._cache_lock:
+            cache[key] = prediction
+            cache.move_to_end(key)
+            while len(cache) > PREDICTION_CACHE_SIZE:
+                cache.popitem(last=False)
+        return dict(prediction)
+    
+    @staticmethod
+    def lookup_prediction(team1: str, team2: str, sport: str, ratings_version: str) -> Optional[Dict]:
+        """
+        Get the prediction generated for a matchup under one ratings version,
+        as returned by get_prediction. Never regenerates it: a reload since
+        would grade against different odds than the user was shown.
+        
+        Returns:
+            A copy of the cached prediction, or None if it was never generated or has been evicted
+        """
+        key = (team1, team2, sport, MODEL_VERSION, ratings_version)
+        with PredictionEngine._cache_lock:
+            prediction = PredictionEngine._cache.get(key)
+            if prediction is None:
+                return None
+            PredictionEngine._cache.move_to_end(key)
+            return dict(prediction)
+    
     @staticmethod
-    def generate_prediction(team1: str, team2: str, sport: str) -> Dict:
+    def generate_prediction(team1: str, team2: str, sport: str, ratings=None) -> Dict:
         """
         Generate a prediction for a match between two teams
         
@@ -72,18 +111,22 @@ class PredictionEngine:
             team1: First team name
             team2: Second team name
             sport: Sport type (soccer, nba, nfl)
+            ratings: RatingsSnapshot to use (defaults to the current one)
             
         Returns:
             Prediction dictionary with outcome and explanation
         """
+        ratings = ratings or PredictionEngine.current_ratings()
+        teams = ratings.teams
+        
         # Get team data
-        t1_data = TEAM_RANKINGS.get(team1, {'ranking': 50, 'strength': 50, 'recent_form': 5, 'key_players': ['Player 1']})
-        t2_data = TEAM_RANKINGS.get(team2, {'ranking': 50, 'strength': 50, 'recent_form': 5, 'key_players': ['Player 1']})
+        t1_data = teams.get(team1, DEFAULT_TEAM)
+        t2_data = teams.get(team2, DEFAULT_TEAM)
         
         # Calculate win probability with stronger weighting on ranking and strength
         # Ranking is inverted (1 is best), strength (0-100), recent form (0-10)
-        t1_score = t1_data['strength'] * 0.7 + t1_data['recent_form'] * 8 + (100 - t1_data['ranking'] * 2)
-        t2_score = t2_data['strength'] * 0.7 + t2_data['recent_form'] * 8 + (100 - t2_data['ranking'] * 2)
+        t1_score = PredictionEngine.team_score(t1_data)
+        t2_score = PredictionEngine.team_score(t2_data)
         
         total = t1_score + t2_score
         t1_win_prob = t1_score / total if total > 0 else 0.5
@@ -104,8 +147,9 @@ class PredictionEngine:
             loser = team1
             confidence = min(95, int((1 - t1_win_prob) * 100))
         else:
-            # Close match - use randomness
-            rand = random.random()
+            # Close match - use randomness, seeded by the matchup so it is reproducible
+            key = PredictionEngine._cache_key(team1, team2, sport, ratings)
+            rand = PredictionEngine._match_rng(key).random()
             if rand < t1_win_prob:
                 winner = team1
                 loser = team2
@@ -116,8 +160,8 @@ class PredictionEngine:
                 confidence = int((1 - t1_win_prob) * 100)
         
         # Generate explanation
-        winner_data = TEAM_RANKINGS.get(winner, {})
-        loser_data = TEAM_RANKINGS.get(loser, {})
+        winner_data = teams.get(winner, {})
+        loser_data = teams.get(loser, {})
         winner_strength = winner_data.get('strength', 50)
         loser_strength = loser_data.get('strength', 50)
         
@@ -144,7 +188,9 @@ class PredictionEngine:
             'confidence': confidence,
             'explanation': explanation,
             'winner_strength': winner_strength,
-            'loser_strength': loser_strength
+            'loser_strength': loser_strength,
+            'model_version': MODEL_VERSION,
+            'ratings_version': ratings.version
         }
     
     @staticmethod
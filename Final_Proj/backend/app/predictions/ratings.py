@@ -0,0 +1,268 @@
+"""
+Hot-reloadable team ratings.
+Ratings for the prediction engine and the LLM prediction tool are seeded from
+the versioned data/team_ratings.json into a live copy under data/runtime/,
+which results ingestion rewrites. Each load builds an immutable RatingsSnapshot (the raw
+team data plus its array-backed RatingsTable) and publishes it with a single
+reference swap, so a reader that grabs `store.snapshot` once sees one
+consistent version for its whole request. A watcher thread polls the file's
+mtime and reloads it when it changes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .engine import (DEFAULT_TEAM, STRENGTH_WEIGHT, FORM_WEIGHT, RANKING_BASE,
+                     RANKING_WEIGHT, PredictionEngine)
+
+_DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+# Curated ratings under version control; only ever read
+SEED_RATINGS_PATH = os.path.join(_DATA_DIR, "team_ratings.json")
+# Live ratings the server updates, copied from the seed on first use
+DEFAULT_RATINGS_PATH = os.path.join(_DATA_DIR, "runtime", "team_ratings.json")
+DEFAULT_SCORE = PredictionEngine.team_score(DEFAULT_TEAM)
+
+RATING_FIELDS = ('strength', 'recent_form', 'ranking')
+
+class RatingsTable:
+    """Team ratings compiled into parallel arrays; row i describes team `names[i]`"""
+
+    def __init__(self, rankings: Mapping[str, Dict]):
+        self.names: Tuple[str, ...] = tuple(rankings)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.sports: Tuple[str, ...] = tuple(rankings[name].get('sport', '') for name in self.names)
+
+        self.strength = np.array([rankings[n]['strength'] for n in self.names], dtype=np.float64)
+        self.form = np.array([rankings[n]['recent_form'] for n in self.names], dtype=np.float64)
+        self.ranking = np.array([rankings[n]['ranking'] for n in self.names], dtype=np.float64)
+        # Same formula as PredictionEngine.team_score, for every team at once
+        self.score = (self.strength * STRENGTH_WEIGHT + self.form * FORM_WEIGHT
+                      + (RANKING_BASE - self.ranking * RANKING_WEIGHT))
+
+        # Content hash of the model inputs; changes whenever a rating does
+        digest = hashlib.sha1(json.dumps(
+            [(n, self.sports[i], rankings[n]['strength'], rankings[n]['recent_form'], rankings[n]['ranking'])
+             for i, n in enumerate(self.names)]
+        ).encode()).hexdigest()
+        self.version = digest[:16]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def team_ids(self, sport: Optional[str] = None) -> np.ndarray:
+        """Ids of every team, or of one sport's teams"""
+        if sport is None:
+            return np.arange(len(self.names))
+        return np.array([i for i, s in enumerate(self.sports) if s == sport], dtype=np.intp)
+
+    def scores_for(self, names: Sequence[str]) -> np.ndarray:
+        """Team scores for a list of names; unknown teams get the default rating"""
+        ids = np.array([self.index.get(name, -1) for name in names], dtype=np.intp)
+        # Id -1 picks the default score appended after the last team (also for an empty table)
+        return np.append(self.score, DEFAULT_SCORE)[ids]
+
+    def win_probabilities(self, team1s: Sequence[str], team2s: Sequence[str]) -> np.ndarray:
+        """P(team1 beats team2) for each pair: s1 / (s1 + s2)"""
+        s1 = self.scores_for(team1s)
+        s2 = self.scores_for(team2s)
+        total = s1 + s2
+        return np.divide(s1, total, out=np.full_like(total, 0.5), where=total > 0)
+
+    def probability_matrix(self, sport: str) -> Tuple[List[str], np.ndarray]:
+        """
+        Full matrix for one sport: entry [i, j] is P(team i beats team j).
+
+        Returns:
+            (team names in row order, N x N probability matrix)
+        """
+        ids = self.team_ids(sport)
+        s = self.score[ids]
+        total = s[:, None] + s[None, :]
+        matrix = np.divide(s[:, None], total, out=np.full_like(total, 0.5), where=total > 0)
+        return [self.names[i] for i in ids], matrix
+
+class RatingsSnapshot:
+    """One immutable version of the ratings file"""
+
+    def __init__(self, teams: Dict[str, Dict], version: str):
+        self.teams: Mapping[str, Dict] = MappingProxyType(teams)
+        self.table = RatingsTable(teams)
+        # Hash of the whole file, so key player or stats edits also count as a new version
+        self.version = version
+        self.loaded_at = time.time()
+
+    @classmethod
+    def parse(cls, raw: bytes) -> "RatingsSnapshot":
+        """Build a snapshot from file contents; raises ValueError if a team is missing a rating"""
+        data = json.loads(raw)
+        teams = data.get("teams", {})
+        for name, team in teams.items():
+            for field in RATING_FIELDS:
+                if not isinstance(team.get(field), (int, float)):
+                    raise ValueError(f"Team '{name}' has no numeric '{field}'")
+        return cls(teams, hashlib.sha1(raw).hexdigest()[:16])
+
+def write_ratings_file(path: str, raw: bytes):
+    """Replace a ratings file atomically so a reader never sees it half-written"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.team_ratings.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+def ensure_ratings_file(path: str, seed: str = SEED_RATINGS_PATH):
+    """Create the live ratings file from the seed file if it does not exist yet"""
+    if os.path.exists(path) or not os.path.exists(seed):
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(seed, 'rb') as f:
+        write_ratings_file(path, f.read())
+
+class RatingsStore:
+    def __init__(self, path: str = DEFAULT_RATINGS_PATH, poll_interval: float = 2.0):
+        """
+        Args:
+            path: Ratings JSON file
+            poll_interval: Seconds between mtime checks while watching
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self._mtime = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._snapshot = RatingsSnapshot({}, "")
+        self.load()
+
+    @property
+    def snapshot(self) -> RatingsSnapshot:
+        """The current ratings; hold on to the returned object for a consistent view"""
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def load(self, raw: Optional[bytes] = None, mtime: Optional[int] = None) -> bool:
+        """
+        Parse the ratings file and publish it. A missing or invalid file keeps
+        the current snapshot; a half-written file is picked up on its next write.
+
+        Returns:
+            Whether a new snapshot was published
+        """
+        with self._load_lock:
+            try:
+                if raw is None:
+                    mtime = os.stat(self.path).st_mtime_ns
+                    with open(self.path, 'rb') as f:
+                        raw = f.read()
+            except FileNotFoundError:
+                print(f"Team ratings not found at {self.path}")
+                return False
+
+            # Remember this mtime even if the contents are bad, so the watcher waits for the next write
+            self._mtime = mtime
+            try:
+                snapshot = RatingsSnapshot.parse(raw)
+            except Exception as e:
+                print(f"Error loading team ratings from {self.path}: {e}")
+                return False
+
+            if snapshot.version == self._snapshot.version:
+                return False
+            # A single reference assignment: readers see the old or the new snapshot, never a mix
+            self._snapshot = snapshot
+            print(f"Loaded team ratings version {snapshot.version} ({len(snapshot.teams)} teams)")
+            return True
+
+    def publish(self, teams: Mapping[str, Dict]) -> bool:
+        """
+        Write new ratings to the ratings file and publish them. If the write
+        fails they still go live in memory, and the file catches up on the
+        next publish.
+
+        Returns:
+            Whether a new snapshot was published
+        """
+        raw = (json.dumps({"teams": dict(teams)},
+                          indent=2, ensure_ascii=False) + "\n").encode('utf-8')
+        mtime = self._mtime
+        try:
+            write_ratings_file(self.path, raw)
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            # Keep the old mtime so the watcher does not reload the stale file
+            print(f"Error writing team ratings to {self.path}: {e}")
+        return self.load(raw, mtime)
+
+    def reload(self) -> bool:
+        """Force a re-read of the ratings file"""
+        return self.load()
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the file's mtime has moved; returns whether the ratings changed"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.load()
+
+    def start_watching(self):
+        """Start the background thread that reloads the file when it changes"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="ratings-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self, timeout: float = 5.0):
+        """Stop the watcher thread"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"Error watching team ratings: {e}")
+
+_store: Optional[RatingsStore] = None
+_store_lock = threading.Lock()
+
+def get_ratings_store() -> RatingsStore:
+    """
+    Get the shared ratings store (RATINGS_PATH or data/runtime/team_ratings.json),
+    loading it on first use. A missing ratings file starts as a copy of the seed.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.getenv("RATINGS_PATH", DEFAULT_RATINGS_PATH)
+                ensure_ratings_file(path)
+                _store = RatingsStore(path)
+    return _store
+
+def get_ratings_table() -> RatingsTable:
+    """Get the array-backed table of the current ratings"""
+    return get_ratings_store().snapshot.table
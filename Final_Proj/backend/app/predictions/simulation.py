@@ -0,0 +1,265 @@
+"""
+Monte Carlo season and knockout simulations over one sport's teams.
+Every game uses PredictionEngine's model through the ratings table:
+P(i beats j) = s_i / (s_i + s_j). Simulations run as NumPy arrays of shape
+(simulations, games), are split into fixed-size shards seeded with
+SeedSequence.spawn so results do not depend on the worker count, and large
+runs are spread over a process pool. Results are cached per ratings version.
+"""
+
+import math
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .batch import RatingsTable, get_ratings_table
+
+# League rules per sport: top `playoff_spots` qualify, bottom `relegation_spots` go down
+SPORT_FORMATS = {
+    'soccer': {'playoff_spots': 4, 'relegation_spots': 3},
+    'nba': {'playoff_spots': 6, 'relegation_spots': 0},
+    'nfl': {'playoff_spots': 6, 'relegation_spots': 0},
+}
+SIMULATION_KINDS = ('season', 'knockout')
+
+SHARD_SIZE = 25000  # simulations per shard (and per seed stream)
+CHUNK_SIZE = 5000   # simulations held in memory at once inside a shard
+CACHE_SIZE = 64
+
+# ----- shard workers (top-level so the process pool can pickle them) -----
+
+def _season_shard(n_sims: int, seed: np.random.SeedSequence, matrix: np.ndarray,
+                  playoff_spots: int, relegation_spots: int) -> Dict[str, np.ndarray]:
+    """Simulate n_sims double round-robin seasons; returns per-team finish counts"""
+    rng = np.random.default_rng(seed)
+    n = len(matrix)
+    # Every ordered pair meets once, i.e. home and away against each opponent
+    home, away = np.nonzero(~np.eye(n, dtype=bool))
+    p_home = matrix[home, away]
+
+    title = np.zeros(n, dtype=np.int64)
+    playoff = np.zeros(n, dtype=np.int64)
+    relegation = np.zeros(n, dtype=np.int64)
+    wins_total = np.zeros(n, dtype=np.int64)
+
+    for start in range(0, n_sims, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, n_sims - start)
+        winners = np.where(rng.random((size, len(home))) < p_home, home, away)
+        # Per-simulation win tables in one bincount: offset each row by sim * n
+        wins = np.bincount((winners + np.arange(size)[:, None] * n).ravel(),
+                           minlength=size * n).reshape(size, n)
+        # Jitter below one win breaks ties at random without reordering different totals
+        order = np.argsort(-(wins + rng.random((size, n))), axis=1)
+
+        title += np.bincount(order[:, 0], minlength=n)
+        playoff += np.bincount(order[:, :playoff_spots].ravel(), minlength=n)
+        if relegation_spots:
+            relegation += np.bincount(order[:, n - relegation_spots:].ravel(), minlength=n)
+        wins_total += wins.sum(axis=0)
+
+    return {'title': title, 'playoff': playoff, 'relegation': relegation, 'wins': wins_total}
+
+def _knockout_shard(n_sims: int, seed: np.random.SeedSequence, matrix: np.ndarray,
+                    bracket: np.ndarray) -> Dict[str, np.ndarray]:
+    """Simulate n_sims single-elimination brackets; reached[r] counts teams alive after r rounds"""
+    rng = np.random.default_rng(seed)
+    n = len(matrix)
+    rounds = int(math.log2(len(bracket)))
+    reached = np.zeros((rounds + 1, n), dtype=np.int64)
+
+    for start in range(0, n_sims, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, n_sims - start)
+        alive = np.broadcast_to(bracket, (size, len(bracket)))
+        reached[0] += np.bincount(alive.ravel(), minlength=n)
+        for r in range(rounds):
+            a, b = alive[:, 0::2], alive[:, 1::2]
+            alive = np.where(rng.random(a.shape) < matrix[a, b], a, b)
+            reached[r + 1] += np.bincount(alive.ravel(), minlength=n)
+
+    return {'reached': reached}
+
+def _bracket_order(size: int) -> List[int]:
+    """Seed positions for a bracket of `size` so 1 plays `size`, and 1 and 2 can only meet in the final"""
+    order = [0]
+    while len(order) < size:
+        doubled = len(order) * 2
+        order = [x for seed in order for x in (seed, doubled - 1 - seed)]
+    return order
+
+# ----- process pool -----
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared simulation pool, starting it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the server process runs database and writer threads
+                _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_pool():
+    """Stop the simulation worker processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def _run_shards(worker, n_sims: int, seed: int, *args) -> Dict[str, np.ndarray]:
+    """Split n_sims into SHARD_SIZE shards with independent seed streams and sum their counts"""
+    shard_sizes = [min(SHARD_SIZE, n_sims - start) for start in range(0, n_sims, SHARD_SIZE)]
+    shard_seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+
+    if len(shard_sizes) == 1:
+        # Not worth a round trip to another process
+        results = [worker(shard_sizes[0], shard_seeds[0], *args)]
+    else:
+        pool = get_process_pool()
+        futures = [pool.submit(worker, size, shard_seed, *args)
+                   for size, shard_seed in zip(shard_sizes, shard_seeds)]
+        results = [future.result() for future in futures]
+
+    return {key: sum(result[key] for result in results) for key in results[0]}
+
+# ----- public API -----
+
+def simulate_season(sport: str, n_sims: int = 100000, seed: int = 0,
+                    table: Optional[RatingsTable] = None) -> Dict:
+    """
+    Simulate double round-robin seasons for one sport.
+
+    Args:
+        sport: soccer, nba or nfl
+        n_sims: Number of seasons
+        seed: Random seed; the same seed and ratings always give the same odds
+        table: Ratings to use (defaults to the current table)
+
+    Returns:
+        Title, playoff and relegation odds plus average wins per team, best title odds first
+    """
+    if table is None:
+        table = get_ratings_table()
+    rules = SPORT_FORMATS[sport]
+    teams, matrix = table.probability_matrix(sport)
+    playoff_spots = min(rules['playoff_spots'], len(teams))
+    relegation_spots = min(rules['relegation_spots'], len(teams))
+
+    counts = _run_shards(_season_shard, n_sims, seed, matrix, playoff_spots, relegation_spots)
+    results = [{
+        'team': team,
+        'title_odds': round(float(counts['title'][i]) / n_sims, 4),
+        'playoff_odds': round(float(counts['playoff'][i]) / n_sims, 4),
+        'relegation_odds': round(float(counts['relegation'][i]) / n_sims, 4),
+        'avg_wins': round(float(counts['wins'][i]) / n_sims, 2)
+    } for i, team in enumerate(teams)]
+    results.sort(key=lambda r: (-r['title_odds'], -r['avg_wins']))
+
+    return {
+        'sport': sport,
+        'kind': 'season',
+        'simulations': n_sims,
+        'seed': seed,
+        'ratings_version': table.version,
+        'games_per_team': 2 * (len(teams) - 1),
+        'playoff_spots': playoff_spots,
+        'relegation_spots': relegation_spots,
+        'teams': results
+    }
+
+def simulate_knockout(sport: str, n_sims: int = 100000, seed: int = 0,
+                      table: Optional[RatingsTable] = None) -> Dict:
+    """
+    Simulate single-elimination brackets for one sport. The largest power of two
+    of the sport's teams qualify by team score and are seeded 1 vs N, 2 vs N-1, ...
+
+    Args:
+        sport: soccer, nba or nfl
+        n_sims: Number of tournaments
+        seed: Random seed; the same seed and ratings always give the same odds
+        table: Ratings to use (defaults to the current table)
+
+    Returns:
+        Title, final and semifinal odds per bracket team, best title odds first
+    """
+    if table is None:
+        table = get_ratings_table()
+    teams, matrix = table.probability_matrix(sport)
+    if len(teams) < 2:
+        raise ValueError(f"Not enough {sport} teams for a bracket")
+
+    size = 2 ** int(math.log2(len(teams)))
+    ranked = np.argsort(-table.score[table.team_ids(sport)], kind='stable')[:size]
+    bracket = ranked[_bracket_order(size)]
+
+    counts = _run_shards(_knockout_shard, n_sims, seed, matrix, bracket)
+    reached = counts['reached']
+    rounds = len(reached) - 1
+
+    def odds(round_index: int, team_index: int) -> Optional[float]:
+        if round_index < 1:
+            return None
+        return round(float(reached[round_index][team_index]) / n_sims, 4)
+
+    results = [{
+        'team': teams[i],
+        'seed': seed_number + 1,
+        'title_odds': odds(rounds, i),
+        'final_odds': odds(rounds - 1, i),
+        'semifinal_odds': odds(rounds - 2, i)
+    } for seed_number, i in enumerate(ranked.tolist())]
+    results.sort(key=lambda r: (-r['title_odds'], r['seed']))
+
+    return {
+        'sport': sport,
+        'kind': 'knockout',
+        'simulations': n_sims,
+        'seed': seed,
+        'ratings_version': table.version,
+        'bracket_size': size,
+        'teams': results
+    }
+
+_SIMULATORS = {'season': simulate_season, 'knockout': simulate_knockout}
+_cache: "OrderedDict[Tuple[str, str, str, int, int], Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def simulate(sport: str, kind: str = 'season', n_sims: int = 100000, seed: int = 0) -> Dict:
+    """
+    Run (or reuse) a simulation against the current ratings.
+    Results are cached by (ratings version, sport, kind, simulations, seed), so a
+    repeat request is free until a team rating changes.
+
+    Raises:
+        ValueError: Unknown sport or kind, or a non-positive simulation count
+    """
+    if sport not in SPORT_FORMATS:
+        raise ValueError(f"Unknown sport '{sport}'; expected one of {', '.join(SPORT_FORMATS)}")
+    if kind not in _SIMULATORS:
+        raise ValueError(f"Unknown simulation kind '{kind}'; expected one of {', '.join(SIMULATION_KINDS)}")
+    if n_sims < 1:
+        raise ValueError("n_sims must be positive")
+
+    table = get_ratings_table()
+    key = (table.version, sport, kind, n_sims, seed)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    result = _SIMULATORS[kind](sport, n_sims, seed, table)
+
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
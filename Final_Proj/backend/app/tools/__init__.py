@@ -4,5 +4,6 @@ __init__.py for tools module
 from .quiz_generator import QuizGeneratorTool
 from .prediction_engine import PredictionEngineTool
 from .reward_tracker import FanRewardTrackerTool
+from .quiz_cache import QuizCache
 
-__all__ = ["QuizGeneratorTool", "PredictionEngineTool", "FanRewardTrackerTool"]
+__all__ = ["QuizGeneratorTool", "PredictionEngineTool", "FanRewardTrackerTool", "QuizCache"]
@@ -1,12 +1,18 @@
 """
 Prediction Engine Tool - MCP Tool for predicting game outcomes.
-Uses OpenRouter API with team statistics to make informed predictions.
+Uses OpenRouter API with the team ratings (the same ones results ingestion
+updates) to make informed predictions.
 """
 
-import requests
 import json
-from typing import Dict
+from typing import Dict, Mapping, Optional, Tuple
 from pydantic import BaseModel
+from app.llm.client import LLMClient
+from app.predictions.engine import DEFAULT_TEAM
+from app.predictions.ratings import get_ratings_store
+
+# Typical (winner, loser) final score per sport for the fallback prediction
+TYPICAL_SCORES: Dict[str, Tuple[int, int]] = {"soccer": (2, 1), "nba": (112, 106), "nfl": (24, 20)}
 
 class PredictionResult(BaseModel):
     team1: str
@@ -17,24 +23,16 @@ class PredictionResult(BaseModel):
     confidence: float  # 0.0 to 1.0
 
 class PredictionEngineTool:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, llm: Optional[LLMClient] = None):
         self.api_key = api_key
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
-        
-        # Sample team stats for context (would be fetched from real APIs in production)
-        self.team_stats = {
-            "Los Angeles Lakers": {"avg_points": 115.2, "avg_allowed": 110.5, "win_rate": 0.62},
-            "Boston Celtics": {"avg_points": 116.8, "avg_allowed": 108.3, "win_rate": 0.68},
-            "Golden State Warriors": {"avg_points": 114.5, "avg_allowed": 109.2, "win_rate": 0.59},
-            "Denver Nuggets": {"avg_points": 117.3, "avg_allowed": 111.8, "win_rate": 0.65},
-            "Miami Heat": {"avg_points": 111.2, "avg_allowed": 107.9, "win_rate": 0.58},
-            "New England Patriots": {"avg_points": 26.3, "avg_allowed": 21.5, "win_rate": 0.65},
-            "Dallas Cowboys": {"avg_points": 27.1, "avg_allowed": 22.3, "win_rate": 0.58},
-            "New York Yankees": {"runs_per_game": 4.8, "era": 3.92, "win_rate": 0.56},
-            "Los Angeles Dodgers": {"runs_per_game": 5.2, "era": 3.45, "win_rate": 0.62},
-        }
+        self.llm = llm or LLMClient(api_key)
 
-    def predict_outcome(self, team1: str, team2: str) -> PredictionResult:
+    @property
+    def teams(self) -> Mapping[str, Dict]:
+        """Team ratings for prompt context, from the current ratings snapshot"""
+        return get_ratings_store().snapshot.teams
+
+    async def predict_outcome(self, team1: str, team2: str) -> PredictionResult:
         """
         Predict the outcome of a match between two teams.
         
@@ -46,23 +44,30 @@ class PredictionEngineTool:
             PredictionResult with prediction, score, and explanation
         """
         
-        # Get team stats (or use defaults)
-        stats1 = self.team_stats.get(team1, {"avg_points": 110, "avg_allowed": 110, "win_rate": 0.50})
-        stats2 = self.team_stats.get(team2, {"avg_points": 110, "avg_allowed": 110, "win_rate": 0.50})
+        # Get team ratings (or use defaults) and the rating model's odds from one snapshot
+        ratings = get_ratings_store().snapshot
+        data1 = ratings.teams.get(team1, DEFAULT_TEAM)
+        data2 = ratings.teams.get(team2, DEFAULT_TEAM)
+        sport = data1.get('sport') or data2.get('sport') or ''
+        win_prob = float(ratings.table.win_probabilities([team1], [team2])[0])
         
-        prompt = f"""Predict the outcome of a sports match between {team1} and {team2}.
+        prompt = f"""Predict the outcome of a {sport or 'sports'} match between {team1} and {team2}.
+
+Team 1 ({team1}) ratings:
+- League ranking: {data1['ranking']}
+- Strength (0-100): {data1['strength']}
+- Recent form (0-10): {data1['recent_form']}
+- Key players: {', '.join(data1.get('key_players', [])) or 'N/A'}
 
-Team 1 ({team1}) stats:
-- Average points/goals scored: {stats1.get('avg_points', 'N/A')}
-- Average points/goals allowed: {stats1.get('avg_allowed', 'N/A')}
-- Recent win rate: {stats1.get('win_rate', 0.50) * 100:.1f}%
+Team 2 ({team2}) ratings:
+- League ranking: {data2['ranking']}
+- Strength (0-100): {data2['strength']}
+- Recent form (0-10): {data2['recent_form']}
+- Key players: {', '.join(data2.get('key_players', [])) or 'N/A'}
 
-Team 2 ({team2}) stats:
-- Average points/goals scored: {stats2.get('avg_points', 'N/A')}
-- Average points/goals allowed: {stats2.get('avg_allowed', 'N/A')}
-- Recent win rate: {stats2.get('win_rate', 0.50) * 100:.1f}%
+Our rating model gives {team1} a {win_prob * 100:.1f}% chance of winning.
 
-Based on these stats, provide your prediction in this exact JSON format (no markdown):
+Based on these ratings, provide your prediction in this exact JSON format (no markdown):
 {{
     "predicted_winner": "{team1} or {team2}",
     "predicted_score": "XX-YY",
@@ -74,24 +79,7 @@ The confidence should be between 0.0 and 1.0 based on how clear the prediction i
 """
 
         try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "openrouter/auto",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.5
-                }
-            )
-            
-            if response.status_code != 200:
-                return self._get_default_prediction(team1, team2, stats1, stats2)
-            
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
+            content = await self.llm.complete(prompt, temperature=0.5, timeout=20)
             
             # Parse JSON from response
             prediction_data = json.loads(content)
@@ -107,32 +95,27 @@ The confidence should be between 0.0 and 1.0 based on how clear the prediction i
         
         except Exception as e:
             print(f"Error making prediction: {e}")
-            return self._get_default_prediction(team1, team2, stats1, stats2)
+            return self._get_default_prediction(team1, team2, sport, win_prob)
 
-    def _get_default_prediction(self, team1: str, team2: str, 
-                               stats1: Dict, stats2: Dict) -> PredictionResult:
-        """Generate prediction based on simple stats analysis when API fails"""
-        
-        # Simple logic: team with higher win rate should win
-        team1_strength = stats1.get('win_rate', 0.50) * stats1.get('avg_points', 110)
-        team2_strength = stats2.get('win_rate', 0.50) * stats2.get('avg_points', 110)
+    def _get_default_prediction(self, team1: str, team2: str,
+                                sport: str, win_prob: float) -> PredictionResult:
+        """Generate prediction from the rating model's odds when API fails"""
         
-        if team1_strength > team2_strength:
+        # Simple logic: the rating model's favorite wins by a typical margin
+        winning_score, losing_score = TYPICAL_SCORES.get(sport, TYPICAL_SCORES["soccer"])
+        if win_prob >= 0.5:
             winner = team1
-            team1_score = int(stats1.get('avg_points', 110))
-            team2_score = int(stats2.get('avg_points', 110) - 3)
-            confidence = 0.65
+            team1_score, team2_score = winning_score, losing_score
         else:
             winner = team2
-            team1_score = int(stats1.get('avg_points', 110) - 3)
-            team2_score = int(stats2.get('avg_points', 110))
-            confidence = 0.65
+            team1_score, team2_score = losing_score, winning_score
+        confidence = round(max(win_prob, 1 - win_prob), 2)
         
         return PredictionResult(
             team1=team1,
             team2=team2,
             predicted_winner=winner,
             predicted_score=f"{team1_score}-{team2_score}",
-            explanation=f"{winner} has a stronger offensive record and better recent performance.",
+            explanation=f"{winner} has the stronger ratings and recent form.",
             confidence=confidence
         )
@@ -0,0 +1,153 @@
+"""
+Persistent cache of LLM-generated quizzes, keyed by (team, level).
+Each key keeps a small pool of quiz variants in the generated_quizzes table.
+Variants expire after a TTL, the least recently used are evicted beyond a
+global cap, and a background task tops each requested key back up so most
+quiz requests are served locally instead of waiting on OpenRouter.
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.memory.async_database import AsyncDatabase
+
+class QuizCache:
+    def __init__(self, db: AsyncDatabase, variants_per_key: int = 3,
+                 ttl: float = 7 * 24 * 3600, max_entries: int = 5000,
+                 max_refills: int = 2):
+        """
+        Args:
+            db: Async database whose executor and pool the cache uses
+            variants_per_key: Fresh variants kept per (team, level)
+            ttl: Seconds a generated quiz stays servable
+            max_entries: Total cached quizzes before least recently used are evicted
+            max_refills: Concurrent background refill generations
+        """
+        self.db = db
+        self.variants_per_key = variants_per_key
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_refills = max_refills
+
+        self._refilling: Set[Tuple[str, int]] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._refill_semaphore: Optional[asyncio.Semaphore] = None
+
+    # ----- synchronous SQL, run on the database executor -----
+
+    def _take(self, team: str, level: int) -> Tuple[Optional[List[Dict]], int]:
+        """Pick a random fresh variant and mark it used; returns (questions, fresh variant count)"""
+        now = time.time()
+        conn = self.db.database.get_connection()
+        try:
+            rows = conn.execute('''
+                SELECT id, questions FROM generated_quizzes
+                WHERE team = ? AND level = ? AND created_at > ?
+            ''', (team, level, now - self.ttl)).fetchall()
+            if not rows:
+                return None, 0
+            row = random.choice(rows)
+            conn.execute('''
+                UPDATE generated_quizzes
+                SET last_used = ?, use_count = use_count + 1
+                WHERE id = ?
+            ''', (now, row["id"]))
+            conn.commit()
+            return json.loads(row["questions"]), len(rows)
+        finally:
+            conn.close()
+
+    def _fresh_count(self, team: str, level: int) -> int:
+        conn = self.db.database.get_connection()
+        try:
+            return conn.execute('''
+                SELECT COUNT(*) FROM generated_quizzes
+                WHERE team = ? AND level = ? AND created_at > ?
+            ''', (team, level, time.time() - self.ttl)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def _store(self, team: str, level: int, questions: List[Dict]):
+        """Insert a variant, then expire old ones and enforce the per-key and global caps"""
+        now = time.time()
+        with self.db.database.transaction() as conn:
+            conn.execute('''
+                INSERT INTO generated_quizzes (team, level, questions, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (team, level, json.dumps(questions), now, now))
+
+            conn.execute('DELETE FROM generated_quizzes WHERE created_at <= ?', (now - self.ttl,))
+
+            # Keep only the newest variants for this key
+            conn.execute('''
+                DELETE FROM generated_quizzes
+                WHERE team = ? AND level = ? AND id NOT IN (
+                    SELECT id FROM generated_quizzes
+                    WHERE team = ? AND level = ?
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                )
+            ''', (team, level, team, level, self.variants_per_key))
+
+            # Global cap: evict least recently used
+            excess = conn.execute('SELECT COUNT(*) FROM generated_quizzes').fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute('''
+                    DELETE FROM generated_quizzes WHERE id IN (
+                        SELECT id FROM generated_quizzes ORDER BY last_used ASC LIMIT ?
+                    )
+                ''', (excess,))
+
+    # ----- async API -----
+
+    async def get(self, team: str, level: int) -> Tuple[Optional[List[Dict]], int]:
+        """Get a cached quiz for (team, level); returns (questions or None, fresh variant count)"""
+        return await self.db.run(self._take, team, level)
+
+    async def put(self, team: str, level: int, questions: List[Dict]):
+        """Store a newly generated quiz variant"""
+        await self.db.run(self._store, team, level, questions)
+
+    def schedule_refill(self, team: str, level: int,
+                        generate: Callable[[], Awaitable[Optional[List[Dict]]]]):
+        """
+        Top the key up to variants_per_key fresh variants in the background.
+        At most one refill runs per key, and max_refills run at once.
+        """
+        key = (team, level)
+        if key in self._refilling:
+            return
+        self._refilling.add(key)
+        task = asyncio.create_task(self._refill(team, level, generate))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refill(self, team: str, level: int,
+                      generate: Callable[[], Awaitable[Optional[List[Dict]]]]):
+        if self._refill_semaphore is None:
+            self._refill_semaphore = asyncio.Semaphore(self.max_refills)
+        try:
+            async with self._refill_semaphore:
+                missing = self.variants_per_key - await self.db.run(self._fresh_count, team, level)
+                for _ in range(max(0, missing)):
+                    questions = await generate()
+                    if not questions:
+                        # Upstream is failing; try again on a later request
+                        break
+                    await self.put(team, level, questions)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error refilling quiz cache for {team} level {level}: {e}")
+        finally:
+            self._refilling.discard((team, level))
+
+    async def aclose(self):
+        """Cancel in-flight background refills"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -5,10 +5,13 @@ Generates team-specific questions with difficulty levels 1-10.
 
 import os
 import json
-import requests
+import asyncio
 import random
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
+from app.llm.client import LLMClient
+from app.tools.quiz_cache import QuizCache
 
 class QuizQuestion(BaseModel):
     question: str
@@ -22,9 +25,19 @@ class QuizResult(BaseModel):
     questions: List[QuizQuestion]
 
 class QuizGeneratorTool:
-    def __init__(self, api_key: str):
+    # Fallback question banks, built lazily per team and shared for the process:
+    # team -> level key -> immutable tuple of questions
+    _fallback_banks: Dict[str, Dict[str, Tuple[QuizQuestion, ...]]] = {}
+    _fallback_lock = threading.Lock()
+
+    def __init__(self, api_key: str, llm: Optional[LLMClient] = None,
+                 cache: Optional[QuizCache] = None):
         self.api_key = api_key
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.llm = llm or LLMClient(api_key)
+        # Optional persistent cache of generated quizzes per (team, level)
+        self.cache = cache
+        # (team, level) -> the one API generation in flight for it; concurrent misses share it
+        self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
         
         # All available teams organized by sport
         self.nba_teams = [
@@ -74,7 +87,7 @@ class QuizGeneratorTool:
         self.all_teams = self.nba_teams + self.nfl_teams + self.soccer_teams
 
 
-    def generate_quiz(self, team: str, level: int = 1) -> QuizResult:
+    async def generate_quiz(self, team: str, level: int = 1) -> QuizResult:
         """
         Generate a level-based quiz for a specific team.
         
@@ -98,8 +111,33 @@ class QuizGeneratorTool:
         # Determine number of questions (Level 10 has 7 questions, others have 5)
         num_questions = 7 if level == 10 else 5
         
-        # Try to generate via API first
-        questions = self._generate_via_api(team, level, num_questions)
+        # Serve a cached variant when there is one, topping the pool up in the background
+        if self.cache:
+            # Reading the cache is best effort too; a failure falls through to generation
+            try:
+                cached, fresh = await self.cache.get(team, level)
+            except Exception as e:
+                print(f"Error reading cached quiz for {team} level {level}: {e}")
+                cached, fresh = None, 0
+            if cached:
+                if fresh < self.cache.variants_per_key:
+                    self._schedule_refill(team, level, num_questions)
+                return QuizResult(
+                    team=team,
+                    level=level,
+                    questions=[QuizQuestion(**q) for q in cached]
+                )
+        
+        # Try to generate via API first, joining a generation already running for this key
+        key = (team, level)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate_and_cache(team, level, num_questions))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so a cancelled request does not cancel the generation others are waiting on
+        questions = await asyncio.shield(task)
+        questions = list(questions) if questions else None
         
         # Fallback to predefined questions if API fails
         if not questions:
@@ -111,6 +149,27 @@ class QuizGeneratorTool:
             questions=questions
         )
 
+    async def _generate_and_cache(self, team: str, level: int, num_questions: int) -> Optional[List[QuizQuestion]]:
+        """Generate a quiz via the API and store it as a cache variant"""
+        questions = await self._generate_via_api(team, level, num_questions)
+        
+        if questions and self.cache:
+            # Caching is best effort; the quiz is generated either way
+            try:
+                await self.cache.put(team, level, [q.model_dump() for q in questions])
+                self._schedule_refill(team, level, num_questions)
+            except Exception as e:
+                print(f"Error caching quiz for {team} level {level}: {e}")
+        return questions
+
+    def _schedule_refill(self, team: str, level: int, num_questions: int):
+        """Generate more variants for the cache without blocking the request"""
+        async def generate():
+            questions = await self._generate_via_api(team, level, num_questions)
+            return [q.model_dump() for q in questions] if questions else None
+        
+        self.cache.schedule_refill(team, level, generate)
+
     def _find_closest_team(self, team: str) -> str:
         """Find the closest matching team name"""
         team_lower = team.lower()
@@ -120,7 +179,7 @@ class QuizGeneratorTool:
         # Default to Lakers if no match found
         return "Los Angeles Lakers"
 
-    def _generate_via_api(self, team: str, level: int, num_questions: int) -> List[QuizQuestion]:
+    async def _generate_via_api(self, team: str, level: int, num_questions: int) -> List[QuizQuestion]:
         """Generate questions using OpenRouter API"""
         
         # Define difficulty description based on level
@@ -171,26 +230,7 @@ Make sure:
 """
 
         try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "openrouter/auto",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7,
-                    "max_tokens": 2000
-                },
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                return None
-            
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
+            content = await self.llm.complete(prompt, temperature=0.7, max_tokens=2000, timeout=30)
             
             # Parse JSON from response
             quiz_data = json.loads(content)
@@ -211,15 +251,12 @@ Make sure:
         This ensures NO cross-team questions ever appear.
         """
         
-        # Comprehensive team-specific question database
-        team_databases = self._build_team_databases()
-        
-        # Get questions for this specific team
-        if team in team_databases:
-            team_data = team_databases[team]
+        # Only this team's bank is built, once per process
+        if team in self.all_teams:
+            team_data = self._get_team_bank(team)
         else:
             # Default to Lakers if team not found - should never happen due to find_closest_team
-            team_data = team_databases.get("Los Angeles Lakers", {})
+            team_data = self._get_team_bank("Los Angeles Lakers")
         
         # Get questions for this level
         level_key = f"level_{level}"
@@ -227,31 +264,33 @@ Make sure:
             available_questions = team_data[level_key]
         else:
             # Fallback to level 1 if level not found
-            available_questions = team_data.get("level_1", [])
+            available_questions = team_data.get("level_1", ())
         
-        # Shuffle and select the required number of questions
-        shuffled = available_questions.copy()
-        random.shuffle(shuffled)
-        questions = shuffled[:num_questions]
+        # Randomly select the required number of questions
+        return random.sample(available_questions, min(num_questions, len(available_questions)))
+
+    def _get_team_bank(self, team: str) -> Dict[str, Tuple[QuizQuestion, ...]]:
+        """Get a team's fallback question bank, building it on first use"""
+        bank = self._fallback_banks.get(team)
+        if bank is not None:
+            return bank
         
-        return questions
+        with self._fallback_lock:
+            bank = self._fallback_banks.get(team)
+            if bank is None:
+                if team == "Los Angeles Lakers":
+                    levels = self._build_lakers_questions()
+                elif team == "Boston Celtics":
+                    levels = self._build_celtics_questions()
+                else:
+                    levels = self._build_generic_team_questions(team)
+                bank = {level_key: tuple(questions) for level_key, questions in levels.items()}
+                self._fallback_banks[team] = bank
+        return bank
 
     def _build_team_databases(self) -> Dict[str, Dict]:
         """Build the complete team-specific question database"""
-        
-        # For brevity, showing sample structure - in production this would be much larger
-        databases = {}
-        
-        # NBA Teams - Example for Lakers
-        databases["Los Angeles Lakers"] = self._build_lakers_questions()
-        databases["Boston Celtics"] = self._build_celtics_questions()
-        
-        # For all other teams, create basic fallback questions
-        for team in self.all_teams:
-            if team not in databases:
-                databases[team] = self._build_generic_team_questions(team)
-        
-        return databases
+        return {team: self._get_team_bank(team) for team in self.all_teams}
 
     def _build_lakers_questions(self) -> Dict:
         """Build Lakers-specific questions for all 10 levels"""
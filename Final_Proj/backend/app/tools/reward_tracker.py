@@ -3,7 +3,7 @@ Fan Reward Tracker Tool - MCP Tool for tracking points, badges, and leaderboard.
 This tool does NOT use the LLM - it directly updates user data based on actions.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.memory.database import Database
 
 class RewardConfig:
@@ -17,20 +17,118 @@ class RewardConfig:
     PREDICTION_CLOSE = 25  # Within 5 points
     FIRST_PREDICTION = 10
     
+    # Each badge is earned when its counter reaches the threshold
+    # ("at_least", the default) or drops to it ("at_most", for ranks)
     BADGES = {
-        "quiz_master": "Completed 10 quizzes",
-        "prediction_pro": "Made 10 accurate predictions",
-        "points_collector": "Earned 1000 points",
-        "perfect_quiz": "Scored 100% on a quiz",
-        "leaderboard_top_10": "Ranked in top 10",
-        "early_adopter": "First 100 users"
+        "quiz_master": {
+            "description": "Completed 10 quizzes",
+            "counter": "quizzes_completed",
+            "threshold": 10
+        },
+        "prediction_pro": {
+            "description": "Made 10 accurate predictions",
+            "counter": "correct_predictions",
+            "threshold": 10
+        },
+        "points_collector": {
+            "description": "Earned 1000 points",
+            "counter": "total_points",
+            "threshold": 1000
+        },
+        "perfect_quiz": {
+            "description": "Scored 100% on a quiz",
+            "counter": "perfect_quizzes",
+            "threshold": 1
+        },
+        "leaderboard_top_10": {
+            "description": "Ranked in top 10",
+            "counter": "leaderboard_rank",
+            "threshold": 10,
+            "compare": "at_most"
+        },
+        "early_adopter": {
+            "description": "First 100 users",
+            "counter": "signup_number",
+            "threshold": 100,
+            "compare": "at_most"
+        }
     }
 
+class BadgeEngine:
+    """
+    Evaluates badge rules against counter updates.
+    Rules are indexed by counter, so a write only checks the badges that
+    depend on the counters it changed, and a rule fires only on the update
+    that crosses its threshold.
+    """
+
+    def __init__(self, db: Database, badges: Dict[str, Dict]):
+        self.db = db
+        self._rules: Dict[str, List[Tuple[str, Dict]]] = {}
+        for badge, rule in badges.items():
+            self._rules.setdefault(rule["counter"], []).append((badge, rule))
+
+    @staticmethod
+    def _met(rule: Dict, value: int) -> bool:
+        if rule.get("compare", "at_least") == "at_most":
+            return value <= rule["threshold"]
+        return value >= rule["threshold"]
+
+    def evaluate(self, user_id: str, changed: Dict[str, Tuple[Optional[int], int]]) -> List[str]:
+        """
+        Award every badge whose counter just crossed into its rule.
+        
+        Args:
+            user_id: User ID
+            changed: (old, new) values of the counters that just changed;
+                an old value of None means it is unknown, so a met rule fires
+        
+        Returns:
+            Badges newly awarded by this update
+        """
+        earned = []
+        for counter, (old, new) in changed.items():
+            for badge, rule in self._rules.get(counter, ()):
+                if new is None or not self._met(rule, new):
+                    continue
+                if old is not None and self._met(rule, old):
+                    # Met before this update, so already awarded
+                    continue
+                if self.db.add_badge(user_id, badge):
+                    earned.append(badge)
+        return earned
+
 class FanRewardTrackerTool:
     def __init__(self, db: Database):
         """Initialize with database connection"""
         self.db = db
         self.config = RewardConfig()
+        self.badge_engine = BadgeEngine(db, self.config.BADGES)
+
+    def award_badges(self, user_id: str, counters: Dict[str, Tuple[Optional[int], int]]) -> List[str]:
+        """
+        Evaluate badge rules for counters changed by a write, as (old, new)
+        pairs (as returned by Database.create_user / record_quiz_submission /
+        save_prediction).
+        
+        Returns:
+            Badges newly awarded
+        """
+        if "total_points" in counters:
+            # Points moved, so the user's rank may have too
+            old_points = counters["total_points"][0]
+            rank = self.db.leaderboard.rank(user_id)
+            if rank is not None:
+                old_rank = self.db.leaderboard.rank_at(user_id, old_points) if old_points is not None else None
+                counters = {**counters, "leaderboard_rank": (old_rank, rank)}
+        return self.badge_engine.evaluate(user_id, counters)
+
+    def _award_points(self, user_id: str, points: int) -> Tuple[Optional[int], List[str]]:
+        """Add points and evaluate the rules on total_points; returns (new total, badges earned)"""
+        total_points = self.db.update_user_points(user_id, points)
+        if total_points is None:
+            return None, []
+        return total_points, self.award_badges(user_id, {"total_points": (total_points - points, total_points)})
 
     def add_quiz_points(self, user_id: str, difficulty: str, score_percentage: float) -> Dict:
         """
@@ -47,30 +145,19 @@ class FanRewardTrackerTool:
         # Calculate base points by difficulty
         base_points = self.config.QUIZ_POINTS.get(difficulty, 25)
         
-        # Bonus for perfect score
         if score_percentage == 100:
             points = base_points * 2  # Double points for perfect
-            self.db.add_badge(user_id, "perfect_quiz")
-            badges_earned = ["perfect_quiz"]
         else:
             # Scale points by performance
             points = int(base_points * (score_percentage / 100))
-            badges_earned = []
         
-        # Award points
-        self.db.update_user_points(user_id, points)
-        
-        # Check for quiz master badge (10 quizzes)
-        history = self.db.get_user_quiz_history(user_id)
-        if len(history) >= 10:
-            self.db.add_badge(user_id, "quiz_master")
-            if "quiz_master" not in badges_earned:
-                badges_earned.append("quiz_master")
+        # Award points; quiz counters and their badges move when the attempt is stored
+        total_points, badges_earned = self._award_points(user_id, points)
         
         return {
             "points_awarded": points,
             "badges_earned": badges_earned,
-            "total_user_points": self.db.get_user(user_id)["total_points"]
+            "total_user_points": total_points or 0
         }
 
     def add_prediction_points(self, user_id: str, is_correct: bool, 
@@ -86,35 +173,20 @@ class FanRewardTrackerTool:
         Returns:
             Dictionary with points awarded and badges earned
         """
-        points = 0
-        badges_earned = []
-        
         if is_correct:
             points = self.config.PREDICTION_CORRECT
-            badges_earned.append("prediction_pro")
         elif is_close:
             points = self.config.PREDICTION_CLOSE
         else:
             points = self.config.FIRST_PREDICTION  # Minimum points for participation
         
         # Award points
-        self.db.update_user_points(user_id, points)
-        
-        # Add badges
-        for badge in badges_earned:
-            self.db.add_badge(user_id, badge)
-        
-        # Check for points collector badge (1000 points)
-        user = self.db.get_user(user_id)
-        if user["total_points"] >= 1000:
-            self.db.add_badge(user_id, "points_collector")
-            if "points_collector" not in badges_earned:
-                badges_earned.append("points_collector")
+        total_points, badges_earned = self._award_points(user_id, points)
         
         return {
             "points_awarded": points,
             "badges_earned": badges_earned,
-            "total_user_points": user["total_points"] + points
+            "total_user_points": total_points or 0
         }
 
     def get_user_stats(self, user_id: str) -> Dict:
@@ -123,16 +195,10 @@ class FanRewardTrackerTool:
         if not user:
             return {"error": "User not found"}
         
-        quiz_history = self.db.get_user_quiz_history(user_id)
-        predictions = self.db.get_user_predictions(user_id)
-        leaderboard = self.db.get_leaderboard(100)
+        summary = self.db.get_user_summary(user_id)
         
-        # Find user rank
-        user_rank = None
-        for entry in leaderboard:
-            if entry["user_id"] == user_id:
-                user_rank = entry["rank"]
-                break
+        # Exact rank from the in-memory leaderboard
+        user_rank = self.db.leaderboard.rank(user_id)
         
         return {
             "user_id": user_id,
@@ -140,28 +206,24 @@ class FanRewardTrackerTool:
             "favorite_team": user["favorite_team"],
             "total_points": user["total_points"],
             "badges": user["badges"],
-            "quiz_count": len(quiz_history),
-            "prediction_count": len(predictions),
-            "avg_quiz_score": self._calculate_avg_quiz_score(quiz_history),
+            "quiz_count": summary["quiz_count"],
+            "prediction_count": summary["prediction_count"],
+            "avg_quiz_score": summary["avg_quiz_score"],
             "leaderboard_rank": user_rank,
             "created_at": user["created_at"]
         }
 
-    def _calculate_avg_quiz_score(self, quiz_history: List[Dict]) -> float:
-        """Calculate average quiz score"""
-        if not quiz_history:
-            return 0.0
-        return sum(q["score"] for q in quiz_history) / len(quiz_history)
-
     def get_leaderboard(self, limit: int = 10) -> List[Dict]:
         """Get leaderboard data"""
         return self.db.get_leaderboard(limit)
 
     def check_and_award_leaderboard_badge(self, user_id: str) -> Optional[str]:
         """Check if user qualifies for leaderboard badge and award if so"""
-        leaderboard = self.db.get_leaderboard(10)
-        for entry in leaderboard:
-            if entry["user_id"] == user_id:
-                self.db.add_badge(user_id, "leaderboard_top_10")
-                return "leaderboard_top_10"
+        user_rank = self.db.leaderboard.rank(user_id)
+        if user_rank is None:
+            return None
+        # No earlier rank to compare against; add_badge ignores a badge already held
+        self.badge_engine.evaluate(user_id, {"leaderboard_rank": (None, user_rank)})
+        if user_rank <= self.config.BADGES["leaderboard_top_10"]["threshold"]:
+            return "leaderboard_top_10"
         return None
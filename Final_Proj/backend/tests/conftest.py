@@ -0,0 +1,36 @@
+"""
+Shared pytest setup: make the backend `app` package importable as in main.py.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+ADMIN_TOKEN = "test-admin-token"
+
+@pytest.fixture
+def anyio_backend():
+    """Run async tests on asyncio, the loop uvicorn serves the app on"""
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def main(tmp_path_factory):
+    """Import app.main once against a throwaway database and ratings file"""
+    data = tmp_path_factory.mktemp("app")
+    os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
+    os.environ["DATABASE_PATH"] = str(data / "app.db")
+    os.environ["RATINGS_PATH"] = str(data / "team_ratings.json")
+    os.environ["QUESTIONS_PATH"] = os.path.join(DATA_DIR, "questions.json")
+    os.environ["ADMIN_TOKEN"] = ADMIN_TOKEN
+    import app.main as main
+    yield main
+    main.adb.close()
+
+@pytest.fixture
+def admin_headers():
+    """Headers that pass the admin endpoints' token check"""
+    return {"X-Admin-Token": ADMIN_TOKEN}
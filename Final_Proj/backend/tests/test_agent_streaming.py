@@ -0,0 +1,59 @@
+"""
+The streaming chat endpoint classifies and answers with one streamed LLM call.
+"""
+
+import pytest
+
+from app.agent.agent import Agent
+
+class StreamingLLM:
+    """Streams a canned response in small chunks and counts calls"""
+
+    def __init__(self, response: str):
+        self.response = response
+        self.calls = 0
+        self.closed = False
+
+    async def complete(self, prompt, **kwargs):
+        self.calls += 1
+        raise AssertionError("stream_message should not make a blocking call")
+
+    async def stream(self, prompt, **kwargs):
+        self.calls += 1
+        try:
+            for start in range(0, len(self.response), 5):
+                yield self.response[start:start + 5]
+        finally:
+            self.closed = True
+
+async def _events(main, response: str, message: str):
+    llm = StreamingLLM(response)
+    agent = Agent("test-key", main.adb, llm=llm)
+    return llm, [event async for event in agent.stream_message("stream_user", message)]
+
+@pytest.mark.anyio
+async def test_chat_streams_from_the_fused_call(main):
+    llm, events = await _events(
+        main, '{"action": "chat", "extracted_params": {}}\nThe Lakers have 17 titles.',
+        "How many titles do the Lakers have?")
+    assert llm.calls == 1
+    tokens = "".join(e["delta"] for e in events if e["event"] == "token")
+    assert tokens == "The Lakers have 17 titles."
+    assert events[-1]["event"] == "done"
+    assert events[-1]["action"] == "chat"
+    assert events[-1]["response"] == tokens
+
+@pytest.mark.anyio
+async def test_tool_action_stops_the_stream(main):
+    llm, events = await _events(
+        main, '{"action": "stats", "extracted_params": {}}\nignored text that is never read',
+        "How am I doing overall?")
+    assert llm.calls == 1 and llm.closed
+    assert [e["event"] for e in events] == ["done"]
+    assert events[0]["tool_used"] == "stats"
+
+@pytest.mark.anyio
+async def test_missing_decision_line_is_treated_as_the_reply(main):
+    llm, events = await _events(main, "Great question! Messi is the GOAT.", "Who is the best player ever?")
+    assert llm.calls == 1
+    assert events[-1]["response"] == "Great question! Messi is the GOAT."
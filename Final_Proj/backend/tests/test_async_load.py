@@ -0,0 +1,113 @@
+"""
+Load test for the async database layer: mixed concurrent reads and writes go
+through the full FastAPI app over httpx's ASGI transport, and profile reads are
+compared with the old blocking path while a slow write is in flight.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+USERS = 20
+REQUESTS = 300
+SLOW_WRITE = 0.5  # seconds a stalled prediction write holds its worker
+READERS = 20
+
+def _client(main) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+async def _create_users(client, prefix: str, count: int):
+    for i in range(count):
+        r = await client.post("/api/user/create", json={"user_id": f"{prefix}{i}", "username": f"{prefix}{i}"})
+        assert r.status_code == 200
+
+def _quiz_payload(main, user_id: str):
+    """Two real Arsenal questions, both answered correctly"""
+    questions = main.question_bank.get_questions("Arsenal", "Easy")[:2]
+    answers = {str(i): q["options"][q["correctAnswerIndex"]] for i, q in enumerate(questions)}
+    return {"user_id": user_id, "team": "Arsenal", "level": "Easy", "answers": answers, "questions": questions}
+
+@pytest.mark.anyio
+async def test_mixed_read_write_load(main):
+    """Concurrent profile reads, quiz submits and prediction submits all succeed and stay consistent"""
+    async with _client(main) as client:
+        await _create_users(client, "load", USERS)
+
+        def request(i: int):
+            user_id = f"load{i % USERS}"
+            kind = i % 3
+            if kind == 0:
+                return client.get(f"/api/user/{user_id}?history_limit=5")
+            if kind == 1:
+                return client.post("/api/quiz/submit", json=_quiz_payload(main, user_id))
+            return client.post("/api/predictions/submit", json={
+                "user_id": user_id, "team1": "Arsenal", "team2": "Chelsea",
+                "sport": "soccer", "user_prediction": "Arsenal"
+            })
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(request(i) for i in range(REQUESTS)))
+        elapsed = time.perf_counter() - start
+        print(f"\n{REQUESTS} mixed requests in {elapsed:.2f}s ({REQUESTS / elapsed:.0f} req/s)")
+
+        assert [r.status_code for r in responses] == [200] * REQUESTS
+        # Every points write landed once, in both the users table and the leaderboard
+        for i in range(USERS):
+            user_id = f"load{i}"
+            profile = (await client.get(f"/api/user/{user_id}")).json()
+            assert profile["total_points"] == main.db.leaderboard.around(user_id, radius=0)[0]["points"]
+            assert profile["quiz_count"] > 0
+
+async def _reads_during_slow_write(main, client, user_id: str):
+    """
+    Start one stalled prediction write, then READERS profile reads.
+
+    Returns:
+        (seconds until the write finished, seconds until the last read finished)
+    """
+    start = time.perf_counter()
+
+    async def write():
+        r = await client.post("/api/predictions/submit", json={
+            "user_id": user_id, "team1": "Arsenal", "team2": "Chelsea",
+            "sport": "soccer", "user_prediction": "Arsenal"
+        })
+        assert r.status_code == 200
+        return time.perf_counter() - start
+
+    async def reads():
+        await asyncio.sleep(0.05)  # let the write take its worker first
+        rs = await asyncio.gather(*(client.get(f"/api/user/{user_id}") for _ in range(READERS)))
+        assert all(r.status_code == 200 for r in rs)
+        return time.perf_counter() - start
+
+    return await asyncio.gather(write(), reads())
+
+@pytest.mark.anyio
+async def test_reads_not_serialized_behind_slow_write(main, monkeypatch):
+    """Profile reads finish while a slow write is running, unlike the old blocking path"""
+    save_prediction = main.db.save_prediction
+
+    def slow_save_prediction(*args, **kwargs):
+        time.sleep(SLOW_WRITE)
+        return save_prediction(*args, **kwargs)
+
+    monkeypatch.setattr(main.db, "save_prediction", slow_save_prediction)
+
+    async with _client(main) as client:
+        await _create_users(client, "slow", 1)
+
+        write_done, reads_done = await _reads_during_slow_write(main, client, "slow0")
+        print(f"\nexecutor path: write {write_done:.2f}s, {READERS} reads done at {reads_done:.2f}s")
+        assert reads_done < write_done
+
+        # The old path: database calls ran inline on the event loop
+        async def blocking_run(fn, *args, **kwargs):
+            return fn(*args, **kwargs)
+
+        monkeypatch.setattr(main.adb, "run", blocking_run)
+        write_done, reads_done = await _reads_during_slow_write(main, client, "slow0")
+        print(f"blocking path: write {write_done:.2f}s, {READERS} reads done at {reads_done:.2f}s")
+        assert reads_done >= write_done
@@ -0,0 +1,30 @@
+"""
+Badge rules fire once, on the write that crosses their threshold.
+"""
+
+from app.memory.database import Database
+from app.tools.reward_tracker import FanRewardTrackerTool
+
+def test_badges_fire_on_threshold_crossing(tmp_path):
+    db = Database(str(tmp_path / "badges.db"), pool_size=1)
+    try:
+        rewards = FanRewardTrackerTool(db)
+        awarded = []
+        add_badge = db.add_badge
+        db.add_badge = lambda user_id, badge: awarded.append(badge) or add_badge(user_id, badge)
+
+        created = db.create_user("u1", "alice")
+        assert created["counters"]["signup_number"] == (None, 1)
+        assert set(rewards.award_badges("u1", created["counters"])) == {"early_adopter", "leaderboard_top_10"}
+
+        for _ in range(10):
+            result = rewards.add_quiz_points("u1", "hard", 100)
+        assert result["total_user_points"] == 1000
+        assert result["badges_earned"] == ["points_collector"]
+
+        rewards.add_prediction_points("u1", True)
+        # Each badge was written once, not again on every later write
+        assert sorted(awarded) == ["early_adopter", "leaderboard_top_10", "points_collector"]
+        assert set(db.get_user("u1")["badges"]) == set(awarded)
+    finally:
+        db.close()
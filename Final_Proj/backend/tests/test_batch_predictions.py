@@ -0,0 +1,30 @@
+"""
+Batch predictions pick the same favorite, with the same confidence, as the
+single-match PredictionEngine.
+"""
+
+import itertools
+
+from app.predictions.batch import predict_batch
+from app.predictions.engine import PredictionEngine
+from app.predictions.ratings import SEED_RATINGS_PATH, RatingsSnapshot
+
+def test_batch_matches_engine():
+    with open(SEED_RATINGS_PATH, "rb") as f:
+        ratings = RatingsSnapshot.parse(f.read())
+    table = ratings.table
+    close = 0
+    for sport in ("soccer", "nba", "nfl"):
+        teams = [table.names[i] for i in table.team_ids(sport)]
+        matchups = list(itertools.permutations(teams, 2)) + [(teams[0], "Unknown FC")]
+        for batch in predict_batch(matchups, sport, ratings):
+            single = PredictionEngine.generate_prediction(batch['team1'], batch['team2'], sport, ratings)
+            assert batch['favorite'] == single['predicted_winner']
+            assert batch['confidence'] == single['confidence']
+            close += 0.4 <= batch['team1_win_prob'] <= 0.6
+    assert close > 0
+
+def test_empty_table_is_not_replaced():
+    empty = RatingsSnapshot({}, "empty")
+    result = predict_batch([("A", "B")], "soccer", empty)
+    assert result[0]['team1_win_prob'] == 0.5
@@ -0,0 +1,105 @@
+"""
+LLMClient against httpx.MockTransport: retries on rate limiting and upstream
+errors, the concurrency limit, and reassembling streamed deltas.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.llm.client import LLMClient, LLMError
+
+def _completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+def _client(handler, **kwargs) -> LLMClient:
+    kwargs.setdefault("backoff_base", 0)
+    return LLMClient("test-key", base_url="http://llm.test/v1/chat/completions",
+                     transport=httpx.MockTransport(handler), **kwargs)
+
+@pytest.mark.anyio
+async def test_retries_rate_limits_and_server_errors():
+    statuses = [429, 503]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if statuses:
+            return httpx.Response(statuses.pop(0))
+        return _completion("Go Celtics")
+
+    llm = _client(handler)
+    try:
+        assert await llm.complete("Who wins?") == "Go Celtics"
+        assert len(requests) == 3
+        assert requests[0].headers["Authorization"] == "Bearer test-key"
+        assert json.loads(requests[0].content)["messages"] == [{"role": "user", "content": "Who wins?"}]
+
+        # Out of retries: the last status is reported
+        statuses.extend([500, 502, 504])
+        with pytest.raises(LLMError, match="504"):
+            await llm.complete("Who wins?")
+        # Client errors are not retried
+        requests.clear()
+        statuses.append(401)
+        with pytest.raises(LLMError, match="401"):
+            await llm.complete("Who wins?")
+        assert len(requests) == 1
+    finally:
+        await llm.aclose()
+
+@pytest.mark.anyio
+async def test_concurrency_limit():
+    in_flight = peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _completion("ok")
+
+    llm = _client(handler, max_concurrency=3)
+    try:
+        replies = await asyncio.gather(*(llm.complete(f"q{i}") for i in range(12)))
+        assert replies == ["ok"] * 12
+        assert peak == 3
+    finally:
+        await llm.aclose()
+
+@pytest.mark.anyio
+async def test_stream_reassembles_chunked_events():
+    events = [
+        ": keep-alive",
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        'data: {"choices": [{"delta": {"content": "Lakers "}}]}',
+        "data: not json",
+        'data: {"choices": [{"delta": {"content": "by 7"}}]}',
+        "data: [DONE]",
+        'data: {"choices": [{"delta": {"content": "ignored"}}]}',
+    ]
+    body = "".join(event + "\n\n" for event in events).encode()
+    attempts = []
+
+    async def chunks():
+        # Split the body at awkward points, mid-line and mid-JSON
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(json.loads(request.content))
+        if len(attempts) == 1:
+            return httpx.Response(429)
+        return httpx.Response(200, content=chunks(), headers={"Content-Type": "text/event-stream"})
+
+    llm = _client(handler)
+    try:
+        deltas = [delta async for delta in llm.stream("Who wins?")]
+        assert deltas == ["Lakers ", "by 7"]
+        assert len(attempts) == 2
+        assert attempts[1]["stream"] is True
+    finally:
+        await llm.aclose()
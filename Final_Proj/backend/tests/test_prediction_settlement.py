@@ -0,0 +1,48 @@
+"""
+Predictions submitted from the web UI stay pending until a real result is
+ingested, which settles them and awards their points.
+"""
+
+import httpx
+import pytest
+
+def _client(main) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+@pytest.mark.anyio
+async def test_submitted_prediction_settles_on_ingest(main, admin_headers):
+    async with _client(main) as client:
+        picks = {"settle_right": "Everton", "settle_wrong": "Brentford"}
+        for user_id, pick in picks.items():
+            r = await client.post("/api/user/create", json={"user_id": user_id, "username": user_id})
+            assert r.status_code == 200
+            r = await client.post("/api/predictions/submit", json={
+                "user_id": user_id, "team1": "Everton", "team2": "Brentford",
+                "sport": "soccer", "user_prediction": pick
+            })
+            assert r.status_code == 200
+            assert r.json()["result"]["status"] == "pending"
+            assert r.json()["points_earned"] == 0
+
+        result = {
+            "home": "Everton", "away": "Brentford", "home_score": 2, "away_score": 1,
+            "sport": "soccer", "played_at": "2099-01-01T15:00:00Z"
+        }
+        r = await client.post("/api/results/ingest", json={"results": [result]})
+        assert r.status_code == 403
+        r = await client.post("/api/results/ingest", json={"results": [result]}, headers=admin_headers)
+        assert r.status_code == 200
+        assert r.json()["applied"] == 1
+        assert r.json()["resolved_predictions"] >= 2
+
+        right = (await client.get("/api/user/settle_right")).json()
+        wrong = (await client.get("/api/user/settle_wrong")).json()
+        assert right["total_points"] == 30
+        assert wrong["total_points"] == 0
+
+        stats = (await client.get("/api/predictions/stats/settle_right")).json()["stats"]
+        assert stats["total_predictions"] == 1
+        assert stats["correct_predictions"] == 1
+        history = (await client.get("/api/user/settle_right/history/predictions")).json()["prediction_history"]
+        assert history[0]["system_outcome"] == "Everton"
+        assert history[0]["is_correct"] is True
@@ -0,0 +1,48 @@
+"""
+The LLM prediction tool reads the same team ratings that results ingestion
+updates, so its prompt follows rating changes.
+"""
+
+import json
+
+import pytest
+
+from app.predictions.ratings import get_ratings_store
+from app.tools.prediction_engine import PredictionEngineTool
+
+class PromptLLM:
+    def __init__(self, reply=None):
+        self.reply = reply
+        self.prompts = []
+
+    async def complete(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.reply is None:
+            raise RuntimeError("LLM unavailable")
+        return json.dumps(self.reply)
+
+@pytest.mark.anyio
+async def test_prompt_uses_current_ratings(main):
+    store = get_ratings_store()
+    original = dict(store.snapshot.teams)
+    teams = {name: dict(data) for name, data in original.items()}
+    teams["Everton"]["strength"] = 99
+    store.publish(teams)
+    try:
+        llm = PromptLLM({"predicted_winner": "Everton", "predicted_score": "2-0",
+                         "explanation": "In form", "confidence": 0.7})
+        result = await PredictionEngineTool("test-key", llm).predict_outcome("Everton", "Brentford")
+        assert result.predicted_winner == "Everton"
+        assert "Strength (0-100): 99" in llm.prompts[0]
+        assert "soccer match" in llm.prompts[0]
+    finally:
+        store.publish(original)
+
+@pytest.mark.anyio
+async def test_fallback_follows_rating_model(main):
+    tool = PredictionEngineTool("test-key", PromptLLM())
+    result = await tool.predict_outcome("Boston Celtics", "Detroit Pistons")
+    odds = get_ratings_store().snapshot.table.win_probabilities(["Boston Celtics"], ["Detroit Pistons"])[0]
+    assert result.predicted_winner == ("Boston Celtics" if odds >= 0.5 else "Detroit Pistons")
+    assert result.confidence == round(max(odds, 1 - odds), 2)
+    assert result.predicted_score in ("112-106", "106-112")
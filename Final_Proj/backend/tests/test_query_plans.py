@@ -0,0 +1,43 @@
+"""
+EXPLAIN QUERY PLAN regression test for the hot queries in migrations.HOT_QUERIES,
+and migrations racing another process.
+"""
+
+import sqlite3
+
+from app.memory import migrations
+from app.memory.database import Database
+from app.memory.migrations import MIGRATIONS, find_query_plan_regressions, get_schema_version
+
+def test_hot_queries_use_indexes(tmp_path):
+    """A fresh database with every migration applied answers each hot query from an index"""
+    db = Database(str(tmp_path / "plans.db"), pool_size=1)
+    try:
+        conn = db.get_connection()
+        try:
+            assert get_schema_version(conn) == MIGRATIONS[-1][0]
+            assert find_query_plan_regressions(conn) == []
+        finally:
+            conn.close()
+    finally:
+        db.close()
+
+def test_concurrent_migration_is_skipped(tmp_path, monkeypatch):
+    """A process that read an old version before another migrated skips what is already applied"""
+    path = str(tmp_path / "race.db")
+    Database(path, pool_size=1).close()
+
+    # The racing process read user_version before the other one migrated
+    real = migrations.get_schema_version
+    reads = []
+    def stale_first_read(conn):
+        reads.append(conn)
+        return 0 if len(reads) == 1 else real(conn)
+    monkeypatch.setattr(migrations, "get_schema_version", stale_first_read)
+
+    conn = sqlite3.connect(path)
+    try:
+        assert migrations.apply_migrations(conn) == MIGRATIONS[-1][0]
+        assert real(conn) == MIGRATIONS[-1][0]
+    finally:
+        conn.close()
@@ -0,0 +1,39 @@
+"""
+Reloading the question bank keeps the current questions when the file is
+missing, mid-edit or malformed.
+"""
+
+import json
+import os
+
+from app.memory.question_bank import QuestionBank
+
+def _questions(count: int):
+    return [{
+        "id": f"q{i}", "team": "Everton", "level": "Easy", "question": f"Question {i}?",
+        "options": ["A", "B", "C", "D"], "correctAnswerIndex": 0
+    } for i in range(count)]
+
+def test_bad_file_keeps_current_bank(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps(_questions(3)))
+    bank = QuestionBank(str(path), check_interval=0)
+    assert len(bank) == 3
+
+    # Half-written file
+    path.write_text(json.dumps(_questions(5))[:40])
+    os.utime(path, (1, 1))
+    assert not bank.reload_if_changed()
+    assert not bank.reload()
+    # Entries without ids
+    path.write_text(json.dumps([{"team": "Everton"}]))
+    assert not bank.reload()
+    # Deleted file
+    path.unlink()
+    assert not bank.reload_if_changed()
+    assert not bank.reload()
+    assert len(bank) == 3 and bank.loaded and bank.get_questions("Everton", "Easy")
+
+    path.write_text(json.dumps(_questions(5)))
+    assert bank.reload_if_changed()
+    assert len(bank) == 5
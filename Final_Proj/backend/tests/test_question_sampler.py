@@ -0,0 +1,60 @@
+"""
+The sampler serves unseen questions first when a level's pool is larger than
+a quiz, and only resets the pool once all of it has been asked.
+"""
+
+import json
+import threading
+
+from app.memory.database import Database
+from app.memory.question_bank import QuestionBank
+from app.memory.question_sampler import QuestionSampler
+
+def _sampler(tmp_path, pool_size: int) -> QuestionSampler:
+    questions = [{
+        "id": f"q{i}", "team": "Everton", "level": "Easy", "question": f"Question {i}?",
+        "options": ["A", "B", "C", "D"], "correctAnswerIndex": 0
+    } for i in range(pool_size)]
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps(questions))
+    db = Database(str(tmp_path / "sampler.db"), pool_size=2)
+    db.create_user("sampler", "sampler")
+    return QuestionSampler(QuestionBank(str(path)), db)
+
+def test_pool_larger_than_quiz(tmp_path):
+    sampler = _sampler(tmp_path, 25)
+    try:
+        first, reset = sampler.sample("sampler", "Everton", "Easy", 10)
+        assert not reset and len({q["id"] for q in first}) == 10
+        second, reset = sampler.sample("sampler", "Everton", "Easy", 10)
+        assert not reset and not {q["id"] for q in first} & {q["id"] for q in second}
+        assert sampler.unseen_count("sampler", "Everton", "Easy") == 5
+
+        # 5 unseen left: all of them are served, topped up with seen ones
+        third, reset = sampler.sample("sampler", "Everton", "Easy", 10)
+        assert not reset and len({q["id"] for q in third}) == 10
+        unseen = {f"q{i}" for i in range(25)} - {q["id"] for q in first + second}
+        assert unseen <= {q["id"] for q in third}
+        assert sampler.unseen_count("sampler", "Everton", "Easy") == 0
+
+        _, reset = sampler.sample("sampler", "Everton", "Easy", 10)
+        assert reset
+    finally:
+        sampler.db.close()
+
+def test_invalidate_waits_for_draws(tmp_path):
+    sampler = _sampler(tmp_path, 25)
+    try:
+        sampler.sample("sampler", "Everton", "Easy", 10)
+        stripe = sampler._key_locks[sampler._stripe("sampler", "Everton", "Easy")]
+        done = threading.Event()
+        with stripe:
+            # A draw holds the key's lock: invalidate must not drop its bitmap yet
+            worker = threading.Thread(target=lambda: (sampler.invalidate("sampler", "Everton"), done.set()))
+            worker.start()
+            assert not done.wait(0.1)
+        worker.join(5)
+        assert done.is_set()
+        assert not sampler._seen
+    finally:
+        sampler.db.close()
@@ -0,0 +1,58 @@
+"""
+Concurrent requests for an uncached (team, level) share one LLM generation,
+and a failing cache read falls through to generation.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.tools.quiz_generator import QuizGeneratorTool
+
+QUIZ = {"questions": [{
+    "question": "Where do the Boston Celtics play?",
+    "options": ["TD Garden", "Madison Square Garden", "Chase Center", "United Center"],
+    "correct_answer": "TD Garden",
+    "explanation": "The Celtics play at TD Garden."
+}] * 5}
+
+class SlowLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return json.dumps(QUIZ)
+
+class BrokenReadCache:
+    variants_per_key = 3
+
+    def __init__(self):
+        self.stored = []
+
+    async def get(self, team, level):
+        raise RuntimeError("database is locked")
+
+    async def put(self, team, level, questions):
+        self.stored.append((team, level))
+
+    def schedule_refill(self, team, level, generate):
+        pass
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_generation():
+    llm, cache = SlowLLM(), BrokenReadCache()
+    tool = QuizGeneratorTool("test-key", llm=llm, cache=cache)
+
+    quizzes = await asyncio.gather(*(tool.generate_quiz("Boston Celtics", 3) for _ in range(10)))
+
+    assert llm.calls == 1
+    assert cache.stored == [("Boston Celtics", 3)]
+    assert all(q.questions[0].correct_answer == "TD Garden" for q in quizzes)
+    assert not tool._inflight
+
+    # Once the generation is done, the next miss generates again
+    await tool.generate_quiz("Boston Celtics", 3)
+    assert llm.calls == 2
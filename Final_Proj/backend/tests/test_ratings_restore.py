@@ -0,0 +1,37 @@
+"""
+The database is the source of truth for ingested ratings: a ratings file that
+missed an update is caught up from rating_history.
+"""
+
+import shutil
+
+from app.memory.database import Database
+from app.predictions.elo import ResultsIngestor, normalize_result
+from app.predictions.ratings import SEED_RATINGS_PATH, RatingsStore
+
+def test_lost_ratings_write_is_restored(tmp_path):
+    path = str(tmp_path / "team_ratings.json")
+    shutil.copyfile(SEED_RATINGS_PATH, path)
+    db = Database(str(tmp_path / "ratings.db"), pool_size=1)
+    try:
+        store = RatingsStore(path)
+        ingestor = ResultsIngestor(db, store)
+        summary = ingestor.ingest([normalize_result({
+            "home": "Everton", "away": "Brentford", "home_score": 0, "away_score": 3,
+            "played_at": "2099-01-01T15:00:00Z"
+        })])
+        assert summary["applied"] == 1
+        updated = dict(store.snapshot.teams["Everton"])
+
+        # The process died before the file write: the file still holds the seed
+        shutil.copyfile(SEED_RATINGS_PATH, path)
+        restarted = RatingsStore(path)
+        assert restarted.snapshot.teams["Everton"] != updated
+
+        assert ResultsIngestor(db, restarted).restore()
+        assert dict(restarted.snapshot.teams["Everton"]) == updated
+        assert dict(RatingsStore(path).snapshot.teams["Everton"]) == updated
+        # Nothing left to restore
+        assert not ResultsIngestor(db, restarted).restore()
+    finally:
+        db.close()
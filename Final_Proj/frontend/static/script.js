@@ -350,12 +350,16 @@ function selectTeamFromModal(team) {
 }
 
 // ===== UI Navigation =====
-async function updateHeader() {
+async function updateHeader(user = null) {
     try {
-        // Fetch fresh user data from server
-        const response = await fetch(`${API_URL}/api/user/${currentUser.id}`);
-        if (response.ok) {
-            const user = await response.json();
+        // Fetch fresh user data from server, unless the caller already has it
+        if (!user) {
+            const response = await fetch(`${API_URL}/api/user/${currentUser.id}`);
+            if (response.ok) {
+                user = await response.json();
+            }
+        }
+        if (user) {
             currentUser.points = user.total_points || 0;
             currentUser.username = user.username || currentUser.username;
             currentUser.team = user.favorite_team || currentUser.team;
@@ -400,30 +404,16 @@ function switchView(viewName) {
 async function updateDashboardStats() {
     // Update the quick stats and sections on the dashboard without reloading everything
     try {
-        // Load quiz history to count and display
-        const quizResponse = await fetch(`${API_URL}/api/user/${currentUser.id}/history/quizzes`);
-        if (quizResponse.ok) {
-            const data = await quizResponse.json();
-            const quizzes = data.quiz_history || [];
-            const quizCount = quizzes.length;
-            document.getElementById('quick-quiz-count').textContent = quizCount;
-            loadQuizDashboard(quizzes); // Reload the quiz section
-        }
-        
-        // Load predictions to count and display
-        const predResponse = await fetch(`${API_URL}/api/user/${currentUser.id}/history/predictions`);
-        if (predResponse.ok) {
-            const data = await predResponse.json();
-            const predictions = data.prediction_history || [];
-            const predCount = predictions.length;
-            document.getElementById('quick-pred-count').textContent = predCount;
-            loadPredictionDashboard(predictions); // Reload the predictions section
-        }
-        
-        // Reload user data for badges
-        const userResponse = await fetch(`${API_URL}/api/user/${currentUser.id}`);
+        // One profile request carries the counts, recent history and badges
+        const userResponse = await fetch(`${API_URL}/api/user/${currentUser.id}?history_limit=5`);
         if (userResponse.ok) {
             const user = await userResponse.json();
+            const summary = user.summary || {};
+            document.getElementById('quick-quiz-count').textContent = summary.quiz_count || 0;
+            loadQuizDashboard(user.quiz_history || []); // Reload the quiz section
+            document.getElementById('quick-pred-count').textContent = summary.prediction_count || 0;
+            loadPredictionDashboard(user.prediction_history || []); // Reload the predictions section
+            
             currentUser.points = user.total_points || 0;
             currentUser.badges = user.badges || [];
             
@@ -472,31 +462,19 @@ async function initializeDashboard() {
         let quizCount = 0;
         let predCount = 0;
         
-        // Load quiz history
-        const quizResponse = await fetch(`${API_URL}/api/user/${currentUser.id}/history/quizzes`);
-        if (quizResponse.ok) {
-            const data = await quizResponse.json();
-            const quizzes = data.quiz_history || [];
-            quizCount = quizzes.length;
-            loadQuizDashboard(quizzes);
-        }
-        
-        // Load predictions
-        const predResponse = await fetch(`${API_URL}/api/user/${currentUser.id}/history/predictions`);
-        if (predResponse.ok) {
-            const data = await predResponse.json();
-            const predictions = data.prediction_history || [];
-            predCount = predictions.length;
-            loadPredictionDashboard(predictions);
-        }
-        
-        // Load user data for stats
-        const userResponse = await fetch(`${API_URL}/api/user/${currentUser.id}`);
+        // Load profile, summary counts and recent history in one request
+        const userResponse = await fetch(`${API_URL}/api/user/${currentUser.id}?history_limit=5`);
         if (userResponse.ok) {
             const user = await userResponse.json();
+            const summary = user.summary || {};
+            quizCount = summary.quiz_count || 0;
+            predCount = summary.prediction_count || 0;
+            loadQuizDashboard(user.quiz_history || []);
+            loadPredictionDashboard(user.prediction_history || []);
+            
             currentUser.points = user.total_points || 0;
             currentUser.badges = user.badges || [];  // Store badges in currentUser
-            updateHeader();
+            updateHeader(user);  // Reuse this profile instead of fetching it again
             loadAchievements(currentUser.badges, currentUser.points); // Pass points for progress calculation
         }
         
@@ -1158,8 +1136,9 @@ async function sendChatMessage() {
     addChatMessage('user', message);
     input.value = '';
     
+    let bubble = null;
     try {
-        const response = await fetch(`${API_URL}/api/chat`, {
+        const response = await fetch(`${API_URL}/api/chat/stream`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -1168,13 +1147,62 @@ async function sendChatMessage() {
             })
         });
         
-        if (response.ok) {
-            const data = await response.json();
-            addChatMessage('assistant', data.response);
+        if (response.ok && response.body) {
+            bubble = addChatMessage('assistant', '');
+            await renderChatStream(response, bubble);
         }
     } catch (error) {
         console.error('Chat error:', error);
-        addChatMessage('assistant', 'Sorry, I encountered an error. Please try again.');
+        const errorText = 'Sorry, I encountered an error. Please try again.';
+        if (bubble && !bubble.textContent) {
+            bubble.textContent = errorText;
+        } else {
+            addChatMessage('assistant', errorText);
+        }
+    }
+}
+
+// Render Server-Sent Events from /api/chat/stream into a message bubble as they arrive.
+// "token" events append text, "done" carries the final reply, "error" aborts.
+async function renderChatStream(response, bubble) {
+    const container = document.getElementById('chat-messages');
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventName = 'message';
+            let data = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    data += line.slice(5).trim();
+                }
+            }
+            if (!data) continue;
+            
+            const payload = JSON.parse(data);
+            if (eventName === 'token') {
+                text += payload.delta;
+                bubble.textContent = text;
+            } else if (eventName === 'done') {
+                bubble.innerHTML = payload.response;
+            } else if (eventName === 'error') {
+                throw new Error(payload.detail);
+            }
+            container.scrollTop = container.scrollHeight;
+        }
     }
 }
 
@@ -1185,6 +1213,7 @@ function addChatMessage(sender, message) {
     messageDiv.innerHTML = `<div class="message-bubble"><p>${message}</p></div>`;
     container.appendChild(messageDiv);
     container.scrollTop = container.scrollHeight;
+    return messageDiv.querySelector('p');
 }
 
 // ===== Leaderboard =====
@@ -1499,17 +1528,16 @@ async function submitPrediction() {
 function displayPredictionResult(result) {
     const resultCard = document.getElementById('prediction-result');
     const resultData = result.result || result;
-    const isCorrect = resultData.is_correct;
     
+    // Predictions are settled, and points awarded, once the real result is in
     resultCard.innerHTML = `
         <div class="result-card">
-            <h3>Prediction Result</h3>
+            <h3>Prediction Submitted</h3>
             <p><strong>Your Prediction:</strong> ${resultData.user_prediction}</p>
-            <p><strong>Actual Outcome:</strong> ${resultData.system_outcome}</p>
+            <p><strong>Model's Pick:</strong> ${resultData.system_prediction}</p>
             <p><strong>Explanation:</strong> ${resultData.explanation}</p>
-            <p><strong>Points Earned:</strong> <span id="result-points">${resultData.points_earned} 🎯</span></p>
-            <div class="result-status ${isCorrect ? 'correct' : 'incorrect'}">
-                ${isCorrect ? '✅ Correct!' : '❌ Incorrect'}
+            <div class="result-status">
+                ⏳ Pending — points are awarded when the match result comes in
             </div>
         </div>
     `;
@@ -1537,7 +1565,7 @@ function resetPredictionForm() {
 async function loadPredictionHistory() {
     try {
         // Use the correct API endpoint that returns prediction_history
-        const response = await fetch(`${API_URL}/api/user/${currentUser.id}/history/predictions`);
+        const response = await fetch(`${API_URL}/api/user/${currentUser.id}/history/predictions?limit=20`);
         if (!response.ok) {
             throw new Error('Failed to load prediction history');
         }